@@ -1,15 +1,239 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, render_template, jsonify, request, g
 import networkx as nx
+import base64
+import json
 import math
 import os
-from typing import Dict, List, Optional, Tuple
+import threading
+import time
+from array import array
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Calculs groupés en Python pur
+    np = None
+
+from itertools import islice
+
+from cache_routes import CacheLRU, CacheRedis, CacheRoutes
+from format_compact import compacter_itineraire
+from graphe_compact import ConstructeurGraphe, GrapheCompact, charger_fichier
+from index_spatial import GrilleSpatiale
+from isochrones import FORMES as FORMES_ISOCHRONE, geometrie, points_atteints
+from matrice import CalculateurMatrice
+from metriques import METRIQUES, TYPE_CONTENU as TYPE_METRIQUES, chronometrer, observer_recherche
+from profils import NB_INTERVALLES, ProfilsHoraires, formater_heure, lire_heure, profil_depuis_facteur
+from reponses import ReponsePreparee
+from routage import (INFINI, HierarchiePersonnalisable, astar, astar_bidirectionnel, astar_horaire,
+                     compter_chemins, dijkstra, distances_depuis, front_pareto, itineraires_alternatifs,
+                     k_plus_courts_chemins, poids_avec_departage)
+from snapshot import ouvrir_snapshot
+from statistiques_reseau import StatistiquesReseau
+from transit import MAX_CORRESPONDANCES_DEFAUT, HoraireTransit, charger_gtfs
+from tuiles import rectangle_tuile, tuile_valide, types_noeuds_visibles, types_routes_visibles
 
 app = Flask(__name__)
 
+class EtatReseau:
+    """
+    État publié pour une version du graphe : réseau compact (trafic compris),
+    hiérarchies de contraction et trafic.
+
+    Il n'est jamais modifié après publication, sinon pour y ajouter une
+    hiérarchie manquante, construite sur son propre réseau : une nouvelle
+    version en publie un autre par une seule affectation, et une requête le
+    lit une fois puis s'y tient, sans mélanger deux versions.
+    """
+    __slots__ = ('version', 'reseau', 'hierarchies', 'trafic')
+
+    def __init__(self, version: int, reseau: Optional[GrapheCompact],
+                 hierarchies: Dict[str, HierarchiePersonnalisable], trafic: Dict[Tuple[str, str], Dict]):
+        """reseau vaut None après une modification de la structure : il est reconstruit à la première lecture"""
+        self.version = version
+        self.reseau = reseau
+        self.hierarchies = hierarchies
+        self.trafic = trafic
+
 class TransportSystem:
-    def __init__(self):
-        self.G = nx.DiGraph()
-        self.setup_network()
+    CRITERES = ('distance', 'temps')
+    # Algorithmes de recherche point à point (même résultat, coûts de recherche différents)
+    ALGORITHMES = ('ch', 'dijkstra', 'astar', 'bidirectionnel')
+    # Au-delà de cette taille, les hiérarchies de contraction ne sont pas construites
+    # à la demande : elles viennent d'un snapshot (ou de preparer_routage), sinon
+    # 'ch' est remplacé par l'A* bidirectionnel
+    SEUIL_CONTRACTION_A_LA_DEMANDE = 5000
+    # Itinéraire par défaut de l'application
+    DEPART_DEFAUT = 'RP_VICTOIRE'
+    ARRIVEE_DEFAUT = 'GARE_CENTRALE'
+
+    # Vitesses moyennes par type de route (km/h)
+    VITESSES_MOYENNES = {
+        'principale': 25,     # Routes principales fluides (km/h)
+        'alternative': 20,    # Routes secondaires (km/h)
+        'express': 30         # Routes rapides (km/h)
+    }
+    VITESSE_PAR_DEFAUT = 20
+
+    # Facteur de trafic réaliste pour Kinshasa
+    FACTEURS_TRAFIC = {
+        'principale': 1.3,    # Plus de trafic sur les routes principales
+        'alternative': 1.15,  # Moins de trafic sur les alternatives
+        'express': 1.1        # Peu de trafic sur les routes express
+    }
+    FACTEUR_TRAFIC_PAR_DEFAUT = 1.2
+
+    RAYON_TERRE_KM = 6371.0
+
+    # Longueur maximale (en arêtes) des chemins comptés par les diagnostics
+    LONGUEUR_MAX_DIAGNOSTIC = 10
+
+    # Clés d'un chemin de /api/all-simple-paths (projection par ?fields=)
+    CHAMPS_CHEMIN_SIMPLE = ('path', 'path_ids', 'total_distance_km', 'total_time_min',
+                            'vitesse_moyenne', 'nombre_etapes', 'steps')
+    # Énumérations de chemins simples en cours, reprises par curseur
+    TAILLE_CACHE_CURSEURS = 64
+
+    # Nombre de tuiles de carte conservées (pré-sérialisées et compressées)
+    TAILLE_CACHE_TUILES = 4096
+
+    # Nombre maximal d'étiquettes fixées par une recherche du front de Pareto
+    LIMITE_ETIQUETTES_PARETO = 200000
+
+    # Itinéraires alternatifs : nombre, coût maximal (en multiple de l'optimal) et
+    # part maximale du coût partagée avec un itinéraire déjà retenu
+    NOMBRE_ALTERNATIVES = 3
+    ETIREMENT_ALTERNATIVES = 1.3
+    PARTAGE_ALTERNATIVES = 0.6
+
+    # Au-delà de cette taille, l'intermédiarité est estimée à partir d'un échantillon de sources
+    SEUIL_ECHANTILLONNAGE_CENTRALITE = 2000
+    ECHANTILLON_CENTRALITE_DEFAUT = 256
+
+    def __init__(self, betweenness_k: Optional[int] = None, fichier: Optional[str] = None,
+                 snapshot: Optional[str] = None, cache_routes: Optional[CacheRoutes] = None,
+                 gtfs: Optional[str] = None, date_gtfs: Optional[str] = None):
+        self._G: Optional[nx.DiGraph] = nx.DiGraph()
+        # État publié (version du graphe, réseau, hiérarchies, trafic), remplacé d'un
+        # bloc sous ce verrou ; la version est incrémentée à chaque modification de
+        # la topologie ou des poids
+        self._etat = EtatReseau(0, None, {}, {})
+        self._verrou_etat = threading.RLock()
+        # Version de la structure (topologie et poids de référence, hors trafic) :
+        # les données qui n'en dépendent que survivent aux mises à jour du trafic
+        self.version_structure = 0
+        # Nombre de sources échantillonnées pour l'intermédiarité (None = automatique)
+        self.betweenness_k = betweenness_k
+        self._reseau_base: Tuple[int, Optional[GrapheCompact]] = (-1, None)
+        self._centralites: Tuple[int, Dict[str, Dict]] = (-1, {})
+        self._hierarchies_precedentes: Dict[str, HierarchiePersonnalisable] = {}
+        self._diagnostics: Tuple[int, Optional[Dict]] = (-1, None)
+        self._index_spatial: Tuple[int, Optional[GrilleSpatiale]] = (-1, None)
+        self._poids_recherche: Tuple[int, Dict[str, Sequence[float]]] = (-1, {})
+        self._coefficients_heuristique: Tuple[int, Optional[Dict[str, float]]] = (-1, None)
+        self._matrices: Tuple[int, Optional[CalculateurMatrice]] = (-1, None)
+        self._reponses: Tuple[int, Dict[str, ReponsePreparee]] = (-1, {})
+        self._tuiles: Tuple[int, Optional[CacheLRU]] = (-1, None)
+        self._statistiques: Tuple[int, Optional[StatistiquesReseau]] = (-1, None)
+        self._curseurs = CacheLRU(self.TAILLE_CACHE_CURSEURS)
+        # Profils horaires de trafic : définitions explicites (par nom), puis profils
+        # compilés et temps à vitesse libre, recalculés quand le réseau ou les définitions changent
+        self.definitions_profils: Dict[str, Dict] = {}
+        self.version_profils = 0
+        self._profils: Tuple[Tuple[int, int], Optional[ProfilsHoraires]] = ((-1, -1), None)
+        self._temps_libres: Tuple[int, Optional[array]] = (-1, None)
+        self._coefficient_horaire: Tuple[Tuple[int, int], float] = ((-1, -1), 0.0)
+        # Horodatage de la dernière modification (en-tête Last-Modified des réponses préparées)
+        self.derniere_modification = time.time()
+        # Itinéraires déjà calculés, par version du graphe
+        self.cache_routes = cache_routes or CacheRoutes()
+        self._verrou_diagnostics = threading.Lock()
+        # Horaires de transport en commun (GTFS), indépendants des versions du graphe
+        self.transit: Optional[HoraireTransit] = None
+        if snapshot:
+            self.charger_snapshot(snapshot)
+        elif fichier:
+            self.charger_reseau(fichier)
+        else:
+            self.setup_network()
+        if gtfs:
+            self.charger_horaires(gtfs, date_gtfs)
+
+    @property
+    def G(self) -> nx.DiGraph:
+        """
+        Graphe networkx du réseau (attributs complets, modifiable).
+
+        Pour un réseau chargé depuis un fichier, il n'est matérialisé qu'à la
+        première utilisation : le routage travaille sur self.reseau. Il décrit
+        le réseau de référence, sans les mises à jour du trafic.
+        """
+        if self._G is None:
+            self._G = self.reseau_base.vers_networkx()
+        return self._G
+
+    @property
+    def reseau_base(self) -> GrapheCompact:
+        """Représentation compacte (CSR) du réseau de référence, hors trafic"""
+        version, reseau = self._reseau_base
+        if version != self.version_structure:
+            version, reseau = self.version_structure, GrapheCompact.depuis_networkx(self._G)
+            self._reseau_base = (version, reseau)
+        return reseau
+
+    @property
+    def etat(self) -> EtatReseau:
+        """État publié de la version courante, son réseau compact reconstruit au besoin"""
+        etat = self._etat
+        if etat.reseau is None:
+            with self._verrou_etat:
+                etat = self._etat
+                if etat.reseau is None:
+                    base = self.reseau_base
+                    reseau = self._appliquer_trafic(base, base, etat.trafic) if etat.trafic else base
+                    etat = EtatReseau(etat.version, reseau, {}, etat.trafic)
+                    self._etat = etat
+        return etat
+
+    @property
+    def reseau(self) -> GrapheCompact:
+        """
+        Représentation compacte (CSR) du réseau pour la version courante du graphe
+        (trafic compris). Un traitement qui en lit plusieurs éléments passe par
+        self.etat, lu une seule fois.
+        """
+        return self.etat.reseau
+
+    @property
+    def graph_version(self) -> int:
+        """Version courante du graphe"""
+        return self._etat.version
+
+    @property
+    def trafic(self) -> Dict[Tuple[str, str], Dict]:
+        """État du trafic par arête (dep, arr) : temps et vitesse mesurés, ou fermeture"""
+        return self._etat.trafic
+
+    def charger_reseau(self, chemin: str):
+        """Remplace le réseau par celui d'un fichier GeoJSON, OSM ou d'un répertoire CSV"""
+        self.charger_constructeur(charger_fichier(chemin))
+
+    def charger_constructeur(self, constructeur: ConstructeurGraphe):
+        """Remplace le réseau par celui accumulé dans un constructeur (poids manquants calculés)"""
+        self._remplacer_reseau(constructeur.construire(self.calculer_poids_aretes), {})
+
+    def charger_snapshot(self, chemin: str):
+        """Remplace le réseau par un snapshot binaire projeté en mémoire (voir snapshot.py)"""
+        self._remplacer_reseau(*ouvrir_snapshot(chemin))
+
+    def _remplacer_reseau(self, reseau: GrapheCompact, hierarchies: Dict[str, HierarchiePersonnalisable]):
+        """Publie un nouveau réseau de référence, sans trafic, et ses hiérarchies éventuelles"""
+        with self._verrou_etat:
+            self._G = None
+            self.version_structure += 1
+            self._reseau_base = (self.version_structure, reseau)
+            self._etat = EtatReseau(self._etat.version + 1, reseau, hierarchies, {})
+            self.derniere_modification = time.time()
     
     def setup_network(self):
         """Initialise le réseau de transport avec des coordonnées réalistes et routes complètes"""
@@ -178,7 +402,7 @@ class TransportSystem:
         
         # Ajout des nœuds avec métadonnées complètes
         for node_id, info in locations.items():
-            self.G.add_node(node_id, **info)
+            self.ajouter_arret(node_id, **info)
         
         # DÉFINITION DE TOUTES LES CONNEXIONS POSSIBLES
         connections = [
@@ -254,36 +478,110 @@ class TransportSystem:
             ('POSTE_POLICE', 'EGLISE_SAINTE', 'Liaison de Sécurité', 'alternative')
         ]
         
-        # Calcul automatique des distances et temps
-        for dep, arr, nom_route, type_route in connections:
-            distance = self.calculer_distance_reelle(
-                self.G.nodes[dep]['lat'], self.G.nodes[dep]['lon'],
-                self.G.nodes[arr]['lat'], self.G.nodes[arr]['lon']
-            )
-            
-            temps = self.calculer_temps_trajet(distance, type_route)
-            
+        # Calcul automatique (groupé) des distances et temps
+        depart = [self.G.nodes[dep] for dep, _, _, _ in connections]
+        arrivee = [self.G.nodes[arr] for _, arr, _, _ in connections]
+        distances, temps, vitesses = self.calculer_poids_aretes(
+            [n['lat'] for n in depart], [n['lon'] for n in depart],
+            [n['lat'] for n in arrivee], [n['lon'] for n in arrivee],
+            [type_route for _, _, _, type_route in connections]
+        )
+        for (dep, arr, nom_route, type_route), distance, duree, vitesse in zip(connections, distances, temps, vitesses):
             self.G.add_edge(
-                dep, arr, 
-                distance=round(distance, 3),
-                temps=round(temps, 1),
+                dep, arr,
+                distance=distance,
+                temps=duree,
                 nom_route=nom_route,
                 type_route=type_route,
-                vitesse_moyenne=self.get_vitesse_moyenne(type_route)
+                vitesse_moyenne=vitesse
             )
+        self.marquer_modification()
+    
+    # --- MODIFICATIONS DU GRAPHE ---
+    # Toute modification passe par ces méthodes afin d'invalider les données dérivées
+    # (centralités, etc.) associées à l'ancienne version du graphe.
+
+    def marquer_modification(self):
+        """Signale une modification du graphe et invalide les données calculées"""
+        with self._verrou_etat:
+            # Graphe jamais matérialisé : il décrit encore le réseau de référence actuel
+            self.G
+            self.version_structure += 1
+            etat = self._etat
+            self._etat = EtatReseau(etat.version + 1, None, {}, etat.trafic)
+            self.derniere_modification = time.time()
+
+    def ajouter_arret(self, node_id: str, nom: str, lat: float, lon: float,
+                      type: str = 'intermediaire', description: str = ''):
+        """Ajoute (ou met à jour) un arrêt du réseau"""
+        stats = self._statistiques_suivies()
+        self.G.add_node(node_id, nom=nom, lat=lat, lon=lon, type=type, description=description)
+        if stats is not None:
+            stats.ajouter_noeud(node_id, type)
+        self.marquer_modification()
+        self._conserver_statistiques(stats)
+
+    def supprimer_arret(self, node_id: str) -> bool:
+        """Supprime un arrêt et toutes ses connexions"""
+        if node_id not in self.G:
+            return False
+        stats = self._statistiques_suivies()
+        if stats is not None:
+            for dep, arr in set(self.G.in_edges(node_id)) | set(self.G.out_edges(node_id)):
+                data = self.G[dep][arr]
+                stats.retirer_arete(dep, arr, data['type_route'], data['distance'], data['temps'])
+            stats.retirer_noeud(node_id)
+        self.G.remove_node(node_id)
+        self.marquer_modification()
+        self._conserver_statistiques(stats)
+        return True
+
+    def ajouter_connexion(self, dep: str, arr: str, nom_route: str, type_route: str):
+        """Ajoute une connexion orientée en calculant sa distance et son temps de trajet"""
+        distance = self.calculer_distance_reelle(
+            self.G.nodes[dep]['lat'], self.G.nodes[dep]['lon'],
+            self.G.nodes[arr]['lat'], self.G.nodes[arr]['lon']
+        )
+        
+        temps = self.calculer_temps_trajet(distance, type_route)
+        
+        stats = self._statistiques_suivies()
+        if stats is not None and self.G.has_edge(dep, arr):
+            data = self.G[dep][arr]
+            stats.retirer_arete(dep, arr, data['type_route'], data['distance'], data['temps'])
+        self.G.add_edge(
+            dep, arr, 
+            distance=round(distance, 3),
+            temps=round(temps, 1),
+            nom_route=nom_route,
+            type_route=type_route,
+            vitesse_moyenne=self.get_vitesse_moyenne(type_route)
+        )
+        if stats is not None:
+            stats.ajouter_arete(dep, arr, type_route, round(distance, 3), round(temps, 1))
+        self.marquer_modification()
+        self._conserver_statistiques(stats)
+
+    def supprimer_connexion(self, dep: str, arr: str) -> bool:
+        """Supprime une connexion orientée"""
+        if not self.G.has_edge(dep, arr):
+            return False
+        stats = self._statistiques_suivies()
+        if stats is not None:
+            data = self.G[dep][arr]
+            stats.retirer_arete(dep, arr, data['type_route'], data['distance'], data['temps'])
+        self.G.remove_edge(dep, arr)
+        self.marquer_modification()
+        self._conserver_statistiques(stats)
+        return True
     
     def get_vitesse_moyenne(self, type_route: str) -> int:
         """Retourne la vitesse moyenne selon le type de route"""
-        vitesses = {
-            'principale': 25,     # Routes principales fluides (km/h)
-            'alternative': 20,    # Routes secondaires (km/h)
-            'express': 30         # Routes rapides (km/h)
-        }
-        return vitesses.get(type_route, 20)
+        return self.VITESSES_MOYENNES.get(type_route, self.VITESSE_PAR_DEFAUT)
     
     def calculer_distance_reelle(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calcule la distance réelle entre deux points GPS avec formule Haversine"""
-        R = 6371.0
+        R = self.RAYON_TERRE_KM
         lat1_rad = math.radians(lat1)
         lon1_rad = math.radians(lon1)
         lat2_rad = math.radians(lat2)
@@ -304,75 +602,448 @@ class TransportSystem:
         temps_heures = distance / vitesse
         temps_minutes = temps_heures * 60
         
-        # Facteur de trafic réaliste pour Kinshasa
-        facteurs_trafic = {
-            'principale': 1.3,    # Plus de trafic sur les routes principales
-            'alternative': 1.15,  # Moins de trafic sur les alternatives
-            'express': 1.1        # Peu de trafic sur les routes express
-        }
-        
-        facteur_trafic = facteurs_trafic.get(type_route, 1.2)
+        facteur_trafic = self.FACTEURS_TRAFIC.get(type_route, self.FACTEUR_TRAFIC_PAR_DEFAUT)
         return temps_minutes * facteur_trafic
+
+    def calculer_poids_aretes(self, lat1: List[float], lon1: List[float], lat2: List[float],
+                              lon2: List[float], types_route: List[str]) -> Tuple[List[float], List[float], List[int]]:
+        """
+        Calcule distances, temps et vitesses d'un lot d'arêtes (arrondis comme dans ajouter_connexion).
+
+        Avec NumPy, le calcul porte sur des tableaux entiers ; les fonctions
+        scalaires calculer_distance_reelle / calculer_temps_trajet restent la
+        référence et donnent les mêmes valeurs.
+        """
+        if np is not None and len(types_route):
+            return self._calculer_poids_aretes_numpy(lat1, lon1, lat2, lon2, types_route)
+        
+        distances, temps, vitesses = [], [], []
+        for i in range(len(types_route)):
+            distance = self.calculer_distance_reelle(lat1[i], lon1[i], lat2[i], lon2[i])
+            distances.append(round(distance, 3))
+            temps.append(round(self.calculer_temps_trajet(distance, types_route[i]), 1))
+            vitesses.append(self.get_vitesse_moyenne(types_route[i]))
+        return distances, temps, vitesses
+
+    def _distances_numpy(self, lat1, lon1, lat2, lon2):
+        """Version vectorisée de calculer_distance_reelle (mêmes opérations, dans le même ordre)"""
+        lat1_rad = np.radians(np.asarray(lat1, dtype=np.float64))
+        lon1_rad = np.radians(np.asarray(lon1, dtype=np.float64))
+        lat2_rad = np.radians(np.asarray(lat2, dtype=np.float64))
+        lon2_rad = np.radians(np.asarray(lon2, dtype=np.float64))
+        
+        dlat = lat2_rad - lat1_rad
+        dlon = lon2_rad - lon1_rad
+        
+        a = np.sin(dlat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon/2)**2
+        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+        return self.RAYON_TERRE_KM * c
+
+    def _calculer_poids_aretes_numpy(self, lat1, lon1, lat2, lon2, types_route):
+        """Version vectorisée de calculer_poids_aretes (mêmes opérations, dans le même ordre)"""
+        distances = self._distances_numpy(lat1, lon1, lat2, lon2)
+        
+        # Vitesse et facteur de trafic : une recherche par type distinct, puis indexation
+        types: Dict[str, int] = {}
+        codes = np.fromiter((types.setdefault(t, len(types)) for t in types_route),
+                            dtype=np.intp, count=len(types_route))
+        vitesses = np.array([self.get_vitesse_moyenne(t) for t in types])[codes]
+        facteurs = np.array([self.FACTEURS_TRAFIC.get(t, self.FACTEUR_TRAFIC_PAR_DEFAUT) for t in types])[codes]
+        temps = distances / vitesses * 60 * facteurs
+        
+        return self._arrondir(distances, 3), self._arrondir(temps, 1), vitesses.tolist()
+
+    @staticmethod
+    def _arrondir(valeurs, decimales: int) -> List[float]:
+        """
+        Arrondi vectorisé identique à round() : seuls les cas proches d'une
+        demi-unité, où rint peut différer de l'arrondi décimal exact de Python,
+        sont recalculés avec round().
+        """
+        echelle = 10.0 ** decimales
+        agrandies = valeurs * echelle
+        resultat = np.rint(agrandies) / echelle
+        ambigus = np.nonzero(np.abs(agrandies - np.floor(agrandies) - 0.5) < 1e-6)[0]
+        for i in ambigus.tolist():
+            resultat[i] = round(float(valeurs[i]), decimales)
+        return resultat.tolist()
     
-    def get_shortest_path(self, start: str, end: str, criteria: str = 'distance') -> Optional[Dict]:
-        """Trouve le chemin optimal selon le critère spécifié"""
-        try:
-            if criteria not in ['distance', 'temps']:
-                criteria = 'distance'
-            
-            path = nx.shortest_path(self.G, start, end, weight=criteria)
-            
-            total_distance = sum(self.G[path[i]][path[i+1]]['distance'] for i in range(len(path)-1))
-            total_time = sum(self.G[path[i]][path[i+1]]['temps'] for i in range(len(path)-1))
-            
-            steps = []
-            path_coords = []
+    # --- TRAFIC EN TEMPS RÉEL ---
+    # Le trafic modifie les poids d'arêtes existantes sans toucher à la structure.
+    # Chaque lot de mises à jour publie une nouvelle version complète (réseau
+    # partageant la topologie du précédent, hiérarchies recontractées dans le même
+    # ordre) : les requêtes en cours terminent sur la version qu'elles ont lue.
+
+    def _etat_trafic(self, mise_a_jour: Dict) -> Optional[Dict]:
+        """
+        État de trafic d'une mise à jour : {'closed': True}, {'time': min},
+        {'speed': km/h} ou {'factor': x} (plus 'reason' éventuel) ; None pour
+        revenir aux poids de référence ('reset' ou 'closed': false).
+        """
+        motif = {'reason': str(mise_a_jour['reason'])} if mise_a_jour.get('reason') else {}
+        if mise_a_jour.get('reset'):
+            return None
+        if mise_a_jour.get('closed'):
+            return {'closed': True, **motif}
+        for cle in ('time', 'speed', 'factor'):
+            if cle in mise_a_jour:
+                valeur = mise_a_jour[cle]
+                if isinstance(valeur, bool) or not isinstance(valeur, (int, float)) or not 0 < valeur < INFINI:
+                    raise ValueError(f"Valeur '{cle}' invalide pour {mise_a_jour.get('from')} -> {mise_a_jour.get('to')}")
+                if cle == 'speed' and not 1 <= valeur <= 65535:
+                    raise ValueError(f"Vitesse hors limites pour {mise_a_jour.get('from')} -> {mise_a_jour.get('to')}")
+                return {cle: float(valeur), **motif}
+        if mise_a_jour.get('closed') is False:
+            return None
+        raise ValueError("Chaque mise à jour doit préciser 'time', 'speed', 'factor', 'closed' ou 'reset'")
+
+    def _appliquer_trafic(self, base: GrapheCompact, actuel: GrapheCompact,
+                          etats: Dict[Tuple[str, str], Optional[Dict]]) -> GrapheCompact:
+        """
+        Nouveau réseau de même topologie : poids de 'actuel', sauf pour les
+        arêtes de 'etats', recalculées depuis leurs poids de référence (base).
+        Une arête fermée prend un poids infini, que toutes les recherches ignorent.
+        """
+        distances = array('d', actuel.poids['distance'])
+        temps = array('d', actuel.poids['temps'])
+        vitesses = array('H', actuel.vitesses)
+        for (dep, arr), etat in etats.items():
+            if dep not in base.index or arr not in base.index:
+                continue
+            for e in base.aretes_entre(base.index[dep], base.index[arr]):
+                distances[e] = base.poids['distance'][e]
+                temps[e] = base.poids['temps'][e]
+                vitesses[e] = base.vitesses[e]
+                if etat is None:
+                    continue
+                if etat.get('closed'):
+                    distances[e] = temps[e] = INFINI
+                elif 'time' in etat:
+                    temps[e] = etat['time']
+                elif 'speed' in etat:
+                    # Vitesse mesurée : le facteur de trafic est déjà compris
+                    temps[e] = round(base.poids['distance'][e] / etat['speed'] * 60, 1)
+                    vitesses[e] = round(etat['speed'])
+                else:
+                    temps[e] = round(base.poids['temps'][e] * etat['factor'], 1)
+        return base.avec_poids({'distance': distances, 'temps': temps}, vitesses)
+
+    @chronometrer()
+    def appliquer_trafic(self, mises_a_jour: List[Dict]) -> Dict:
+        """
+        Applique un lot de mises à jour du trafic ({'from', 'to'} et 'time',
+        'speed', 'factor', 'closed' ou 'reset') et publie la nouvelle version.
+
+        Seuls les poids des arêtes concernées sont recalculés, et dans les
+        hiérarchies déjà construites, seuls les arcs qui en dépendent (voir
+        HierarchiePersonnalisable.personnaliser). Si le lot ne fait que
+        ralentir ou fermer des arêtes, les itinéraires en cache qui ne les
+        empruntent pas restent optimaux et sont conservés.
+        """
+        debut = time.perf_counter()
+        with self._verrou_etat:
+            base = self.reseau_base
+            etats: Dict[Tuple[str, str], Optional[Dict]] = {}
+            for mise_a_jour in mises_a_jour:
+                if not isinstance(mise_a_jour, dict):
+                    raise ValueError("Chaque mise à jour doit être un objet")
+                dep, arr = mise_a_jour.get('from'), mise_a_jour.get('to')
+                if dep not in base.index or arr not in base.index \
+                        or not base.aretes_entre(base.index[dep], base.index[arr]):
+                    raise ValueError(f"Connexion inconnue : {dep} -> {arr}")
+                etats[(dep, arr)] = self._etat_trafic(mise_a_jour)
+
+            etat = self.etat
+            version, actuel = etat.version, etat.reseau
+            nouveau = self._appliquer_trafic(base, actuel, etats)
+            aretes = [e for dep, arr in etats for e in base.aretes_entre(base.index[dep], base.index[arr])]
+            hierarchies = {criteria: hierarchie.personnaliser(nouveau, aretes)
+                           for criteria, hierarchie in etat.hierarchies.items()}
+
+            trafic = dict(etat.trafic)
+            for cle, etat in etats.items():
+                if etat is None:
+                    trafic.pop(cle, None)
+                else:
+                    trafic[cle] = etat
+
+            # Itinéraires en cache : conservés seulement si aucune arête n'a accéléré
+            ralentissements_seuls = all(
+                nouveau.poids[criteria][e] >= actuel.poids[criteria][e] for e in aretes for criteria in self.CRITERES
+            )
+
+            def encore_valide(cle: Tuple, valeur: Dict) -> bool:
+                if cle[0] == 'comparaison':
+                    chemins = (valeur['by_distance'], valeur['by_time'])
+                elif cle[0] in ('pareto', 'alternatives'):
+                    chemins = valeur['routes']
+                else:
+                    chemins = (valeur,)
+                return all(chemin is None or not any(
+                    (dep, arr) in etats for dep, arr in zip(chemin['path_ids'], chemin['path_ids'][1:])
+                ) for chemin in chemins)
+
+            nouvelle_version = version + 1
+            # Les versions de ce worker ne désignent plus le même réseau que chez les autres
+            self.cache_routes.desactiver_partage()
+            routes_conservees = self.cache_routes.migrer(
+                version, nouvelle_version, encore_valide if ralentissements_seuls else lambda cle, valeur: False
+            )
+
+            # Publication en une seule affectation : version, réseau, hiérarchies et trafic
+            self._etat = EtatReseau(nouvelle_version, nouveau, hierarchies, trafic)
+            self.derniere_modification = time.time()
+
+        return {
+            'graph_version': nouvelle_version,
+            'connexions_modifiees': len(etats),
+            'aretes_modifiees': len(aretes),
+            'routes_conservees': routes_conservees,
+            'duree_ms': round((time.perf_counter() - debut) * 1000, 1)
+        }
+
+    def get_trafic(self, etat: Optional[EtatReseau] = None) -> List[Dict]:
+        """État du trafic (par défaut l'état courant) : une entrée par connexion modifiée"""
+        trafic = (etat or self._etat).trafic
+        return [{'from': dep, 'to': arr, **mesure} for (dep, arr), mesure in trafic.items()]
+
+    # --- MOTEUR DE ROUTAGE ---
+
+    def preparer_routage(self):
+        """Construit les hiérarchies de contraction de tous les critères pour la version courante, sans seuil"""
+        etat = self.etat
+        for criteria in self.CRITERES:
+            self.get_hierarchie(criteria, etat, construire=True)
+
+    def get_hierarchie(self, criteria: str, etat: Optional[EtatReseau] = None,
+                       construire: bool = False) -> Optional[HierarchiePersonnalisable]:
+        """
+        Retourne la hiérarchie de contraction du critère pour l'état donné (par
+        défaut l'état courant). Absente, elle est construite si construire ou si
+        le réseau ne dépasse pas SEUIL_CONTRACTION_A_LA_DEMANDE nœuds ; sinon None.
+        """
+        etat = etat or self.etat
+        hierarchie = etat.hierarchies.get(criteria)
+        if hierarchie is None and (construire
+                                   or etat.reseau.nombre_noeuds <= self.SEUIL_CONTRACTION_A_LA_DEMANDE):
+            hierarchie = etat.hierarchies[criteria] = self._construire_hierarchie(
+                etat.reseau, criteria, self._hierarchies_precedentes.get(criteria))
+            self._hierarchies_precedentes = {**self._hierarchies_precedentes, criteria: hierarchie}
+        return hierarchie
+
+    @chronometrer()
+    def _construire_hierarchie(self, graphe: GrapheCompact, criteria: str,
+                               precedente: Optional[HierarchiePersonnalisable] = None) -> HierarchiePersonnalisable:
+        """
+        Hiérarchie de contraction personnalisable du graphe. Si la précédente
+        porte sur la même topologie (seuls les poids ont changé, par exemple
+        avec le trafic), son ordre d'élimination est repris.
+        """
+        departage = self.critere_departage(criteria)
+        if precedente is not None and precedente.graphe.offsets is graphe.offsets \
+                and precedente.graphe.cibles is graphe.cibles:
+            return HierarchiePersonnalisable(graphe, criteria, departage, rang=precedente.rang)
+        return HierarchiePersonnalisable(graphe, criteria, departage)
+
+    @staticmethod
+    def critere_departage(criteria: str) -> str:
+        """À coût égal, le chemin retenu est celui qui est le meilleur selon l'autre critère"""
+        return 'temps' if criteria == 'distance' else 'distance'
+
+    def get_poids_recherche(self, criteria: str, etat: Optional[EtatReseau] = None) -> Sequence[float]:
+        """Poids du critère avec départage, utilisés par Dijkstra et A* (recalculés si le graphe a changé)"""
+        etat = etat or self.etat
+        version, poids = self._poids_recherche
+        if version != etat.version:
+            version, poids = etat.version, {}
+            self._poids_recherche = (version, poids)
+        if criteria not in poids:
+            poids[criteria] = poids_avec_departage(etat.reseau, criteria, self.critere_departage(criteria))
+        return poids[criteria]
+
+    def get_coefficients_heuristique(self, etat: Optional[EtatReseau] = None) -> Dict[str, float]:
+        """
+        Coefficient par critère de l'heuristique d'A* : le plus grand c tel que
+        c × distance à vol d'oiseau ≤ poids sur toutes les arêtes. Pour la
+        distance c vaut environ 1, pour le temps 60 × facteur / vitesse de la
+        route la plus rapide ; le calculer sur les poids réels (arrondis, ou
+        chargés d'un fichier) garantit une heuristique cohérente.
+        """
+        etat = etat or self.etat
+        version, coefficients = self._coefficients_heuristique
+        if version != etat.version:
+            version, reseau = etat.version, etat.reseau
+            coefficients = {criteria: self._coefficient_minorant(reseau, reseau.poids[criteria])
+                            for criteria in self.CRITERES}
+            self._coefficients_heuristique = (version, coefficients)
+        return coefficients
+
+    def _coefficient_minorant(self, reseau: GrapheCompact, poids: Sequence[float]) -> float:
+        """Plus grand c tel que c × distance à vol d'oiseau ≤ poids[e] pour toute arête e"""
+        sources, cibles = reseau.sources, reseau.cibles
+        if np is not None and len(sources):
+            origines, extremites = np.asarray(sources), np.asarray(cibles)
+            lat, lon = np.asarray(reseau.lat), np.asarray(reseau.lon)
+            vol_oiseau = self._distances_numpy(lat[origines], lon[origines], lat[extremites], lon[extremites])
+            utiles = vol_oiseau > 0
+            coefficient = float(np.min(np.asarray(poids)[utiles] / vol_oiseau[utiles])) if utiles.any() else 0.0
+        else:
+            coefficient = INFINI
+            for e in range(len(sources)):
+                u, v = sources[e], cibles[e]
+                d = self.calculer_distance_reelle(reseau.lat[u], reseau.lon[u], reseau.lat[v], reseau.lon[v])
+                if d > 0:
+                    coefficient = min(coefficient, poids[e] / d)
+            if coefficient == INFINI:
+                coefficient = 0.0
+        # Marge pour les erreurs d'arrondi flottant de la formule de haversine
+        return coefficient * (1 - 1e-9)
+
+    def heuristique(self, noeud: int, criteria: str, coefficient: Optional[float] = None,
+                    etat: Optional[EtatReseau] = None):
+        """Minorant du coût restant jusqu'au nœud d'indice donné, pour A*"""
+        etat = etat or self.etat
+        reseau = etat.reseau
+        if coefficient is None:
+            coefficient = self.get_coefficients_heuristique(etat)[criteria]
+        lat, lon = reseau.lat[noeud], reseau.lon[noeud]
+        valeurs: Dict[int, float] = {}
+
+        def estimer(v: int) -> float:
+            h = valeurs.get(v)
+            if h is None:
+                h = valeurs[v] = coefficient * self.calculer_distance_reelle(reseau.lat[v], reseau.lon[v], lat, lon)
+            return h
+        return estimer
+
+    def algorithme_effectif(self, algorithme: str, criteria: str, etat: EtatReseau) -> str:
+        """Algorithme réellement utilisé : 'bidirectionnel' à la place de 'ch' si la hiérarchie manque"""
+        if algorithme == 'ch' and self.get_hierarchie(criteria, etat) is None:
+            return 'bidirectionnel'
+        return algorithme
+
+    def _trouver_indices(self, etat: EtatReseau, start: str, end: str, criteria: str, algorithme: str = 'ch',
+                         statistiques: Optional[Dict] = None) -> Optional[List[int]]:
+        """
+        Retourne les indices (dans etat.reseau) des nœuds du chemin optimal, ou None.
+        statistiques (optionnel) reçoit le nombre de nœuds explorés et d'arêtes relâchées.
+        """
+        reseau = etat.reseau
+        if start not in reseau.index or end not in reseau.index:
+            return None
+        source, cible = reseau.index[start], reseau.index[end]
+        algorithme = self.algorithme_effectif(algorithme, criteria, etat)
+        if algorithme == 'ch':
+            resultat = self.get_hierarchie(criteria, etat).plus_court_chemin(source, cible, statistiques)
+        elif algorithme == 'dijkstra':
+            resultat = astar(reseau, source, cible, criteria, lambda v: 0.0,
+                             self.get_poids_recherche(criteria, etat), statistiques)
+        elif algorithme == 'astar':
+            resultat = astar(reseau, source, cible, criteria, self.heuristique(cible, criteria, etat=etat),
+                             self.get_poids_recherche(criteria, etat), statistiques)
+        elif algorithme == 'bidirectionnel':
+            resultat = astar_bidirectionnel(reseau, source, cible, criteria,
+                                            self.heuristique(cible, criteria, etat=etat),
+                                            self.heuristique(source, criteria, etat=etat),
+                                            self.get_poids_recherche(criteria, etat), statistiques)
+        else:
+            raise ValueError(f"Algorithme inconnu : {algorithme}")
+        return resultat[1] if resultat else None
+
+    def trouver_chemin(self, start: str, end: str, criteria: str = 'distance') -> Optional[List[str]]:
+        """Retourne la liste des identifiants du chemin optimal, ou None"""
+        etat = self.etat
+        indices = self._trouver_indices(etat, start, end, criteria)
+        if indices is None:
+            return None
+        return [etat.reseau.ids[i] for i in indices]
+
+    @chronometrer()
+    def get_shortest_path(self, start: str, end: str, criteria: str = 'distance',
+                          algorithme: str = 'ch', etat: Optional[EtatReseau] = None) -> Optional[Dict]:
+        """
+        Trouve le chemin optimal selon le critère spécifié, avec l'algorithme
+        demandé, dans l'état donné (par défaut l'état courant)
+        """
+        if criteria not in self.CRITERES:
+            criteria = 'distance'
+        if algorithme not in self.ALGORITHMES:
+            algorithme = 'ch'
+        
+        etat = etat or self.etat
+        version, reseau = etat.version, etat.reseau
+        algorithme = self.algorithme_effectif(algorithme, criteria, etat)
+        cle = ('chemin', start, end, criteria, algorithme)
+        result = self.cache_routes.lire(version, cle)
+        if result is not None:
+            return result
+        
+        statistiques = {}
+        indices = self._trouver_indices(etat, start, end, criteria, algorithme, statistiques)
+        observer_recherche(algorithme, statistiques)
+        if indices is None:
+            return None
+        
+        aretes = [reseau.arete(indices[i], indices[i+1], criteria) for i in range(len(indices)-1)]
+        result = {
+            'critere': criteria,
+            **self._decrire_chemin(reseau, indices, aretes, [reseau.poids['temps'][e] for e in aretes]),
+            'algorithme': algorithme,
+            'noeuds_explores': statistiques.get('noeuds_explores', 0)
+        }
+        self.cache_routes.ecrire(version, cle, result)
+        return result
+
+    def _decrire_chemin(self, reseau: GrapheCompact, indices: List[int], aretes: List[int],
+                        temps_aretes: List[float]) -> Dict:
+        """Étapes, géométrie et totaux d'un chemin (nœuds, arêtes empruntées et leur temps de parcours)"""
+        total_distance = sum(reseau.poids['distance'][e] for e in aretes)
+        total_time = sum(temps_aretes)
+        
+        steps = []
+        path_coords = []
+        
+        for i, e in enumerate(aretes):
+            dep = indices[i]
+            arr = indices[i+1]
             
-            for i in range(len(path)-1):
-                dep = path[i]
-                arr = path[i+1]
-                edge_data = self.G[dep][arr]
-                
-                steps.append({
-                    'etape': i + 1,
-                    'from': self.G.nodes[dep]['nom'],
-                    'from_id': dep,
-                    'to': self.G.nodes[arr]['nom'],
-                    'to_id': arr,
-                    'distance': round(edge_data['distance'], 2),
-                    'time': round(edge_data['temps'], 1),
-                    'route': edge_data['nom_route'],
-                    'type_route': edge_data['type_route'],
-                    'vitesse_moyenne': edge_data['vitesse_moyenne'],
-                    'coordinates': {
-                        'start': [self.G.nodes[dep]['lon'], self.G.nodes[dep]['lat']],
-                        'end': [self.G.nodes[arr]['lon'], self.G.nodes[arr]['lat']]
-                    }
-                })
-                
-                path_coords.append([
-                    [self.G.nodes[dep]['lon'], self.G.nodes[dep]['lat']],
-                    [self.G.nodes[arr]['lon'], self.G.nodes[arr]['lat']]
-                ])
+            steps.append({
+                'etape': i + 1,
+                'from': reseau.nom(dep),
+                'from_id': reseau.ids[dep],
+                'to': reseau.nom(arr),
+                'to_id': reseau.ids[arr],
+                'distance': round(reseau.poids['distance'][e], 2),
+                'time': round(temps_aretes[i], 1),
+                'route': reseau.nom_route(e),
+                'type_route': reseau.type_route(e),
+                'vitesse_moyenne': reseau.vitesses[e],
+                'coordinates': {
+                    'start': [reseau.lon[dep], reseau.lat[dep]],
+                    'end': [reseau.lon[arr], reseau.lat[arr]]
+                }
+            })
             
-            return {
-                'critere': criteria,
-                'path': [self.G.nodes[node]['nom'] for node in path],
-                'path_ids': path,
-                'total_distance': round(total_distance, 2),
-                'total_time': round(total_time, 1),
-                'vitesse_moyenne': round(total_distance / (total_time / 60), 1),
-                'steps': steps,
-                'path_coords': path_coords,
-                'nombre_etapes': len(steps),
-                'efficacite': self.calculer_efficacite(total_distance, total_time)
-            }
-        except (nx.NetworkXNoPath, nx.NodeNotFound):
-            return None
+            path_coords.append([
+                [reseau.lon[dep], reseau.lat[dep]],
+                [reseau.lon[arr], reseau.lat[arr]]
+            ])
+        
+        return {
+            'path': [reseau.nom(i) for i in indices],
+            'path_ids': [reseau.ids[i] for i in indices],
+            'total_distance': round(total_distance, 2),
+            'total_time': round(total_time, 1),
+            'vitesse_moyenne': round(total_distance / (total_time / 60), 1) if total_time > 0 else 0,
+            'steps': steps,
+            'path_coords': path_coords,
+            'nombre_etapes': len(steps),
+            'efficacite': self.calculer_efficacite(total_distance, total_time)
+        }
     
     def calculer_efficacite(self, distance: float, temps: float) -> str:
         """Calcule l'efficacité du trajet"""
-        vitesse_moyenne = distance / (temps / 60)
+        vitesse_moyenne = distance / (temps / 60) if temps > 0 else 0
         if vitesse_moyenne > 25:
             return "Excellente"
         elif vitesse_moyenne > 20:
@@ -382,20 +1053,126 @@ class TransportSystem:
         else:
             return "Faible"
     
-    def get_all_paths(self) -> Dict:
+    @chronometrer()
+    def get_all_paths(self, start: str = DEPART_DEFAUT, end: str = ARRIVEE_DEFAUT) -> Dict:
         """Retourne les deux chemins optimaux (distance et temps) avec comparaison"""
-        by_distance = self.get_shortest_path('RP_VICTOIRE', 'GARE_CENTRALE', 'distance')
-        by_time = self.get_shortest_path('RP_VICTOIRE', 'GARE_CENTRALE', 'temps')
+        etat = self.etat
+        version = etat.version
+        cle = ('comparaison', start, end)
+        result = self.cache_routes.lire(version, cle)
+        if result is not None:
+            return result
         
-        return {
+        by_distance = self.get_shortest_path(start, end, 'distance', etat=etat)
+        by_time = self.get_shortest_path(start, end, 'temps', etat=etat)
+        
+        result = {
             'by_distance': by_distance,
             'by_time': by_time,
             'comparaison': self.comparer_chemins(by_distance, by_time)
         }
+        self.cache_routes.ecrire(version, cle, result)
+        return result
     
+    @chronometrer()
+    def get_front_pareto(self, start: str, end: str, etapes: bool = True) -> Optional[Dict]:
+        """
+        Tous les itinéraires non dominés selon la distance, le temps et (si
+        etapes) le nombre d'étapes, en une seule recherche multicritère.
+        Les itinéraires sont triés par distance croissante.
+        """
+        etat = self.etat
+        version, reseau = etat.version, etat.reseau
+        cle = ('pareto', start, end, etapes)
+        result = self.cache_routes.lire(version, cle)
+        if result is not None:
+            return result
+        
+        if start not in reseau.index or end not in reseau.index:
+            return None
+        criteres = ['distance', 'temps']
+        poids = [reseau.poids[criteria] for criteria in criteres]
+        if etapes:
+            criteres.append('etapes')
+            poids.append(array('d', [1.0]) * reseau.nombre_aretes)
+        statistiques = {}
+        itineraires, complet = front_pareto(reseau, reseau.index[start], reseau.index[end], poids,
+                                            self.LIMITE_ETIQUETTES_PARETO, statistiques)
+        observer_recherche('pareto', statistiques)
+        if not itineraires:
+            return None
+        
+        routes = sorted(
+            (self._decrire_chemin(reseau, indices, aretes, [reseau.poids['temps'][e] for e in aretes])
+             for _, indices, aretes in itineraires),
+            key=lambda r: (r['total_distance'], r['total_time'], r['nombre_etapes'])
+        )
+        plus_rapide = min(routes, key=lambda r: (r['total_time'], r['total_distance']))
+        result = {
+            'criteres': criteres,
+            'total_routes': len(routes),
+            'routes': routes,
+            'comparaison': self.comparer_chemins(routes[0], plus_rapide),
+            'complet': complet,
+            'noeuds_explores': statistiques.get('noeuds_explores', 0)
+        }
+        self.cache_routes.ecrire(version, cle, result)
+        return result
+
+    @chronometrer()
+    def get_itineraires_alternatifs(self, start: str, end: str, criteria: str = 'temps',
+                                    nombre: int = NOMBRE_ALTERNATIVES, etirement: float = ETIREMENT_ALTERNATIVES,
+                                    partage: float = PARTAGE_ALTERNATIVES) -> Optional[Dict]:
+        """
+        L'itinéraire optimal selon le critère et jusqu'à nombre - 1 alternatives
+        nettement différentes (méthode des plateaux, voir routage) : coût au plus
+        etirement fois l'optimal, part du coût partagée avec un autre itinéraire
+        retenu au plus partage.
+        """
+        if criteria not in self.CRITERES:
+            criteria = 'temps'
+        etat = self.etat
+        version, reseau = etat.version, etat.reseau
+        cle = ('alternatives', start, end, criteria, nombre, etirement, partage)
+        result = self.cache_routes.lire(version, cle)
+        if result is not None:
+            return result
+        
+        if start not in reseau.index or end not in reseau.index:
+            return None
+        statistiques = {}
+        itineraires = itineraires_alternatifs(reseau, reseau.index[start], reseau.index[end],
+                                              self.get_poids_recherche(criteria, etat), nombre, etirement, partage,
+                                              statistiques=statistiques)
+        observer_recherche('alternatives', statistiques)
+        if not itineraires:
+            return None
+        
+        poids = reseau.poids[criteria]
+        optimal = set(itineraires[0][2])
+        cout_optimal = sum(poids[e] for e in itineraires[0][2])
+        routes = []
+        for _, indices, aretes in itineraires:
+            route = self._decrire_chemin(reseau, indices, aretes, [reseau.poids['temps'][e] for e in aretes])
+            cout = sum(poids[e] for e in aretes)
+            route['etirement'] = round(cout / cout_optimal, 3) if cout_optimal > 0 else 1.0
+            route['partage_optimal'] = round(sum(poids[e] for e in aretes if e in optimal) / cout, 3) \
+                if cout > 0 else 1.0
+            routes.append(route)
+        result = {
+            'critere': criteria,
+            'etirement_max': etirement,
+            'partage_max': partage,
+            'total_routes': len(routes),
+            'routes': routes,
+            'noeuds_explores': statistiques.get('noeuds_explores', 0)
+        }
+        self.cache_routes.ecrire(version, cle, result)
+        return result
+
     def comparer_chemins(self, chemin_distance: Dict, chemin_temps: Dict) -> Dict:
         """Compare les deux chemins optimaux"""
-        if not chemin_distance or not chemin_temps:
+        if not chemin_distance or not chemin_temps or chemin_distance['total_time'] <= 0:
             return {}
         
         gain_temps = chemin_distance['total_time'] - chemin_temps['total_time']
@@ -408,179 +1185,915 @@ class TransportSystem:
             'recommandation': "Temps" if gain_temps > 1 else "Distance"
         }
 
-    def get_all_simple_paths(self, max_paths: int = 50) -> List[Dict]:
+    # --- ITINÉRAIRES SELON L'HEURE DE DÉPART ---
+    # Le temps de parcours d'une arête à l'instant t vaut son temps à vitesse libre
+    # multiplié par le facteur de son profil horaire à t. Par défaut, chaque type de
+    # route suit la forme journalière de profils.py, de moyenne égale à son facteur
+    # de trafic statique : sur la journée, on retrouve les temps de référence.
+
+    # Nombre maximal d'heures de départ évaluées par get_meilleurs_departs : chacune
+    # coûte une recherche A* horaire complète (hors cache), soit une journée entière
+    # toutes les 30 minutes au plus
+    MAX_DEPARTS = 48
+
+    def definir_profil(self, nom: str, facteurs: Sequence[float], types_route: Sequence[str] = (),
+                       connexions: Sequence[Tuple[str, str]] = ()):
         """
-        Retourne tous les chemins simples (sans boucle) entre RP_VICTOIRE et GARE_CENTRALE,
-        avec une limite pour éviter les performances.
+        Définit (ou remplace) un profil de NB_INTERVALLES facteurs, un par quart
+        d'heure, appliqué aux routes des types donnés et aux connexions (dep, arr)
+        données. Les facteurs multiplient le temps à vitesse libre.
         """
-        start = 'RP_VICTOIRE'
-        end = 'GARE_CENTRALE'
-        all_paths_data = []
+        if nom.startswith('type:'):
+            raise ValueError("Le préfixe 'type:' est réservé aux profils par défaut")
+        # Validation avant enregistrement (FIFO sur la plus longue arête du réseau)
+        ProfilsHoraires(0, self.get_temps_libre_max()).ajouter(nom, facteurs)
+        base = self.reseau_base
+        types_connus = {base.chaines[t] for t in set(base.types_routes)}
+        for type_route in types_route:
+            if type_route not in types_connus:
+                raise ValueError(f"Type de route inconnu : {type_route}")
+        for dep, arr in connexions:
+            if dep not in base.index or arr not in base.index \
+                    or not base.aretes_entre(base.index[dep], base.index[arr]):
+                raise ValueError(f"Connexion inconnue : {dep} -> {arr}")
+        self.definitions_profils[nom] = {
+            'facteurs': [float(f) for f in facteurs],
+            'types_route': [str(t) for t in types_route],
+            'connexions': [(str(dep), str(arr)) for dep, arr in connexions]
+        }
+        self.cache_routes.desactiver_partage()
+        self.version_profils += 1
 
-        try:
-            # Utiliser networkx.all_simple_paths avec une limite
-            paths_found = 0
-            for path_nodes in nx.all_simple_paths(self.G, source=start, target=end, cutoff=15):
-                if paths_found >= max_paths:
-                    break
-                    
-                total_distance = 0.0
-                total_time = 0.0
-                path_steps = []
-
-                # Calculer les totaux pour chaque chemin
-                for i in range(len(path_nodes) - 1):
-                    dep = path_nodes[i]
-                    arr = path_nodes[i+1]
-                    edge_data = self.G[dep][arr]
-                    
-                    total_distance += edge_data['distance']
-                    total_time += edge_data['temps']
-                    
-                    path_steps.append({
-                        'from': self.G.nodes[dep]['nom'],
-                        'to': self.G.nodes[arr]['nom'],
-                        'route': edge_data['nom_route'],
-                        'type': edge_data['type_route'],
-                        'time': round(edge_data['temps'], 1),
-                        'distance': round(edge_data['distance'], 3)
-                    })
-
-                # Stocker le chemin et ses métriques
-                all_paths_data.append({
-                    'path': [self.G.nodes[node]['nom'] for node in path_nodes],
-                    'path_ids': path_nodes,
-                    'total_distance_km': round(total_distance, 3),
-                    'total_time_min': round(total_time, 1),
-                    'vitesse_moyenne': round(total_distance / (total_time / 60), 1) if total_time > 0 else 0,
-                    'nombre_etapes': len(path_steps),
-                    'steps': path_steps
-                })
-                
-                paths_found += 1
+    def get_profils(self) -> ProfilsHoraires:
+        """Profils compilés du réseau de référence (un par type de route, puis les profils définis)"""
+        version, profils = self._profils
+        cle = (self.version_structure, self.version_profils)
+        if version != cle:
+            base = self.reseau_base
+            profils = ProfilsHoraires(base.nombre_aretes, self.get_temps_libre_max())
+            numeros: Dict[int, int] = {}
+            for e, type_route in enumerate(base.types_routes):
+                if type_route not in numeros:
+                    nom_type = base.chaines[type_route]
+                    numeros[type_route] = profils.ajouter(f'type:{nom_type}', profil_depuis_facteur(
+                        self.FACTEURS_TRAFIC.get(nom_type, self.FACTEUR_TRAFIC_PAR_DEFAUT)))
+                profils.profil_arete[e] = numeros[type_route]
+            for nom, definition in self.definitions_profils.items():
+                numero = profils.ajouter(nom, definition['facteurs'])
+                types_route = {t for t in set(base.types_routes) if base.chaines[t] in definition['types_route']}
+                if types_route:
+                    for e, type_route in enumerate(base.types_routes):
+                        if type_route in types_route:
+                            profils.profil_arete[e] = numero
+                for dep, arr in definition['connexions']:
+                    if dep in base.index and arr in base.index:
+                        for e in base.aretes_entre(base.index[dep], base.index[arr]):
+                            profils.profil_arete[e] = numero
+            self._profils = (cle, profils)
+        return profils
 
-            # Trier les chemins par durée totale (le plus rapide en premier)
-            all_paths_data.sort(key=lambda x: x['total_time_min'])
-            
-            return all_paths_data
-        
-        except (nx.NetworkXNoPath, nx.NodeNotFound):
-            return []
-
-    def get_network_stats(self) -> Dict:
-        """Retourne les statistiques détaillées du réseau"""
-        stats = {
-            'nombre_noeuds': self.G.number_of_nodes(),
-            'nombre_aretes': self.G.number_of_edges(),
-            'densite': round(nx.density(self.G), 3),
-            'distance_totale_reseau': round(sum(self.G[u][v]['distance'] for u, v in self.G.edges()), 2),
-            'temps_total_reseau': round(sum(self.G[u][v]['temps'] for u, v in self.G.edges()), 1),
-            'vitesse_moyenne_reseau': 0,
-            'types_routes': {},
-            'connectivite': {},
-            'noeuds_par_type': {}
+    def get_temps_libre_max(self) -> float:
+        """Plus long temps à vitesse libre (minutes) d'une arête du réseau de référence"""
+        base = self.reseau_base
+        return max((temps / self.FACTEURS_TRAFIC.get(base.chaines[t], self.FACTEUR_TRAFIC_PAR_DEFAUT)
+                    for temps, t in zip(base.poids['temps'], base.types_routes) if temps < INFINI),
+                   default=0.0)
+
+    def get_temps_libres(self, etat: Optional[EtatReseau] = None) -> array:
+        """
+        Temps de parcours à vitesse libre de chaque arête pour la version courante :
+        temps de référence (hors trafic) divisé par le facteur de trafic statique
+        de son type de route. Les temps mesurés du trafic comprennent déjà la
+        congestion, que le profil horaire modélise : ils ne sont pas repris, seules
+        les fermetures le sont (INFINI).
+        """
+        etat = etat or self.etat
+        version, temps_libres = self._temps_libres
+        if version != etat.version:
+            version, base, reseau = etat.version, self.reseau_base, etat.reseau
+            facteurs = {t: self.FACTEURS_TRAFIC.get(base.chaines[t], self.FACTEUR_TRAFIC_PAR_DEFAUT)
+                        for t in set(base.types_routes)}
+            temps_base, temps = base.poids['temps'], reseau.poids['temps']
+            temps_libres = array('d', (INFINI if temps[e] == INFINI else temps_base[e] / facteurs[t]
+                                       for e, t in enumerate(base.types_routes)))
+            self._temps_libres = (version, temps_libres)
+        return temps_libres
+
+    def get_coefficient_horaire(self, etat: Optional[EtatReseau] = None) -> float:
+        """Coefficient de l'heuristique d'A* horaire : minore temps libre × plus petit facteur du profil"""
+        etat = etat or self.etat
+        version, coefficient = self._coefficient_horaire
+        cle = (etat.version, self.version_profils)
+        if version != cle:
+            profils, temps_libres = self.get_profils(), self.get_temps_libres(etat)
+            minimums = [profils.facteur_minimal(numero) for numero in range(len(profils.noms))]
+            profil_arete = profils.profil_arete
+            poids = [temps_libres[e] * minimums[profil_arete[e]] for e in range(len(temps_libres))]
+            coefficient = self._coefficient_minorant(etat.reseau, poids)
+            self._coefficient_horaire = (cle, coefficient)
+        return coefficient
+
+    def _trajet_horaire(self, etat: EtatReseau, start: str, end: str, depart: float,
+                        statistiques: Optional[Dict] = None) -> Optional[Tuple[float, List[int]]]:
+        """(heure d'arrivée, indices du chemin) du trajet le plus rapide partant à l'heure donnée"""
+        reseau = etat.reseau
+        if start not in reseau.index or end not in reseau.index:
+            return None
+        source, cible = reseau.index[start], reseau.index[end]
+        return astar_horaire(reseau, source, cible, depart, self.get_temps_libres(etat), self.get_profils(),
+                             self.heuristique(cible, 'temps', self.get_coefficient_horaire(etat), etat),
+                             statistiques)
+
+    @chronometrer()
+    def get_itineraire_horaire(self, start: str, end: str, depart: float) -> Optional[Dict]:
+        """Itinéraire le plus rapide pour un départ à l'heure donnée (minutes depuis minuit)"""
+        etat = self.etat
+        version = etat.version
+        cle = ('horaire', start, end, depart, self.version_profils)
+        result = self.cache_routes.lire(version, cle)
+        if result is not None:
+            return result
+        
+        statistiques = {}
+        trajet = self._trajet_horaire(etat, start, end, depart, statistiques)
+        observer_recherche('astar_horaire', statistiques)
+        if trajet is None:
+            return None
+        arrivee, indices = trajet
+        
+        # Parmi des connexions parallèles, la recherche a retenu la plus rapide à l'instant de passage
+        reseau, profils, temps_libres = etat.reseau, self.get_profils(), self.get_temps_libres(etat)
+        aretes, temps_aretes, heures = [], [], []
+        t = depart
+        for u, v in zip(indices, indices[1:]):
+            e = min((e for e in reseau.aretes_entre(u, v) if temps_libres[e] < INFINI),
+                    key=lambda e: temps_libres[e] * profils.facteur(e, t))
+            duree = temps_libres[e] * profils.facteur(e, t)
+            aretes.append(e)
+            temps_aretes.append(duree)
+            heures.append(t)
+            t += duree
+        
+        result = {
+            'critere': 'temps',
+            **self._decrire_chemin(reseau, indices, aretes, temps_aretes),
+            'heure_depart': formater_heure(depart),
+            'heure_arrivee': formater_heure(arrivee),
+            'algorithme': 'astar_horaire',
+            'noeuds_explores': statistiques.get('noeuds_explores', 0)
         }
+        for step, heure in zip(result['steps'], heures):
+            step['heure'] = formater_heure(heure)
+        self.cache_routes.ecrire(version, cle, result)
+        return result
+
+    @chronometrer()
+    def get_meilleurs_departs(self, start: str, end: str, debut: float, fin: float,
+                              pas: float = 15.0) -> Optional[Dict]:
+        """
+        Durée du trajet pour chaque heure de départ de [debut, fin] (tous les
+        'pas' minutes, fenêtre pouvant passer minuit) et meilleur départ.
+        """
+        if pas <= 0:
+            raise ValueError("Le pas doit être positif")
+        if fin < debut:
+            fin += 24 * 60
+        nombre = int((fin - debut) // pas) + 1
+        if nombre > self.MAX_DEPARTS:
+            raise ValueError(f"Au plus {self.MAX_DEPARTS} heures de départ par requête")
         
-        # Statistiques par type de route
-        types_routes = {}
-        for u, v, data in self.G.edges(data=True):
-            type_route = data['type_route']
-            if type_route not in types_routes:
-                types_routes[type_route] = {'count': 0, 'distance': 0, 'temps': 0}
-            types_routes[type_route]['count'] += 1
-            types_routes[type_route]['distance'] += data['distance']
-            types_routes[type_route]['temps'] += data['temps']
-        
-        stats['types_routes'] = types_routes
-        
-        # Statistiques par type de nœud
-        noeuds_par_type = {}
-        for node in self.G.nodes():
-            node_type = self.G.nodes[node]['type']
-            if node_type not in noeuds_par_type:
-                noeuds_par_type[node_type] = 0
-            noeuds_par_type[node_type] += 1
-        stats['noeuds_par_type'] = noeuds_par_type
-        
-        # Connectivité des nœuds
-        for node in self.G.nodes():
-            stats['connectivite'][node] = {
-                'degree_entrant': self.G.in_degree(node),
-                'degree_sortant': self.G.out_degree(node),
-                'degree_total': self.G.degree(node)
+        etat = self.etat
+        departs = []
+        for i in range(nombre):
+            depart = debut + i * pas
+            trajet = self._trajet_horaire(etat, start, end, depart)
+            if trajet is None:
+                return None
+            arrivee, indices = trajet
+            departs.append({
+                'depart': formater_heure(depart),
+                'arrivee': formater_heure(arrivee),
+                'duree': round(arrivee - depart, 1),
+                'path_ids': [etat.reseau.ids[i] for i in indices]
+            })
+        return {
+            'from': start,
+            'to': end,
+            'pas': pas,
+            'departs': departs,
+            'meilleur': min(departs, key=lambda d: d['duree'])
+        }
+
+    def get_definitions_profils(self) -> Dict:
+        """Profils par défaut (un par type de route) et profils définis, avec leurs facteurs"""
+        profils = self.get_profils()
+        return {
+            'intervalles': NB_INTERVALLES,
+            'profils': [{
+                'name': nom,
+                'factors': [round(f, 3) for f in profils.profil(nom)],
+                **({'road_types': self.definitions_profils[nom]['types_route'],
+                    'connections': [list(c) for c in self.definitions_profils[nom]['connexions']]}
+                   if nom in self.definitions_profils else {})
+            } for nom in profils.noms],
+            'memoire_octets': profils.taille_memoire()
+        }
+
+    # --- TRANSPORT EN COMMUN ---
+
+    def charger_horaires(self, repertoire: str, date: Optional[str] = None):
+        """
+        Charge les horaires GTFS d'un répertoire (voir transit.py), restreints
+        aux courses circulant à la date AAAAMMJJ si elle est donnée. Les arrêts
+        dont l'identifiant est un nœud du réseau prennent ses coordonnées.
+        """
+        reseau = self.reseau_base
+        coordonnees = {reseau.ids[i]: (reseau.lat[i], reseau.lon[i]) for i in range(reseau.nombre_noeuds)}
+        self.transit = charger_gtfs(repertoire, self.calculer_distance_reelle, date, coordonnees)
+
+    def _position_transit(self, node_id: str) -> Optional[Tuple[float, float]]:
+        """Coordonnées d'un arrêt de transport en commun ou d'un nœud du réseau"""
+        i = self.transit.index.get(node_id)
+        if i is not None:
+            return self.transit.lat[i], self.transit.lon[i]
+        reseau = self.reseau_base
+        i = reseau.index.get(node_id)
+        if i is not None:
+            return reseau.lat[i], reseau.lon[i]
+        return None
+
+    @chronometrer()
+    def get_itineraires_transit(self, start: str, end: str, depart: float,
+                                max_correspondances: int = MAX_CORRESPONDANCES_DEFAUT) -> Optional[Dict]:
+        """
+        Itinéraires en transport en commun de start à end (arrêts GTFS ou nœuds
+        du réseau) pour un départ à 'depart' minutes : arrivée la plus tôt pour
+        chaque nombre de correspondances, marche d'accès et de correspondance comprise.
+        """
+        transit = self.transit
+        extremites = []
+        for node_id in (start, end):
+            position = self._position_transit(node_id)
+            if position is None:
+                return None
+            arrets = transit.arrets_proches(*position)
+            if node_id in transit.index:
+                arrets[transit.index[node_id]] = 0
+            extremites.append(arrets)
+        itineraires = transit.raptor(extremites[0], extremites[1], int(round(depart * 60)),
+                                     max_correspondances + 1)
+        return {
+            'from': start,
+            'to': end,
+            'depart': formater_heure(depart),
+            'itineraires': [itineraire.en_dict() for itineraire in itineraires]
+        }
+
+    def get_all_simple_paths(self, start: str = DEPART_DEFAUT, end: str = ARRIVEE_DEFAUT,
+                             k: int = 50, criteria: str = 'temps',
+                             champs: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Retourne les k meilleurs chemins simples (sans boucle) entre start et end,
+        par ordre croissant du critère ('temps' ou 'distance').
+        """
+        return list(islice(self.iterer_chemins_simples(start, end, criteria, champs), k))
+
+    def iterer_chemins_simples(self, start: str, end: str, criteria: str = 'temps',
+                               champs: Optional[Sequence[str]] = None,
+                               etat: Optional[EtatReseau] = None) -> Iterator[Dict]:
+        """
+        Chemins simples entre start et end par coût croissant, produits un à un
+        à mesure que le moteur les trouve. champs (optionnel) restreint chaque
+        chemin aux clés demandées (voir CHAMPS_CHEMIN_SIMPLE) ; les étapes ne
+        sont construites que si 'steps' en fait partie.
+        """
+        if criteria not in self.CRITERES:
+            criteria = 'temps'
+        
+        reseau = (etat or self.etat).reseau
+        if start not in reseau.index or end not in reseau.index:
+            return
+        
+        avec_etapes = champs is None or 'steps' in champs
+        for _, indices in k_plus_courts_chemins(reseau, reseau.index[start], reseau.index[end], criteria):
+            aretes = [reseau.arete(indices[i], indices[i+1], criteria) for i in range(len(indices) - 1)]
+            total_distance = sum(reseau.poids['distance'][e] for e in aretes)
+            total_time = sum(reseau.poids['temps'][e] for e in aretes)
+            
+            chemin = {
+                'path': [reseau.nom(i) for i in indices],
+                'path_ids': [reseau.ids[i] for i in indices],
+                'total_distance_km': round(total_distance, 3),
+                'total_time_min': round(total_time, 1),
+                'vitesse_moyenne': round(total_distance / (total_time / 60), 1) if total_time > 0 else 0,
+                'nombre_etapes': len(aretes)
             }
+            if avec_etapes:
+                chemin['steps'] = [{
+                    'from': reseau.nom(indices[i]),
+                    'to': reseau.nom(indices[i+1]),
+                    'route': reseau.nom_route(e),
+                    'type': reseau.type_route(e),
+                    'time': round(reseau.poids['temps'][e], 1),
+                    'distance': round(reseau.poids['distance'][e], 3)
+                } for i, e in enumerate(aretes)]
+            yield chemin if champs is None else {cle: chemin[cle] for cle in champs if cle in chemin}
+
+    @chronometrer()
+    def get_page_chemins_simples(self, start: str, end: str, criteria: str, limite: int,
+                                 curseur: Optional[str] = None,
+                                 champs: Optional[Sequence[str]] = None) -> Dict:
+        """
+        Page de chemins simples. Le curseur retourné reprend l'énumération là où
+        elle s'est arrêtée : la recherche en cours est conservée (LRU) pour
+        la page suivante, et relancée seulement si elle a été évincée.
+        ValueError si le curseur est invalide ou date d'une autre version du graphe.
+        """
+        etat_reseau = self.etat
+        debut = 0
+        iterateur = None
+        if curseur is not None:
+            try:
+                etat = json.loads(base64.urlsafe_b64decode(curseur.encode('ascii')))
+                debut = int(etat['offset'])
+                valide = [etat['from'], etat['to'], etat['criteria']] == [start, end, criteria] and debut >= 0
+            except (ValueError, KeyError, TypeError):
+                valide = False
+            if not valide:
+                raise ValueError("Curseur invalide")
+            if etat['version'] != etat_reseau.version:
+                raise ValueError("Curseur périmé : le réseau a changé, reprenez sans curseur")
+            iterateur = self._curseurs.retirer((curseur, tuple(champs or ())))
+        if iterateur is None:
+            iterateur = islice(self.iterer_chemins_simples(start, end, criteria, champs, etat_reseau), debut, None)
+        
+        chemins = list(islice(iterateur, limite))
+        suivant = None
+        if len(chemins) == limite:
+            suivant = base64.urlsafe_b64encode(json.dumps({
+                'from': start, 'to': end, 'criteria': criteria,
+                'offset': debut + limite, 'version': etat_reseau.version
+            }, separators=(',', ':')).encode('utf-8')).decode('ascii')
+            self._curseurs.ecrire((suivant, tuple(champs or ())), iterateur)
+        return {'offset': debut, 'paths': chemins, 'next_cursor': suivant}
+
+    @chronometrer()
+    def get_isochrones(self, sources: List[str], seuils: List[float], criteria: str = 'temps',
+                       forme: str = 'enveloppe', taille_cellule_km: float = 0.25,
+                       avec_noeuds: bool = True) -> Dict:
+        """
+        Zones atteignables depuis les sources (la plus proche compte) en moins de
+        chaque seuil (minutes ou km selon le critère), par une seule recherche
+        bornée au plus grand seuil. Chaque zone est une Feature GeoJSON
+        MultiPolygon (une 'enveloppe' convexe par composante connexe atteinte,
+        ou les cellules de 'grille') ; les nœuds atteints
+        sont listés avec leur coût et le plus petit seuil qui les contient.
+        """
+        reseau = self.reseau
+        poids = reseau.poids[criteria]
+        seuils = sorted(seuils)
+        couts = distances_depuis(reseau, [reseau.index[s] for s in sources], poids, borne=seuils[-1])
+        lat_reference = sum(reseau.lat[reseau.index[s]] for s in sources) / len(sources)
         
-        # Vitesse moyenne
-        if stats['temps_total_reseau'] > 0:
-            stats['vitesse_moyenne_reseau'] = round(
-                stats['distance_totale_reseau'] / (stats['temps_total_reseau'] / 60), 1
+        zones = []
+        for seuil in reversed(seuils):
+            composantes = points_atteints(reseau, couts, poids, seuil)
+            zones.append({
+                'type': 'Feature',
+                'geometry': geometrie(composantes, forme, taille_cellule_km, lat_reference),
+                'properties': {'seuil': seuil, 'critere': criteria}
+            })
+        
+        result = {
+            'sources': sources,
+            'critere': criteria,
+            'seuils': seuils,
+            'zones': {'type': 'FeatureCollection', 'features': zones},
+            'total_noeuds': sum(1 for c in couts if c <= seuils[-1])
+        }
+        if avec_noeuds:
+            result['noeuds'] = [{
+                'id': reseau.ids[v],
+                'nom': reseau.nom(v),
+                'lat': reseau.lat[v],
+                'lon': reseau.lon[v],
+                'cout': round(c, 3),
+                'seuil': next(s for s in seuils if c <= s)
+            } for v, c in enumerate(couts) if c <= seuils[-1]]
+        return result
+
+    def get_calculateur_matrice(self, etat: Optional[EtatReseau] = None) -> CalculateurMatrice:
+        """Retourne le calculateur de matrices du réseau courant, remplacé (avec son pool) si le graphe a changé"""
+        etat = etat or self.etat
+        version, calculateur = self._matrices
+        if version != etat.version:
+            if calculateur is not None:
+                calculateur.fermer()
+            version = etat.version
+            calculateur = CalculateurMatrice(
+                etat.reseau, {criteria: self.critere_departage(criteria) for criteria in self.CRITERES}
             )
+            self._matrices = (version, calculateur)
+        return calculateur
+
+    @chronometrer()
+    def get_matrix(self, origines: List[str], destinations: List[str], criteria: str = 'temps') -> Optional[Dict]:
+        """
+        Matrice des distances (km) et temps (min) des chemins optimaux selon le
+        critère, de chaque origine vers chaque destination (None si inaccessible).
+        Retourne None si un identifiant est inconnu.
+        """
+        if criteria not in self.CRITERES:
+            criteria = 'temps'
+        etat = self.etat
+        reseau = etat.reseau
+        if any(node_id not in reseau.index for node_id in (*origines, *destinations)):
+            return None
+        
+        lignes = self.get_calculateur_matrice(etat).calculer(
+            [reseau.index[node_id] for node_id in origines],
+            [reseau.index[node_id] for node_id in destinations],
+            criteria
+        )
+        return {
+            'critere': criteria,
+            'origins': origines,
+            'destinations': destinations,
+            'distances': [[round(d, 2) if d < INFINI else None for d in ligne['distance']] for ligne in lignes],
+            'times': [[round(t, 1) if t < INFINI else None for t in ligne['temps']] for ligne in lignes]
+        }
+
+    def get_network_data(self) -> Dict:
+        """Réseau complet : nœuds, arêtes, statistiques et métadonnées"""
+        nodes = self.get_all_nodes_by_type()
+        
+        reseau = self.reseau_base
+        distances, temps = reseau.poids['distance'], reseau.poids['temps']
+        edges = []
+        for u in range(reseau.nombre_noeuds):
+            # Arêtes parallèles : seule la plus rapide est listée
+            for v in dict.fromkeys(reseau.cibles[e] for e in range(reseau.offsets[u], reseau.offsets[u + 1])):
+                e = reseau.arete(u, v, 'temps')
+                edges.append({
+                    'from': reseau.ids[u],
+                    'to': reseau.ids[v],
+                    'distance': distances[e],
+                    'time': temps[e],
+                    'route': reseau.nom_route(e),
+                    'type_route': reseau.type_route(e),
+                    'vitesse_moyenne': reseau.vitesses[e]
+                })
+        
+        return {
+            'nodes': nodes, 
+            'edges': edges,
+            'stats': self.get_network_stats(),
+            'metadata': {
+                'version': '4.0',
+                'city': 'Kinshasa',
+                'description': 'Réseau de transport complet Rond-Point Victoire → Gare Centrale',
+                'total_nodes': len(nodes),
+                'total_edges': len(edges)
+            }
+        }
+
+    def get_reponse_preparee(self, nom: str, construire: Callable[[], Dict]) -> ReponsePreparee:
+        """
+        Charge utile JSON 'nom' du réseau de référence, construite, sérialisée
+        et compressée une seule fois par version de la structure.
+        """
+        version, reponses = self._reponses
+        if version != self.version_structure:
+            version, reponses = self.version_structure, {}
+            self._reponses = (version, reponses)
+        if nom not in reponses:
+            corps = app.json.dumps(construire()).encode('utf-8')
+            reponses[nom] = ReponsePreparee(corps, self.derniere_modification)
+        return reponses[nom]
+
+    @chronometrer()
+    def get_reseau_zone(self, lat_min: float, lon_min: float, lat_max: float, lon_max: float,
+                        zoom: Optional[int] = None) -> Dict:
+        """
+        Nœuds et arêtes du réseau de référence dans un rectangle, au niveau de
+        détail du zoom (toutes les routes et tous les arrêts si zoom est None).
+        Les arêtes portent leurs coordonnées, leurs extrémités pouvant être hors zone.
+        """
+        reseau = self.reseau_base
+        noeuds, aretes = self.get_index_spatial().dans_rectangle(lat_min, lon_min, lat_max, lon_max)
+        types_routes = types_routes_visibles(zoom) if zoom is not None else None
+        types_noeuds = types_noeuds_visibles(zoom) if zoom is not None else None
+        sources, cibles = reseau.sources, reseau.cibles
+        
+        nodes = [{
+            'id': reseau.ids[i],
+            'name': reseau.nom(i),
+            'lat': reseau.lat[i],
+            'lon': reseau.lon[i],
+            'type': reseau.type_noeud(i),
+            'description': reseau.description(i)
+        } for i in noeuds if types_noeuds is None or reseau.type_noeud(i) in types_noeuds]
+        
+        edges = [{
+            'from': reseau.ids[sources[e]],
+            'to': reseau.ids[cibles[e]],
+            'distance': reseau.poids['distance'][e],
+            'time': reseau.poids['temps'][e],
+            'route': reseau.nom_route(e),
+            'type_route': reseau.type_route(e),
+            'vitesse_moyenne': reseau.vitesses[e],
+            'coordinates': [[reseau.lon[sources[e]], reseau.lat[sources[e]]],
+                            [reseau.lon[cibles[e]], reseau.lat[cibles[e]]]]
+        } for e in aretes if types_routes is None or reseau.type_route(e) in types_routes]
         
+        return {
+            'bbox': [lat_min, lon_min, lat_max, lon_max],
+            'zoom': zoom,
+            'nodes': nodes,
+            'edges': edges
+        }
+
+    @chronometrer()
+    def get_tuile(self, z: int, x: int, y: int) -> ReponsePreparee:
+        """Tuile XYZ du réseau, extraite, sérialisée et compressée une fois par version de la structure"""
+        version, tuiles = self._tuiles
+        if version != self.version_structure:
+            version, tuiles = self.version_structure, CacheLRU(self.TAILLE_CACHE_TUILES)
+            self._tuiles = (version, tuiles)
+        tuile = tuiles.lire((z, x, y))
+        if tuile is None:
+            contenu = {'tile': [z, x, y], **self.get_reseau_zone(*rectangle_tuile(z, x, y), zoom=z)}
+            tuile = ReponsePreparee(app.json.dumps(contenu).encode('utf-8'), self.derniere_modification)
+            tuiles.ecrire((z, x, y), tuile)
+        return tuile
+
+    def get_statistiques_reseau(self) -> StatistiquesReseau:
+        """Agrégats du réseau de référence, recalculés en une passe seulement si la structure a changé hors suivi"""
+        version, stats = self._statistiques
+        if version != self.version_structure:
+            version, stats = self.version_structure, StatistiquesReseau.depuis_reseau(self.reseau_base)
+            self._statistiques = (version, stats)
         return stats
+
+    def _statistiques_suivies(self) -> Optional[StatistiquesReseau]:
+        """Statistiques à ajuster lors d'une modification (None si elles ne sont plus à jour)"""
+        version, stats = self._statistiques
+        return stats if version == self.version_structure else None
+
+    def _conserver_statistiques(self, stats: Optional[StatistiquesReseau]):
+        """Après marquer_modification : les statistiques ajustées valent pour la nouvelle version"""
+        if stats is not None:
+            self._statistiques = (self.version_structure, stats)
+
+    def get_network_stats(self, connectivite: bool = False) -> Dict:
+        """
+        Retourne les statistiques détaillées du réseau (maintenues incrémentalement).
+        La connectivité par nœud, de taille proportionnelle au réseau, n'est
+        incluse que sur demande (voir aussi get_connectivite pour la pagination).
+        """
+        stats = self.get_statistiques_reseau()
+        result = stats.instantane()
+        if connectivite:
+            result['connectivite'] = stats.connectivite()
+        return result
+
+    def get_connectivite(self, debut: int = 0, nombre: Optional[int] = None) -> Dict:
+        """Page de la connectivité (degrés) des nœuds, dans l'ordre du réseau"""
+        stats = self.get_statistiques_reseau()
+        return {
+            'offset': debut,
+            'total': len(stats.degres),
+            'connectivite': stats.connectivite(debut, nombre)
+        }
     
+    def get_diagnostics(self) -> Dict:
+        """
+        Retourne l'instantané des diagnostics du réseau.
+
+        L'instantané est calculé une fois par version du graphe. Si le graphe a
+        changé depuis, l'ancien instantané est servi (marqué 'a_jour': False)
+        pendant qu'un thread en calcule un nouveau.
+        """
+        version, diagnostics = self._diagnostics
+        if version == self.graph_version:
+            return diagnostics
+        if diagnostics is None:
+            with self._verrou_diagnostics:
+                version, diagnostics = self._diagnostics
+                if diagnostics is None:
+                    self._rafraichir_diagnostics()
+            return self._diagnostics[1]
+        
+        if self._verrou_diagnostics.acquire(blocking=False):
+            threading.Thread(target=self._rafraichir_diagnostics, args=(True,), daemon=True).start()
+        return {**diagnostics, 'a_jour': False}
+
+    @chronometrer()
+    def _rafraichir_diagnostics(self, liberer_verrou: bool = False):
+        """Calcule un nouvel instantané des diagnostics pour la version courante du graphe"""
+        try:
+            etat = self.etat
+            version, reseau = etat.version, etat.reseau
+            stats = self.get_network_stats()
+            index = reseau.index
+            depart, arrivee = self.DEPART_DEFAUT, self.ARRIVEE_DEFAUT
+            
+            if depart in index and arrivee in index:
+                total_paths = compter_chemins(reseau, index[depart], index[arrivee], self.LONGUEUR_MAX_DIAGNOSTIC)
+                has_path = total_paths > 0 or dijkstra(reseau, index[depart], index[arrivee], 'distance') is not None
+            else:
+                total_paths = 0
+                has_path = False
+            
+            self._diagnostics = (version, {
+                'graph_version': version,
+                'calcule_le': time.time(),
+                'a_jour': True,
+                'network_stats': stats,
+                'diagnostics': {
+                    'graph_connected': reseau.est_faiblement_connexe(),
+                    'has_path': has_path,
+                    'nodes_count': stats['nombre_noeuds'],
+                    'edges_count': stats['nombre_aretes'],
+                    'total_possible_paths': total_paths
+                }
+            })
+        finally:
+            if liberer_verrou:
+                self._verrou_diagnostics.release()
+
     def get_node_details(self, node_id: str) -> Optional[Dict]:
-        """Retourne les détails d'un nœud spécifique"""
-        if node_id not in self.G.nodes():
+        """Retourne les détails d'un nœud spécifique (réseau de référence)"""
+        reseau = self.reseau_base
+        i = reseau.index.get(node_id)
+        if i is None:
             return None
         
-        node_data = self.G.nodes[node_id]
+        def connexion(u: int, v: int, voisin: int, cle: str) -> Dict:
+            # Arêtes parallèles : la plus rapide
+            e = reseau.arete(u, v, 'temps')
+            return {
+                cle: reseau.nom(voisin),
+                f'{cle}_id': reseau.ids[voisin],
+                'route': reseau.nom_route(e),
+                'distance': reseau.poids['distance'][e],
+                'time': reseau.poids['temps'][e]
+            }
+        
+        predecesseurs = sorted({reseau.sources[reseau.aretes_entrantes[k]]
+                                for k in range(reseau.offsets_entrants[i], reseau.offsets_entrants[i + 1])})
+        successeurs = dict.fromkeys(reseau.cibles[e] for e in range(reseau.offsets[i], reseau.offsets[i + 1]))
         connections = {
-            'entrantes': [
-                {
-                    'from': self.G.nodes[u]['nom'],
-                    'from_id': u,
-                    'route': self.G[u][node_id]['nom_route'],
-                    'distance': self.G[u][node_id]['distance'],
-                    'time': self.G[u][node_id]['temps']
-                } for u in self.G.predecessors(node_id)
-            ],
-            'sortantes': [
-                {
-                    'to': self.G.nodes[v]['nom'],
-                    'to_id': v,
-                    'route': self.G[node_id][v]['nom_route'],
-                    'distance': self.G[node_id][v]['distance'],
-                    'time': self.G[node_id][v]['temps']
-                } for v in self.G.successors(node_id)
-            ]
+            'entrantes': [connexion(u, i, u, 'from') for u in predecesseurs],
+            'sortantes': [connexion(i, v, v, 'to') for v in successeurs]
         }
         
         return {
             'id': node_id,
-            **node_data,
+            'nom': reseau.nom(i),
+            'lat': reseau.lat[i],
+            'lon': reseau.lon[i],
+            'type': reseau.type_noeud(i),
+            'description': reseau.description(i),
             'connections': connections,
             'centralite': self.calculer_centralite(node_id)
         }
     
+    @chronometrer()
     def calculer_centralite(self, node_id: str) -> Dict:
-        """Calcule les métriques de centralité pour un nœud"""
+        """Retourne les métriques de centralité d'un nœud (lecture dans le cache)"""
+        return self.get_centralites().get(node_id, {
+            'degree_centrality': 0,
+            'betweenness_centrality': 0,
+            'closeness_centrality': 0
+        })
+
+    def get_centralites(self) -> Dict[str, Dict]:
+        """
+        Retourne les centralités de tous les nœuds, calculées une seule fois
+        par version de la structure (elles ne dépendent pas des poids).
+        """
+        version, centralites = self._centralites
+        if version != self.version_structure:
+            version = self.version_structure
+            centralites = self._calculer_centralites()
+            # Affectation unique du couple (version, valeurs) pour les lecteurs concurrents
+            self._centralites = (version, centralites)
+        return centralites
+
+    @chronometrer()
+    def _calculer_centralites(self) -> Dict[str, Dict]:
+        """Calcule les trois métriques de centralité pour l'ensemble du graphe"""
+        n = self.G.number_of_nodes()
+        k = self.betweenness_k
+        if k is None and n > self.SEUIL_ECHANTILLONNAGE_CENTRALITE:
+            k = self.ECHANTILLON_CENTRALITE_DEFAUT
+        if k is not None and k >= n:
+            k = None
+        
+        degree = nx.degree_centrality(self.G)
+        # Avec k sources échantillonnées, le coût passe de O(V·E) à O(k·E)
+        betweenness = nx.betweenness_centrality(self.G, k=k, seed=42 if k else None)
+        closeness = nx.closeness_centrality(self.G)
+        
         return {
-            'degree_centrality': round(nx.degree_centrality(self.G).get(node_id, 0), 3),
-            'betweenness_centrality': round(nx.betweenness_centrality(self.G).get(node_id, 0), 3),
-            'closeness_centrality': round(nx.closeness_centrality(self.G).get(node_id, 0), 3)
+            node: {
+                'degree_centrality': round(degree.get(node, 0), 3),
+                'betweenness_centrality': round(betweenness.get(node, 0), 3),
+                'closeness_centrality': round(closeness.get(node, 0), 3)
+            }
+            for node in self.G.nodes()
         }
     
+    # --- RECHERCHE SPATIALE ---
+
+    def get_index_spatial(self) -> GrilleSpatiale:
+        """Retourne l'index spatial des nœuds et arêtes, reconstruit si la structure du graphe a changé"""
+        version, index = self._index_spatial
+        if version != self.version_structure:
+            reseau = self.reseau_base
+            version = self.version_structure
+            index = GrilleSpatiale(reseau.lat, reseau.lon, self.calculer_distance_reelle,
+                                   reseau.sources, reseau.cibles)
+            self._index_spatial = (version, index)
+        return index
+
+    def get_nearest_nodes(self, lat: float, lon: float, k: int = 5,
+                          rayon_km: Optional[float] = None) -> List[Dict]:
+        """Nœuds les plus proches d'un point (les k premiers, ou tous ceux du rayon donné)"""
+        index = self.get_index_spatial()
+        if rayon_km is not None:
+            trouves = index.dans_rayon(lat, lon, rayon_km)[:k]
+        else:
+            trouves = index.plus_proches(lat, lon, k)
+        reseau = self.reseau
+        return [{
+            'id': reseau.ids[i],
+            'name': reseau.nom(i),
+            'lat': reseau.lat[i],
+            'lon': reseau.lon[i],
+            'type': reseau.type_noeud(i),
+            'distance_km': round(distance, 3)
+        } for distance, i in trouves]
+
+    def get_nearest_edge(self, lat: float, lon: float) -> Optional[Dict]:
+        """Arête la plus proche d'un point, avec le point projeté sur celle-ci"""
+        projection = self.get_index_spatial().arete_la_plus_proche(lat, lon)
+        if projection is None:
+            return None
+        reseau = self.reseau
+        e = projection['arete']
+        return {
+            'from': reseau.ids[reseau.sources[e]],
+            'to': reseau.ids[reseau.cibles[e]],
+            'route': reseau.nom_route(e),
+            'type_route': reseau.type_route(e),
+            'fraction': round(projection['fraction'], 3),
+            'point': [projection['lon'], projection['lat']],
+            'distance_km': round(projection['distance_km'], 3)
+        }
+
+    def accrocher(self, lat: float, lon: float, mode: str = 'noeud',
+                  depart: bool = True) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        Nœud du réseau utilisé pour un point quelconque et trajet d'approche
+        non compté dans l'itinéraire.
+
+        'noeud' : le nœud le plus proche, sans approche.
+        'arete' : l'extrémité utile de l'arête (orientée) la plus proche — son
+        extrémité pour un départ, son origine pour une arrivée. L'itinéraire part
+        (ou arrive) à ce nœud : la portion d'arête entre le point projeté et le
+        nœud n'entre pas dans ses totaux et est renvoyée comme approche
+        (distance en km, temps en minutes, au prorata de l'arête).
+        """
+        if mode == 'arete':
+            projection = self.get_index_spatial().arete_la_plus_proche(lat, lon)
+            if projection is None:
+                return None, None
+            reseau = self.reseau
+            e = projection['arete']
+            part = 1 - projection['fraction'] if depart else projection['fraction']
+            noeud = reseau.cibles[e] if depart else reseau.sources[e]
+            if part == 1:
+                # Point sur l'autre extrémité : on part (ou arrive) de celle-ci
+                part, noeud = 0, reseau.sources[e] if depart else reseau.cibles[e]
+            approche = {
+                'distance_km': round(reseau.poids['distance'][e] * part, 3),
+                'temps_min': round(reseau.poids['temps'][e] * part, 1)
+            }
+            return reseau.ids[noeud], approche
+        proches = self.get_nearest_nodes(lat, lon, 1)
+        return (proches[0]['id'], None) if proches else (None, None)
+
     def get_all_nodes_by_type(self, node_type: str = None) -> List[Dict]:
         """Retourne tous les nœuds, optionnellement filtrés par type"""
-        nodes = []
-        for node_id in self.G.nodes():
-            node_data = self.G.nodes[node_id]
-            if node_type is None or node_data['type'] == node_type:
-                nodes.append({
-                    'id': node_id,
-                    'name': node_data['nom'],
-                    'lat': node_data['lat'],
-                    'lon': node_data['lon'],
-                    'type': node_data['type'],
-                    'description': node_data.get('description', '')
-                })
-        return nodes
+        reseau = self.reseau_base
+        return [{
+            'id': reseau.ids[i],
+            'name': reseau.nom(i),
+            'lat': reseau.lat[i],
+            'lon': reseau.lon[i],
+            'type': reseau.type_noeud(i),
+            'description': reseau.description(i)
+        } for i in range(reseau.nombre_noeuds) if node_type is None or reseau.type_noeud(i) == node_type]
+
+def creer_cache_routes() -> CacheRoutes:
+    """Cache d'itinéraires configuré par TRANSPORT_CACHE_TAILLE et TRANSPORT_CACHE_REDIS (cache partagé)"""
+    url_redis = os.environ.get('TRANSPORT_CACHE_REDIS')
+    return CacheRoutes(
+        taille_max=int(os.environ.get('TRANSPORT_CACHE_TAILLE', 1024)),
+        partage=CacheRedis(url_redis) if url_redis else None
+    )
+
+class SystemeDiffere:
+    """
+    TransportSystem construit au premier accès à l'un de ses attributs :
+    importer app (pour TransportSystem, par exemple depuis snapshot.py ou
+    benchmark.py) ne charge ainsi aucun réseau.
+    """
+
+    def __init__(self, fabrique: Callable[[], TransportSystem]):
+        self._fabrique = fabrique
+        self._instance: Optional[TransportSystem] = None
+        self._verrou = threading.Lock()
 
-# Initialisation du système
-transport = TransportSystem()
+    @property
+    def instance(self) -> TransportSystem:
+        if self._instance is None:
+            with self._verrou:
+                if self._instance is None:
+                    self._instance = self._fabrique()
+        return self._instance
+
+    def __getattr__(self, nom: str):
+        return getattr(self.instance, nom)
+
+# Initialisation du système : snapshot binaire (TRANSPORT_SNAPSHOT), fichier réseau
+# (TRANSPORT_RESEAU) ou, à défaut, réseau de démonstration ; horaires GTFS optionnels
+# (TRANSPORT_GTFS, TRANSPORT_GTFS_DATE)
+transport = SystemeDiffere(lambda: TransportSystem(fichier=os.environ.get('TRANSPORT_RESEAU'),
+                                                   snapshot=os.environ.get('TRANSPORT_SNAPSHOT'),
+                                                   cache_routes=creer_cache_routes(),
+                                                   gtfs=os.environ.get('TRANSPORT_GTFS'),
+                                                   date_gtfs=os.environ.get('TRANSPORT_GTFS_DATE')))
+
+def collecter_metriques() -> List:
+    """Métriques lues à l'export : cache d'itinéraires et réseau courant"""
+    cache = transport.cache_routes.statistiques()
+    return [
+        ('transport_cache_routes_requetes_total', 'counter', "Lectures du cache d'itinéraires par résultat", [
+            ({'resultat': 'succes'}, cache['succes']),
+            ({'resultat': 'succes_partage'}, cache['succes_partages']),
+            ({'resultat': 'echec'}, cache['echecs'])
+        ]),
+        ('transport_cache_routes_evictions_total', 'counter', "Entrées évincées du cache local",
+         [({}, cache['evictions'])]),
+        ('transport_cache_routes_erreurs_partage_total', 'counter', "Erreurs du cache partagé",
+         [({}, cache['erreurs_partage'])]),
+        ('transport_cache_routes_entrees', 'gauge', "Entrées du cache local", [({}, cache['taille'])]),
+        ('transport_graphe_version', 'gauge', "Version courante du graphe", [({}, transport.graph_version)]),
+        ('transport_reseau_elements', 'gauge', "Taille du réseau courant", [
+            ({'element': 'noeuds'}, transport.reseau.nombre_noeuds),
+            ({'element': 'aretes'}, transport.reseau.nombre_aretes)
+        ])
+    ]
+
+METRIQUES.ajouter_collecteur(collecter_metriques)
 
 # --- ROUTES FLASK ---
 
+# Nombre maximal de chemins retournés par /api/all-simple-paths
+MAX_CHEMINS = 500
+# Modes d'accrochage des coordonnées au réseau (?snap= et /api/nearest?mode=)
+MODES_ACCROCHAGE = ('noeud', 'arete')
+# Nombre maximal de nœuds retournés par /api/nearest
+MAX_VOISINS = 100
+# Nombre maximal d'origines (et de destinations) d'une matrice
+MAX_MATRICE = 1000
+# Nombre maximal d'itinéraires de /api/all-paths?mode=alternatives
+MAX_ALTERNATIVES = 5
+# Nombre maximal de seuils d'une isochrone
+MAX_SEUILS = 10
+# Nombre maximal de nœuds par page de /api/stats/connectivity
+MAX_CONNECTIVITE = 5000
+
+@app.before_request
+def debut_requete():
+    g.debut_requete = time.perf_counter()
+
+@app.after_request
+def mesurer_requete(response):
+    """Durée, statut et taille de chaque réponse, par route (règle d'URL, pas chemin brut)"""
+    debut = g.pop('debut_requete', None)
+    if debut is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'inconnue'
+        METRIQUES.incrementer('transport_http_requetes_total', route=route,
+                              methode=request.method, statut=response.status_code)
+        METRIQUES.observer('transport_http_duree_secondes', time.perf_counter() - debut, route=route)
+        if not response.is_streamed and response.content_length is not None:
+            METRIQUES.observer('transport_http_reponse_octets', response.content_length, route=route)
+    return response
+
 @app.route('/')
 def index():
     """Page principale de l'application"""
@@ -588,78 +2101,477 @@ def index():
 
 @app.route('/api/network')
 def get_network():
-    """API: Retourne tout le réseau avec statistiques complètes"""
-    nodes = transport.get_all_nodes_by_type()
-    
-    edges = []
-    for u, v in transport.G.edges():
-        edge_data = transport.G[u][v]
-        edges.append({
-            'from': u,
-            'to': v,
-            'distance': edge_data['distance'],
-            'time': edge_data['temps'],
-            'route': edge_data['nom_route'],
-            'type_route': edge_data['type_route'],
-            'vitesse_moyenne': edge_data['vitesse_moyenne']
-        })
+    """
+    API: Retourne tout le réseau avec statistiques complètes (pré-sérialisé, ETag),
+    ou seulement la zone ?bbox=lat_min,lon_min,lat_max,lon_max (&zoom= pour le niveau de détail)
+    """
+    bbox = request.args.get('bbox')
+    if bbox is None:
+        return transport.get_reponse_preparee('network', transport.get_network_data).servir(request)
+    try:
+        lat_min, lon_min, lat_max, lon_max = (float(v) for v in bbox.split(','))
+    except ValueError:
+        return jsonify({"error": "Paramètre 'bbox' invalide (lat_min,lon_min,lat_max,lon_max)"}), 400
+    zoom = request.args.get('zoom', type=int)
+    return jsonify(transport.get_reseau_zone(lat_min, lon_min, lat_max, lon_max, zoom))
+
+@app.route('/api/tiles/<int:z>/<int:x>/<int:y>')
+def tile(z, x, y):
+    """API: Tuile XYZ du réseau (arêtes et arrêts selon le zoom), mise en cache et compressée"""
+    if not tuile_valide(z, x, y):
+        return jsonify({"error": "Tuile invalide"}), 400
+    return transport.get_tuile(z, x, y).servir(request)
+
+def lire_coordonnees(prefixe: str = '') -> Optional[Tuple[float, float]]:
+    """Lit un couple '<prefixe>lat'/'<prefixe>lon' de la requête (None si absent ou invalide)"""
+    lat = request.args.get(f'{prefixe}lat', type=float)
+    lon = request.args.get(f'{prefixe}lon', type=float)
+    if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+def lire_extremites(defaut_depart: Optional[str] = None, defaut_arrivee: Optional[str] = None):
+    """
+    Lit les extrémités de la requête : identifiants 'from'/'to', ou coordonnées
+    'from_lat'/'from_lon' et 'to_lat'/'to_lon' accrochées au réseau (?snap=noeud|arete).
+    Les accrochages effectués sont conservés dans g.accrochage.
+    """
+    start = request.args.get('from', defaut_depart)
+    end = request.args.get('to', defaut_arrivee)
+    mode = request.args.get('snap', 'noeud')
+    if mode not in MODES_ACCROCHAGE:
+        return None, (jsonify({"error": f"Accrochage invalide. Utilisez {', '.join(MODES_ACCROCHAGE)}"}), 400)
+    g.accrochage = {}
+    for role, prefixe in (('from', 'from_'), ('to', 'to_')):
+        point = lire_coordonnees(prefixe)
+        if point is None:
+            continue
+        node_id, approche = transport.accrocher(*point, mode=mode, depart=(role == 'from'))
+        g.accrochage[role] = {'lat': point[0], 'lon': point[1], 'node_id': node_id, 'mode': mode}
+        if approche is not None:
+            g.accrochage[role]['approche'] = approche
+        if role == 'from':
+            start = node_id
+        else:
+            end = node_id
+    if not start or not end:
+        return None, (jsonify({"error": "Paramètres 'from' et 'to' requis"}), 400)
+    for node_id in (start, end):
+        if node_id not in transport.reseau.index:
+            return None, (jsonify({"error": f"Nœud '{node_id}' non trouvé"}), 404)
+    return (start, end), None
+
+def lire_algorithme():
+    """Lit l'algorithme de recherche demandé (?algorithm=ch|dijkstra|astar|bidirectionnel)"""
+    algorithme = request.args.get('algorithm', 'ch')
+    if algorithme not in TransportSystem.ALGORITHMES:
+        return None, (jsonify({
+            "error": f"Algorithme invalide. Utilisez {', '.join(TransportSystem.ALGORITHMES)}"
+        }), 400)
+    return algorithme, None
+
+def lire_format_itineraire():
+    """Lit le format des itinéraires demandé (?format=complet|compact)"""
+    format_reponse = request.args.get('format', 'complet')
+    if format_reponse not in ('complet', 'compact'):
+        return None, (jsonify({"error": "Format invalide. Utilisez 'complet' ou 'compact'"}), 400)
+    return format_reponse, None
+
+def lire_heure_parametre(nom: str, defaut: Optional[str] = None):
+    """Lit une heure 'HH:MM' de la requête, en minutes depuis minuit (None si absente)"""
+    valeur = request.args.get(nom, defaut)
+    if valeur is None:
+        return None, None
+    try:
+        return lire_heure(valeur), None
+    except ValueError:
+        return None, (jsonify({"error": f"Paramètre '{nom}' invalide (format HH:MM)"}), 400)
+
+@app.route('/api/route')
+def route():
+    """
+    API: Chemin optimal entre deux nœuds quelconques (?from=&to=&criteria=&algorithm=).
+    Avec ?depart=HH:MM, itinéraire le plus rapide pour ce départ selon les profils horaires.
+    Les extrémités données en coordonnées (from_lat/from_lon, to_lat/to_lon) sont
+    accrochées à un nœud (?snap=noeud|arete) : avec 'arete', l'itinéraire part de
+    l'extrémité de l'arête la plus proche et arrive à son origine ; la portion
+    d'arête parcourue jusqu'au point n'est pas dans les totaux mais dans
+    accrochage.<from|to>.approche.
+    """
+    depart, erreur = lire_heure_parametre('depart')
+    if erreur:
+        return erreur
+    criteria = request.args.get('criteria', 'distance' if depart is None else 'temps')
+    if criteria not in TransportSystem.CRITERES:
+        return jsonify({"error": "Critère invalide. Utilisez 'distance' ou 'temps'"}), 400
+    if depart is not None and criteria != 'temps':
+        return jsonify({"error": "Un itinéraire avec heure de départ optimise le critère 'temps'"}), 400
+    algorithme, erreur = lire_algorithme()
+    if erreur:
+        return erreur
+    format_reponse, erreur = lire_format_itineraire()
+    if erreur:
+        return erreur
     
-    return jsonify({
-        'nodes': nodes, 
-        'edges': edges,
-        'stats': transport.get_network_stats(),
-        'metadata': {
-            'version': '4.0',
-            'city': 'Kinshasa',
-            'description': 'Réseau de transport complet Rond-Point Victoire → Gare Centrale',
-            'total_nodes': len(nodes),
-            'total_edges': len(edges)
-        }
-    })
+    extremites, erreur = lire_extremites()
+    if erreur:
+        return erreur
+    
+    if depart is not None:
+        result = transport.get_itineraire_horaire(*extremites, depart)
+    else:
+        result = transport.get_shortest_path(*extremites, criteria, algorithme)
+    if not result:
+        return jsonify({"error": "Aucun chemin trouvé entre les points spécifiés"}), 404
+    
+    if g.accrochage:
+        result = {**result, 'accrochage': g.accrochage}
+    if format_reponse == 'compact':
+        result = compacter_itineraire(result)
+    return jsonify(result)
 
 @app.route('/api/shortest-path/<criteria>')
 def shortest_path(criteria):
     """API: Chemin optimal selon le critère ('distance' ou 'temps')"""
-    if criteria not in ['distance', 'temps']:
+    if criteria not in TransportSystem.CRITERES:
         return jsonify({"error": "Critère invalide. Utilisez 'distance' ou 'temps'"}), 400
+    algorithme, erreur = lire_algorithme()
+    if erreur:
+        return erreur
+    format_reponse, erreur = lire_format_itineraire()
+    if erreur:
+        return erreur
+    
+    extremites, erreur = lire_extremites(TransportSystem.DEPART_DEFAUT, TransportSystem.ARRIVEE_DEFAUT)
+    if erreur:
+        return erreur
     
-    result = transport.get_shortest_path('RP_VICTOIRE', 'GARE_CENTRALE', criteria)
+    result = transport.get_shortest_path(*extremites, criteria, algorithme)
     if not result:
         return jsonify({"error": "Aucun chemin trouvé entre les points spécifiés"}), 404
     
+    if g.accrochage:
+        result = {**result, 'accrochage': g.accrochage}
+    if format_reponse == 'compact':
+        result = compacter_itineraire(result)
     return jsonify(result)
 
 @app.route('/api/all-paths')
 def all_paths():
-    """API: Les deux chemins optimaux (distance et temps) avec comparaison"""
-    return jsonify(transport.get_all_paths())
+    """
+    API: Les deux chemins optimaux (distance et temps) avec comparaison.
+    Avec ?mode=pareto, tous les compromis non dominés (distance, temps et,
+    sauf ?stops=false, nombre d'étapes). Avec ?mode=alternatives, l'optimal
+    selon ?criteria= et des alternatives différentes (?count=&max_stretch=&max_overlap=).
+    """
+    mode = request.args.get('mode', 'optimaux')
+    if mode not in ('optimaux', 'pareto', 'alternatives'):
+        return jsonify({"error": "Mode invalide. Utilisez 'optimaux', 'pareto' ou 'alternatives'"}), 400
+    format_reponse, erreur = lire_format_itineraire()
+    if erreur:
+        return erreur
+    extremites, erreur = lire_extremites(TransportSystem.DEPART_DEFAUT, TransportSystem.ARRIVEE_DEFAUT)
+    if erreur:
+        return erreur
+    if mode == 'optimaux':
+        result = transport.get_all_paths(*extremites)
+        if format_reponse == 'compact':
+            result = {**result, **{cle: compacter_itineraire(result[cle])
+                                   for cle in ('by_distance', 'by_time') if result[cle]}}
+        return jsonify(result)
+    
+    if mode == 'alternatives':
+        criteria = request.args.get('criteria', 'temps')
+        if criteria not in TransportSystem.CRITERES:
+            return jsonify({"error": "Critère invalide. Utilisez 'distance' ou 'temps'"}), 400
+        nombre = request.args.get('count', TransportSystem.NOMBRE_ALTERNATIVES, type=int)
+        if nombre is None or not 1 <= nombre <= MAX_ALTERNATIVES:
+            return jsonify({"error": f"Paramètre 'count' invalide (entier entre 1 et {MAX_ALTERNATIVES})"}), 400
+        etirement = request.args.get('max_stretch', TransportSystem.ETIREMENT_ALTERNATIVES, type=float)
+        if etirement is None or not 1 <= etirement <= 3:
+            return jsonify({"error": "Paramètre 'max_stretch' invalide (entre 1 et 3)"}), 400
+        partage = request.args.get('max_overlap', TransportSystem.PARTAGE_ALTERNATIVES, type=float)
+        if partage is None or not 0 <= partage < 1:
+            return jsonify({"error": "Paramètre 'max_overlap' invalide (au moins 0, moins de 1)"}), 400
+        result = transport.get_itineraires_alternatifs(*extremites, criteria, nombre, etirement, partage)
+    else:
+        result = transport.get_front_pareto(*extremites, request.args.get('stops', 'true').lower() != 'false')
+    if not result:
+        return jsonify({"error": "Aucun chemin trouvé entre les points spécifiés"}), 404
+    if format_reponse == 'compact':
+        result = {**result, 'routes': [compacter_itineraire(r) for r in result['routes']]}
+    return jsonify(result)
 
 @app.route('/api/all-simple-paths')
 def all_simple_paths():
-    """API: Retourne la liste de tous les chemins simples possibles"""
-    all_paths = transport.get_all_simple_paths()
+    """
+    API: Retourne les k meilleurs chemins simples (?k=&criteria=temps|distance).
+    ?fields=path_ids,total_time_min restreint les champs de chaque chemin ;
+    ?format=ndjson diffuse les chemins un par ligne dès qu'ils sont trouvés ;
+    ?limit=&cursor= pagine l'énumération (next_cursor dans la réponse).
+    """
+    criteria = request.args.get('criteria', 'temps')
+    if criteria not in TransportSystem.CRITERES:
+        return jsonify({"error": "Critère invalide. Utilisez 'distance' ou 'temps'"}), 400
+    k = request.args.get('k', 50, type=int)
+    if k is None or not 1 <= k <= MAX_CHEMINS:
+        return jsonify({"error": f"Paramètre 'k' invalide (entier entre 1 et {MAX_CHEMINS})"}), 400
+    format_reponse = request.args.get('format', 'json')
+    if format_reponse not in ('json', 'ndjson'):
+        return jsonify({"error": "Format invalide. Utilisez 'json' ou 'ndjson'"}), 400
+    champs = lire_liste('fields')
+    if champs is not None and (not champs or any(c not in TransportSystem.CHAMPS_CHEMIN_SIMPLE for c in champs)):
+        return jsonify({
+            "error": f"Paramètre 'fields' invalide. Champs : {', '.join(TransportSystem.CHAMPS_CHEMIN_SIMPLE)}"
+        }), 400
+    curseur = request.args.get('cursor')
+    limite = request.args.get('limit', type=int)
+    if limite is not None and not 1 <= limite <= MAX_CHEMINS:
+        return jsonify({"error": f"Paramètre 'limit' invalide (entier entre 1 et {MAX_CHEMINS})"}), 400
+    
+    extremites, erreur = lire_extremites(TransportSystem.DEPART_DEFAUT, TransportSystem.ARRIVEE_DEFAUT)
+    if erreur:
+        return erreur
+    start, end = extremites
+    
+    if format_reponse == 'ndjson':
+        # Une ligne JSON par chemin, envoyée dès qu'il est trouvé (mémoire bornée à un chemin)
+        chemins = islice(transport.iterer_chemins_simples(start, end, criteria, champs), k)
+        return Response((app.json.dumps(chemin) + '\n' for chemin in chemins), mimetype='application/x-ndjson')
+    
+    entete = {
+        'start_node': transport.reseau.nom(transport.reseau.index[start]),
+        'end_node': transport.reseau.nom(transport.reseau.index[end]),
+        'critere': criteria
+    }
+    if limite is not None or curseur is not None:
+        try:
+            page = transport.get_page_chemins_simples(start, end, criteria, limite or k, curseur, champs)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({**entete, 'total_paths': len(page['paths']), **page})
+    
+    all_paths = transport.get_all_simple_paths(start, end, k, criteria, champs)
     
     if not all_paths:
         return jsonify({"error": "Aucun chemin simple trouvé entre les points spécifiés"}), 404
     
     return jsonify({
-        'start_node': transport.G.nodes['RP_VICTOIRE']['nom'],
-        'end_node': transport.G.nodes['GARE_CENTRALE']['nom'],
+        **entete,
         'total_paths': len(all_paths),
         'paths': all_paths
     })
 
+def lire_liste(nom: str) -> Optional[List[str]]:
+    """Lit une liste d'identifiants : tableau JSON du corps (POST) ou valeurs séparées par des virgules"""
+    corps = request.get_json(silent=True) if request.method == 'POST' else None
+    if isinstance(corps, dict) and nom in corps:
+        valeurs = corps[nom]
+        return [str(v) for v in valeurs] if isinstance(valeurs, list) else None
+    valeur = request.args.get(nom)
+    if valeur is None:
+        return None
+    return [v.strip() for v in valeur.split(',') if v.strip()]
+
+@app.route('/api/matrix', methods=['GET', 'POST'])
+def matrix():
+    """
+    API: Matrice des distances et temps entre origines et destinations
+    (?origins=A,B&destinations=C,D&criteria=temps, ou corps JSON en POST).
+    Sans destinations, la matrice est carrée sur les origines.
+    """
+    corps = request.get_json(silent=True) if request.method == 'POST' else None
+    if corps is not None and not isinstance(corps, dict):
+        return jsonify({"error": "Corps JSON attendu : {origins, destinations, criteria}"}), 400
+    criteria = (corps or {}).get('criteria') or request.args.get('criteria', 'temps')
+    if criteria not in TransportSystem.CRITERES:
+        return jsonify({"error": "Critère invalide. Utilisez 'distance' ou 'temps'"}), 400
+    
+    origines = lire_liste('origins')
+    destinations = lire_liste('destinations')
+    if destinations is None:
+        destinations = origines
+    if not origines or not destinations:
+        return jsonify({"error": "Paramètre 'origins' requis (liste d'identifiants de nœuds)"}), 400
+    if len(origines) > MAX_MATRICE or len(destinations) > MAX_MATRICE:
+        return jsonify({"error": f"Au plus {MAX_MATRICE} origines et {MAX_MATRICE} destinations"}), 400
+    
+    inconnus = sorted({node_id for node_id in (*origines, *destinations) if node_id not in transport.reseau.index})
+    if inconnus:
+        return jsonify({"error": "Nœuds non trouvés", "nodes": inconnus}), 404
+    
+    return jsonify(transport.get_matrix(origines, destinations, criteria))
+
+@app.route('/api/departures')
+def departures():
+    """
+    API: Durée du trajet selon l'heure de départ et meilleur départ (?from=&to=&start=&end=&step=)
+
+    Chaque heure de départ de la fenêtre coûte une recherche A* horaire : la
+    requête est limitée à MAX_DEPARTS départs (48 : 4 h toutes les 6 minutes
+    ou la journée toutes les 30 minutes) et son coût croît avec (end - start) / step.
+    """
+    debut, erreur = lire_heure_parametre('start', '06:00')
+    if erreur:
+        return erreur
+    fin, erreur = lire_heure_parametre('end', '10:00')
+    if erreur:
+        return erreur
+    pas = request.args.get('step', 15, type=int)
+    if pas is None or not 1 <= pas <= 24 * 60:
+        return jsonify({"error": "Paramètre 'step' invalide (minutes, entre 1 et 1440)"}), 400
+    
+    extremites, erreur = lire_extremites()
+    if erreur:
+        return erreur
+    
+    try:
+        result = transport.get_meilleurs_departs(*extremites, debut, fin, pas)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not result:
+        return jsonify({"error": "Aucun chemin trouvé entre les points spécifiés"}), 404
+    return jsonify(result)
+
+@app.route('/api/transit')
+def transit_journeys():
+    """
+    API: Itinéraires en transport en commun (?from=&to=&depart=HH:MM&max_transfers=),
+    un par nombre de correspondances améliorant l'arrivée
+    """
+    if transport.transit is None:
+        return jsonify({"error": "Aucun horaire de transport en commun chargé (TRANSPORT_GTFS)"}), 404
+    depart, erreur = lire_heure_parametre('depart', time.strftime('%H:%M'))
+    if erreur:
+        return erreur
+    max_correspondances = request.args.get('max_transfers', MAX_CORRESPONDANCES_DEFAUT, type=int)
+    if max_correspondances is None or not 0 <= max_correspondances <= 10:
+        return jsonify({"error": "Paramètre 'max_transfers' invalide (entre 0 et 10)"}), 400
+    start, end = request.args.get('from'), request.args.get('to')
+    if not start or not end:
+        return jsonify({"error": "Paramètres 'from' et 'to' requis"}), 400
+    
+    result = transport.get_itineraires_transit(start, end, depart, max_correspondances)
+    if result is None:
+        return jsonify({"error": "Arrêt ou nœud non trouvé"}), 404
+    return jsonify(result)
+
+@app.route('/api/profiles', methods=['GET'])
+def profiles():
+    """API: Profils horaires de trafic (par type de route et définis)"""
+    return jsonify(transport.get_definitions_profils())
+
+@app.route('/api/profiles', methods=['POST'])
+def profiles_update():
+    """
+    API: Définit un profil horaire. Corps JSON : {"name", "factors": [96 facteurs,
+    un par quart d'heure], "road_types": [...], "connections": [[from, to], ...]}.
+    Les types de route et connexions doivent exister dans le réseau (sinon 400).
+    """
+    corps = request.get_json(silent=True)
+    if not isinstance(corps, dict) or not isinstance(corps.get('name'), str) \
+            or not isinstance(corps.get('factors'), list):
+        return jsonify({"error": "Corps JSON attendu : {name, factors, road_types, connections}"}), 400
+    types_route = corps.get('road_types', [])
+    if not isinstance(types_route, list) or not all(isinstance(t, str) for t in types_route):
+        return jsonify({"error": "'road_types' doit être une liste de types de route"}), 400
+    connexions = corps.get('connections', [])
+    if not isinstance(connexions, list) or not all(
+            isinstance(c, list) and len(c) == 2 and all(isinstance(n, str) for n in c) for c in connexions):
+        return jsonify({"error": "'connections' doit être une liste de couples [from, to]"}), 400
+    try:
+        transport.definir_profil(corps['name'], corps['factors'], types_route, connexions)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({'name': corps['name'], 'version_profils': transport.version_profils})
+
+@app.route('/api/isochrone')
+def isochrone():
+    """
+    API: Zones atteignables en moins de chaque seuil
+    (?from=A,B ou lat=&lon=&thresholds=5,10,15&criteria=temps|distance&shape=enveloppe|grille&cell_km=&nodes=false)
+    """
+    criteria = request.args.get('criteria', 'temps')
+    if criteria not in TransportSystem.CRITERES:
+        return jsonify({"error": "Critère invalide. Utilisez 'distance' ou 'temps'"}), 400
+    forme = request.args.get('shape', 'enveloppe')
+    if forme not in FORMES_ISOCHRONE:
+        return jsonify({"error": f"Forme invalide. Utilisez {', '.join(FORMES_ISOCHRONE)}"}), 400
+    taille_cellule = request.args.get('cell_km', 0.25, type=float)
+    if taille_cellule is None or not 0.01 <= taille_cellule <= 50:
+        return jsonify({"error": "Paramètre 'cell_km' invalide (entre 0.01 et 50)"}), 400
+    try:
+        seuils = [float(s) for s in request.args.get('thresholds', '10').split(',') if s.strip()]
+    except ValueError:
+        seuils = []
+    if not seuils or len(seuils) > MAX_SEUILS or not all(0 < s < INFINI for s in seuils):
+        return jsonify({"error": f"Paramètre 'thresholds' invalide (1 à {MAX_SEUILS} valeurs positives)"}), 400
+    
+    sources = lire_liste('from') or []
+    point = lire_coordonnees()
+    node_id = transport.accrocher(*point)[0] if point is not None else None
+    if node_id:
+        sources.append(node_id)
+    if not sources:
+        return jsonify({"error": "Paramètre 'from' (ou 'lat'/'lon') requis"}), 400
+    inconnus = sorted({node_id for node_id in sources if node_id not in transport.reseau.index})
+    if inconnus:
+        return jsonify({"error": "Nœuds non trouvés", "nodes": inconnus}), 404
+    
+    return jsonify(transport.get_isochrones(sources, seuils, criteria, forme, taille_cellule,
+                                            request.args.get('nodes', 'true').lower() != 'false'))
+
+@app.route('/api/traffic', methods=['GET'])
+def traffic():
+    """API: État courant du trafic (connexions ralenties ou fermées)"""
+    etat = transport.etat
+    return jsonify({
+        'graph_version': etat.version,
+        'total': len(etat.trafic),
+        'updates': transport.get_trafic(etat)
+    })
+
+@app.route('/api/traffic', methods=['POST'])
+def traffic_update():
+    """
+    API: Mises à jour du trafic par lot. Corps JSON : liste (ou {"updates": [...]})
+    d'objets {"from", "to"} avec "time" (min), "speed" (km/h mesurés), "factor",
+    "closed" ou "reset", et un "reason" facultatif.
+    """
+    corps = request.get_json(silent=True)
+    mises_a_jour = corps.get('updates') if isinstance(corps, dict) else corps
+    if not isinstance(mises_a_jour, list) or not mises_a_jour:
+        return jsonify({"error": "Corps JSON attendu : liste de mises à jour non vide"}), 400
+    try:
+        return jsonify(transport.appliquer_trafic(mises_a_jour))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
 @app.route('/api/stats')
 def stats():
-    """API: Statistiques détaillées du réseau"""
-    return jsonify(transport.get_network_stats())
+    """
+    API: Statistiques détaillées du réseau (pré-sérialisées, ETag). La
+    connectivité par nœud n'est incluse qu'avec ?connectivity=true.
+    """
+    if request.args.get('connectivity', 'false').lower() == 'true':
+        return jsonify(transport.get_network_stats(connectivite=True))
+    return transport.get_reponse_preparee('stats', transport.get_network_stats).servir(request)
+
+@app.route('/api/stats/connectivity')
+def stats_connectivity():
+    """API: Degrés entrant, sortant et total des nœuds, par pages (?offset=&limit=)"""
+    debut = request.args.get('offset', 0, type=int)
+    nombre = request.args.get('limit', 500, type=int)
+    if debut is None or nombre is None or debut < 0 or not 1 <= nombre <= MAX_CONNECTIVITE:
+        return jsonify({"error": f"Paramètres 'offset' (≥ 0) et 'limit' (1 à {MAX_CONNECTIVITE}) invalides"}), 400
+    return jsonify(transport.get_connectivite(debut, nombre))
 
 @app.route('/api/nodes')
 def all_nodes():
     """API: Retourne tous les nœuds du réseau"""
     return jsonify({
         'nodes': transport.get_all_nodes_by_type(),
-        'total': len(transport.G.nodes())
+        'total': transport.reseau_base.nombre_noeuds
     })
 
 @app.route('/api/nodes/<node_type>')
@@ -684,23 +2596,59 @@ def node_details(node_id):
         return jsonify({"error": f"Nœud '{node_id}' non trouvé"}), 404
     return jsonify(details)
 
+@app.route('/api/nearest')
+def nearest():
+    """API: Nœuds les plus proches d'un point (?lat=&lon=&k=&radius=) ou arête la plus proche (&mode=arete)"""
+    point = lire_coordonnees()
+    if point is None:
+        return jsonify({"error": "Paramètres 'lat' et 'lon' requis"}), 400
+    
+    mode = request.args.get('mode', 'noeud')
+    if mode not in MODES_ACCROCHAGE:
+        return jsonify({"error": f"Mode invalide. Utilisez {', '.join(MODES_ACCROCHAGE)}"}), 400
+    if mode == 'arete':
+        arete = transport.get_nearest_edge(*point)
+        if arete is None:
+            return jsonify({"error": "Aucune arête dans le réseau"}), 404
+        return jsonify({'lat': point[0], 'lon': point[1], 'edge': arete})
+    
+    k = request.args.get('k', 5, type=int)
+    if k is None or not 1 <= k <= MAX_VOISINS:
+        return jsonify({"error": f"Paramètre 'k' invalide (entier entre 1 et {MAX_VOISINS})"}), 400
+    rayon = None
+    if 'radius' in request.args:
+        rayon = request.args.get('radius', type=float)
+        if rayon is None or not 0 < rayon < math.inf:
+            return jsonify({"error": "Paramètre 'radius' invalide (km, nombre fini et positif)"}), 400
+    
+    nodes = transport.get_nearest_nodes(*point, k, rayon)
+    return jsonify({'lat': point[0], 'lon': point[1], 'nodes': nodes, 'total': len(nodes)})
+
+@app.route('/api/metrics')
+def metrics():
+    """API: Métriques au format texte de Prometheus"""
+    return Response(METRIQUES.exporter(), content_type=TYPE_METRIQUES)
+
+@app.route('/api/health/live')
+def health_live():
+    """API: Sonde de vivacité, en temps constant"""
+    return jsonify({"status": "OK"})
+
 @app.route('/api/health')
+@app.route('/api/health/ready')
 def health():
-    """API: Santé de l'application avec diagnostics"""
+    """API: Santé de l'application avec diagnostics (instantané mis en cache)"""
     try:
-        stats = transport.get_network_stats()
+        snapshot = transport.get_diagnostics()
         return jsonify({
             "status": "OK", 
             "message": "Transport Kinshasa opérationnel",
             "version": "4.0",
-            "network_stats": stats,
-            "diagnostics": {
-                "graph_connected": nx.is_weakly_connected(transport.G),
-                "has_path": nx.has_path(transport.G, 'RP_VICTOIRE', 'GARE_CENTRALE'),
-                "nodes_count": stats['nombre_noeuds'],
-                "edges_count": stats['nombre_aretes'],
-                "total_possible_paths": len(list(nx.all_simple_paths(transport.G, 'RP_VICTOIRE', 'GARE_CENTRALE', cutoff=10)))
-            }
+            "graph_version": snapshot['graph_version'],
+            "a_jour": snapshot['a_jour'],
+            "network_stats": snapshot['network_stats'],
+            "diagnostics": snapshot['diagnostics'],
+            "cache_routes": transport.cache_routes.statistiques()
         })
     except Exception as e:
         return jsonify({
@@ -716,14 +2664,34 @@ def not_found(error):
         "error": "Endpoint non trouvé",
         "available_endpoints": [
             "/api/network", 
+            "/api/network?bbox={lat_min,lon_min,lat_max,lon_max}&zoom={z}",
+            "/api/tiles/{z}/{x}/{y}",
+            "/api/route?from={node_id}&to={node_id}&criteria={distance|temps}"
+            "&algorithm={ch|dijkstra|astar|bidirectionnel}&format={complet|compact}",
+            "/api/route?from_lat=&from_lon=&to_lat=&to_lon=&snap={noeud|arete}",
+            "/api/route?from={node_id}&to={node_id}&depart={HH:MM}",
+            "/api/departures?from={node_id}&to={node_id}&start={HH:MM}&end={HH:MM}&step={minutes}",
+            "/api/profiles (GET, POST)",
+            "/api/transit?from={stop_id|node_id}&to={stop_id|node_id}&depart={HH:MM}&max_transfers={0..10}",
+            "/api/nearest?lat=&lon=&k=&radius=&mode={noeud|arete}",
             "/api/shortest-path/{distance|temps}", 
-            "/api/all-paths", 
-            "/api/all-simple-paths", 
-            "/api/stats", 
+            "/api/matrix?origins={id,id,...}&destinations={id,id,...}&criteria={temps|distance}",
+            "/api/isochrone?from={id,id,...}&thresholds={5,10,15}&criteria={temps|distance}"
+            "&shape={enveloppe|grille}",
+            "/api/traffic (GET, POST)",
+            "/api/all-paths?mode={optimaux|pareto}&stops={true|false}",
+            "/api/all-paths?mode=alternatives&criteria={temps|distance}&count={1..5}&max_stretch=&max_overlap=",
+            "/api/all-simple-paths?k={1..500}&criteria={temps|distance}&fields={champ,...}"
+            "&format={json|ndjson}&limit=&cursor=", 
+            "/api/stats?connectivity={true|false}", 
+            "/api/stats/connectivity?offset=&limit=",
             "/api/nodes",
             "/api/nodes/{depart|arrivee|intermediaire}",
             "/api/node/{node_id}",
-            "/api/health"
+            "/api/metrics",
+            "/api/health",
+            "/api/health/live",
+            "/api/health/ready"
         ]
     }), 404
 
@@ -734,5 +2702,6 @@ if __name__ == '__main__':
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
     
     print(f"Démarrage de l'application Flask sur le port {port}. DEBUG={debug}")
-    print(f"Réseau créé avec {transport.G.number_of_nodes()} nœuds et {transport.G.number_of_edges()} arêtes")
+    reseau = transport.reseau_base
+    print(f"Réseau créé avec {reseau.nombre_noeuds} nœuds et {reseau.nombre_aretes} arêtes")
     app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
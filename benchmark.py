@@ -0,0 +1,317 @@
+"""
+Banc d'essai des algorithmes du système de transport.
+
+Un générateur déterministe produit des réseaux routiers de type Kinshasa, de
+1 000 à 1 000 000 de nœuds : quadrillage légèrement déformé autour du centre
+de la ville, étiré d'est en ouest le long du fleuve, avec la répartition des
+types de route du réseau de démonstration, des tronçons manquants et des sens
+uniques. Pour chaque taille, le banc mesure la construction du réseau compact,
+la préparation du routage, l'empreinte mémoire, puis chaque type de requête
+sur des paires tirées avec une graine fixe.
+
+Les résultats sont écrits en JSON ; avec --comparer, les opérations dont la
+médiane a augmenté au-delà de la tolérance par rapport à un fichier précédent
+sont signalées (code de sortie 1), pour repérer les régressions entre commits :
+
+    python benchmark.py --tailles 1000,10000 --sortie avant.json
+    python benchmark.py --tailles 1000,10000 --sortie apres.json --comparer avant.json
+
+La préparation des hiérarchies de contraction, en Python pur, croît plus vite
+que la taille du réseau : au-delà de quelques dizaines de milliers de nœuds,
+retirer 'ch' de --algorithmes (la préparation n'est alors pas mesurée) :
+
+    python benchmark.py --tailles 100000,1000000 --algorithmes dijkstra,astar,bidirectionnel
+
+La centralité et les chemins simples ne sont mesurés que jusqu'à une taille
+limite réglable.
+"""
+import argparse
+import datetime
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # Windows : pas de mesure du pic de mémoire
+    resource = None
+
+from cache_routes import CacheRoutes
+from graphe_compact import ConstructeurGraphe
+
+VERSION_FORMAT = 1
+
+CENTRE_KINSHASA = (-4.325, 15.31)
+ESPACEMENT_KM = 0.12
+# Rapport largeur / hauteur de la ville (étirée le long du fleuve)
+ALLONGEMENT = 1.5
+# Déplacement aléatoire des nœuds, en fraction de l'espacement
+DEFORMATION = 0.3
+
+# Part des voies de chaque type (celle des arêtes du réseau de démonstration)
+REPARTITION_TYPES = (('principale', 0.33), ('alternative', 0.42), ('express', 0.25))
+NOMS_VOIES = {'principale': 'Avenue', 'alternative': 'Rue', 'express': 'Boulevard'}
+# Tronçons absents et sens uniques, parmi les routes alternatives seulement
+PART_TRONCONS_ABSENTS = 0.08
+PART_SENS_UNIQUE = 0.1
+# Part des nœuds de type 'depart' et 'arrivee' (les autres sont intermédiaires)
+PART_TERMINUS = 0.05
+
+TAILLES_DEFAUT = (1000, 10000)
+ALGORITHMES_DEFAUT = ('ch', 'dijkstra', 'astar', 'bidirectionnel')
+# Tailles maximales pour les mesures coûteuses
+LIMITE_CENTRALITE = 5000
+LIMITE_CHEMINS_SIMPLES = 10000
+K_CHEMINS_SIMPLES = 10
+# En deçà de cet écart (ms), une hausse de la médiane est considérée comme du bruit
+SEUIL_BRUIT_MS = 0.05
+
+
+# --- GÉNÉRATION ---
+
+def generer_reseau(nombre_noeuds: int, graine: int = 0) -> ConstructeurGraphe:
+    """Réseau synthétique de nombre_noeuds nœuds, identique pour une même graine"""
+    aleatoire = random.Random(graine)
+    colonnes = max(2, int(math.ceil(math.sqrt(nombre_noeuds * ALLONGEMENT))))
+    lignes = int(math.ceil(nombre_noeuds / colonnes))
+    pas_lat = ESPACEMENT_KM / 111.32
+    pas_lon = ESPACEMENT_KM / (111.32 * math.cos(math.radians(CENTRE_KINSHASA[0])))
+    types, poids = zip(*REPARTITION_TYPES)
+    types_lignes = aleatoire.choices(types, poids, k=lignes)
+    types_colonnes = aleatoire.choices(types, poids, k=colonnes)
+
+    constructeur = ConstructeurGraphe()
+    for i in range(nombre_noeuds):
+        ligne, colonne = divmod(i, colonnes)
+        lat = CENTRE_KINSHASA[0] + (ligne - lignes / 2 + aleatoire.uniform(-DEFORMATION, DEFORMATION)) * pas_lat
+        lon = CENTRE_KINSHASA[1] + (colonne - colonnes / 2 + aleatoire.uniform(-DEFORMATION, DEFORMATION)) * pas_lon
+        tirage = aleatoire.random()
+        type_noeud = 'depart' if tirage < PART_TERMINUS else \
+            'arrivee' if tirage < 2 * PART_TERMINUS else 'intermediaire'
+        constructeur.ajouter_noeud(f'N{i}', f'Arrêt {ligne + 1}-{colonne + 1}', lat, lon, type_noeud)
+
+    for i in range(nombre_noeuds):
+        ligne, colonne = divmod(i, colonnes)
+        voisins = []
+        if colonne + 1 < colonnes and i + 1 < nombre_noeuds:
+            voisins.append((i + 1, types_lignes[ligne], ligne))
+        if i + colonnes < nombre_noeuds:
+            voisins.append((i + colonnes, types_colonnes[colonne], colonne))
+        for j, type_route, numero in voisins:
+            nom_route = f'{NOMS_VOIES[type_route]} {numero + 1}'
+            sens = (True, True)
+            if type_route == 'alternative':
+                tirage = aleatoire.random()
+                if tirage < PART_TRONCONS_ABSENTS:
+                    continue
+                if tirage < PART_TRONCONS_ABSENTS + PART_SENS_UNIQUE:
+                    sens = (True, False) if aleatoire.random() < 0.5 else (False, True)
+            if sens[0]:
+                constructeur.ajouter_arete(f'N{i}', f'N{j}', nom_route, type_route)
+            if sens[1]:
+                constructeur.ajouter_arete(f'N{j}', f'N{i}', nom_route, type_route)
+    return constructeur
+
+
+# --- MESURES ---
+
+def _statistiques_durees(durees: List[float]) -> Dict:
+    """Médiane, 95e centile, minimum et moyenne (ms) d'une série de durées (s)"""
+    durees = sorted(durees)
+    n = len(durees)
+    return {
+        'n': n,
+        'median_ms': round(durees[n // 2] * 1000, 4),
+        'p95_ms': round(durees[min(n - 1, int(math.ceil(0.95 * n)) - 1)] * 1000, 4),
+        'min_ms': round(durees[0] * 1000, 4),
+        'moyenne_ms': round(sum(durees) / n * 1000, 4)
+    }
+
+
+def mesurer(appels: Sequence[Callable[[], object]]) -> Dict:
+    """Durée de chaque appel ; 'trouves' compte les résultats non vides"""
+    durees = []
+    trouves = 0
+    for appel in appels:
+        debut = time.perf_counter()
+        resultat = appel()
+        durees.append(time.perf_counter() - debut)
+        trouves += bool(resultat)
+    return {**_statistiques_durees(durees), 'trouves': trouves}
+
+
+def rss_max_mo() -> Optional[float]:
+    """Pic de mémoire résidente du processus (Mo), si la plateforme le fournit"""
+    if resource is None:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux : kilo-octets ; macOS : octets
+    return round(pic / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def mesurer_taille(nombre_noeuds: int, graine: int, nb_requetes: int,
+                   algorithmes: Sequence[str], limite_centralite: int = LIMITE_CENTRALITE,
+                   limite_chemins_simples: int = LIMITE_CHEMINS_SIMPLES) -> Dict:
+    """Mesures de toutes les opérations sur un réseau synthétique de nombre_noeuds nœuds"""
+    from app import TransportSystem
+
+    operations: Dict[str, Dict] = {}
+    debut = time.perf_counter()
+    constructeur = generer_reseau(nombre_noeuds, graine)
+    operations['generation'] = _statistiques_durees([time.perf_counter() - debut])
+
+    # Cache d'itinéraires local seulement, assez grand pour la mesure des lectures en cache
+    systeme = TransportSystem(cache_routes=CacheRoutes(taille_max=4 * nb_requetes * len(algorithmes) + 16))
+    operations['construction'] = mesurer([lambda c=constructeur: systeme.charger_constructeur(c)])
+    del constructeur
+    reseau = systeme.reseau
+    if 'ch' in algorithmes:
+        operations['preparation_routage'] = mesurer([systeme.preparer_routage])
+    operations['index_spatial'] = mesurer([systeme.get_index_spatial])
+
+    aleatoire = random.Random(graine + 1)
+    ids = reseau.ids
+    paires = [(ids[aleatoire.randrange(reseau.nombre_noeuds)], ids[aleatoire.randrange(reseau.nombre_noeuds)])
+              for _ in range(nb_requetes + 1)]
+    echauffement, paires = paires[0], paires[1:]
+
+    for algorithme in algorithmes:
+        # Premier appel hors mesure : coefficients de l'heuristique, poids de recherche
+        systeme.get_shortest_path(*echauffement, 'temps', algorithme)
+        operations[f'plus_court_chemin_{algorithme}'] = mesurer([
+            lambda s=s, e=e: systeme.get_shortest_path(s, e, 'temps', algorithme) for s, e in paires
+        ])
+    if algorithmes:
+        operations['plus_court_chemin_cache'] = mesurer([
+            lambda s=s, e=e: systeme.get_shortest_path(s, e, 'temps', algorithmes[0]) for s, e in paires
+        ])
+
+    if nombre_noeuds <= limite_chemins_simples:
+        operations['chemins_simples'] = mesurer([
+            lambda s=s, e=e: systeme.get_all_simple_paths(s, e, K_CHEMINS_SIMPLES, 'temps')
+            for s, e in paires[:max(1, nb_requetes // 4)]
+        ])
+
+    operations['statistiques_construction'] = mesurer([systeme.get_network_stats])
+    operations['statistiques'] = mesurer([systeme.get_network_stats] * nb_requetes)
+
+    if nombre_noeuds <= limite_centralite:
+        # Comprend la matérialisation du graphe networkx
+        operations['centralites_calcul'] = mesurer([systeme.get_centralites])
+        operations['centralite'] = mesurer([
+            lambda node_id=s: systeme.calculer_centralite(node_id) for s, _ in paires
+        ])
+
+    return {
+        'noeuds': reseau.nombre_noeuds,
+        'aretes': reseau.nombre_aretes,
+        'memoire': {
+            'reseau_octets': reseau.taille_memoire(),
+            'octets_par_arete': round(reseau.taille_memoire() / max(1, reseau.nombre_aretes), 1),
+            'rss_max_mo': rss_max_mo()
+        },
+        'operations': operations
+    }
+
+
+# --- RÉSULTATS ---
+
+def commit_courant() -> Optional[str]:
+    try:
+        sortie = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return sortie.stdout.strip() or None
+
+
+def comparer(actuel: Dict, reference: Dict, tolerance: float) -> List[Dict]:
+    """Opérations (par taille) dont la médiane dépasse tolerance fois celle de la référence"""
+    references = {taille['noeuds']: taille['operations'] for taille in reference.get('tailles', [])}
+    regressions = []
+    for taille in actuel['tailles']:
+        anciennes = references.get(taille['noeuds'], {})
+        for nom, mesure in taille['operations'].items():
+            ancienne = anciennes.get(nom)
+            if ancienne is None:
+                continue
+            avant, apres = ancienne['median_ms'], mesure['median_ms']
+            if apres > avant * tolerance and apres - avant > SEUIL_BRUIT_MS:
+                regressions.append({'noeuds': taille['noeuds'], 'operation': nom, 'avant_ms': avant,
+                                    'apres_ms': apres, 'rapport': round(apres / avant, 2) if avant else None})
+    return regressions
+
+
+def afficher(taille: Dict):
+    memoire = taille['memoire']
+    print(f"\n{taille['noeuds']} nœuds, {taille['aretes']} arêtes — réseau {memoire['reseau_octets'] / 1e6:.1f} Mo "
+          f"({memoire['octets_par_arete']} o/arête), pic RSS {memoire['rss_max_mo']} Mo")
+    for nom, mesure in taille['operations'].items():
+        print(f"  {nom:<32} médiane {mesure['median_ms']:>11.3f} ms   p95 {mesure['p95_ms']:>11.3f} ms   "
+              f"n={mesure['n']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai des algorithmes sur des réseaux synthétiques")
+    parser.add_argument('--tailles', default=','.join(map(str, TAILLES_DEFAUT)),
+                        help="Nombres de nœuds, séparés par des virgules (jusqu'à 1000000)")
+    parser.add_argument('--requetes', type=int, default=20, help="Requêtes mesurées par opération")
+    parser.add_argument('--graine', type=int, default=0, help="Graine du générateur et des paires")
+    parser.add_argument('--algorithmes', default=','.join(ALGORITHMES_DEFAUT),
+                        help="Algorithmes de plus court chemin mesurés")
+    parser.add_argument('--limite-centralite', type=int, default=LIMITE_CENTRALITE)
+    parser.add_argument('--limite-chemins-simples', type=int, default=LIMITE_CHEMINS_SIMPLES)
+    parser.add_argument('--sortie', help="Fichier JSON des résultats")
+    parser.add_argument('--comparer', help="Résultats de référence (JSON) à comparer")
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help="Rapport de médianes au-delà duquel une opération est signalée")
+    args = parser.parse_args()
+
+    from app import TransportSystem
+    algorithmes = [a for a in args.algorithmes.split(',') if a]
+    inconnus = set(algorithmes) - set(TransportSystem.ALGORITHMES)
+    if inconnus:
+        parser.error(f"Algorithmes inconnus : {', '.join(sorted(inconnus))}")
+    tailles = [int(t) for t in args.tailles.split(',') if t]
+    if args.requetes < 1 or any(t < 2 for t in tailles):
+        parser.error("Au moins une requête et deux nœuds par réseau")
+
+    resultats = {
+        'version': VERSION_FORMAT,
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_courant(),
+        'python': platform.python_version(),
+        'plateforme': platform.platform(),
+        'graine': args.graine,
+        'requetes': args.requetes,
+        'tailles': []
+    }
+    for nombre_noeuds in tailles:
+        taille = mesurer_taille(nombre_noeuds, args.graine, args.requetes, algorithmes,
+                                args.limite_centralite, args.limite_chemins_simples)
+        resultats['tailles'].append(taille)
+        afficher(taille)
+
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump(resultats, f, ensure_ascii=False, indent=2)
+        print(f"\nRésultats écrits dans {args.sortie}")
+
+    if args.comparer:
+        with open(args.comparer, encoding='utf-8') as f:
+            reference = json.load(f)
+        regressions = comparer(resultats, reference, args.tolerance)
+        print(f"\nComparaison avec {args.comparer} (commit {reference.get('commit')}) : "
+              f"{len(regressions)} régression(s)")
+        for r in regressions:
+            print(f"  {r['noeuds']} nœuds, {r['operation']} : {r['avant_ms']} -> {r['apres_ms']} ms (x{r['rapport']})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
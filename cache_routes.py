@@ -0,0 +1,184 @@
+"""
+Cache des résultats d'itinéraires.
+
+Les clés incluent la version du graphe : après une modification, les anciennes
+entrées ne sont plus jamais lues, et le cache local est vidé dès qu'une
+nouvelle version est demandée. Le cache local (LRU borné, propre au
+processus) peut s'appuyer sur un second niveau partagé entre les workers
+gunicorn, par exemple Redis ; ce dernier n'a de sens que si tous les workers
+servent le même réseau (même snapshot ou même fichier, sans modification
+locale), puisque chaque worker numérote ses versions indépendamment : dès
+qu'un worker modifie son réseau (trafic, profils), il cesse de lire et
+d'écrire dans le cache partagé.
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+# Nombre d'itinéraires conservés par défaut dans le cache local
+TAILLE_CACHE_DEFAUT = 1024
+
+
+class CacheLRU:
+    """Cache en mémoire de taille bornée, avec éviction du moins récemment utilisé"""
+
+    def __init__(self, taille_max: int = TAILLE_CACHE_DEFAUT):
+        self.taille_max = taille_max
+        self._entrees: OrderedDict = OrderedDict()
+        self._verrou = threading.Lock()
+        self.evictions = 0
+
+    def lire(self, cle: Hashable):
+        """Valeur associée à la clé (marquée comme récemment utilisée), ou None"""
+        with self._verrou:
+            valeur = self._entrees.get(cle)
+            if valeur is not None:
+                self._entrees.move_to_end(cle)
+            return valeur
+
+    def ecrire(self, cle: Hashable, valeur):
+        with self._verrou:
+            self._entrees[cle] = valeur
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+                self.evictions += 1
+
+    def retirer(self, cle: Hashable):
+        """Retire l'entrée et retourne sa valeur (None si absente)"""
+        with self._verrou:
+            return self._entrees.pop(cle, None)
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+
+    def recle(self, transformer: Callable[[Hashable, object], Optional[Hashable]]) -> int:
+        """
+        Remplace la clé de chaque entrée par transformer(cle, valeur), ou supprime
+        l'entrée si le résultat est None (ordre LRU conservé). Retourne le nombre
+        d'entrées conservées.
+        """
+        with self._verrou:
+            entrees = OrderedDict()
+            for cle, valeur in self._entrees.items():
+                nouvelle = transformer(cle, valeur)
+                if nouvelle is not None:
+                    entrees[nouvelle] = valeur
+            self._entrees = entrees
+            return len(entrees)
+
+    def __len__(self) -> int:
+        return len(self._entrees)
+
+
+class CacheRedis:
+    """Cache partagé entre processus, stocké dans Redis (valeurs sérialisées en JSON)"""
+
+    def __init__(self, url: str, prefixe: str = 'transport:route:', duree_vie: Optional[int] = 3600):
+        import redis  # dépendance optionnelle, seulement pour le cache partagé
+        self.client = redis.Redis.from_url(url)
+        self.prefixe = prefixe
+        self.duree_vie = duree_vie
+
+    def _cle(self, cle: Tuple) -> str:
+        return self.prefixe + json.dumps(cle, separators=(',', ':'))
+
+    def lire(self, cle: Tuple):
+        donnees = self.client.get(self._cle(cle))
+        return json.loads(donnees) if donnees is not None else None
+
+    def ecrire(self, cle: Tuple, valeur):
+        self.client.set(self._cle(cle), json.dumps(valeur, separators=(',', ':')), ex=self.duree_vie)
+
+    def vider(self):
+        """Les entrées partagées expirent d'elles-mêmes (et leur clé contient la version)"""
+
+
+class CacheRoutes:
+    """Cache d'itinéraires à deux niveaux (local LRU, puis partagé optionnel) avec compteurs"""
+
+    def __init__(self, taille_max: int = TAILLE_CACHE_DEFAUT, partage=None):
+        """partage : second niveau optionnel exposant lire(cle) / ecrire(cle, valeur)"""
+        self.local = CacheLRU(taille_max)
+        self.partage = partage
+        # Faux dès que le réseau local diverge de celui des autres workers
+        self.partage_actif = partage is not None
+        self.version: Optional[int] = None
+        self.succes = 0
+        self.succes_partages = 0
+        self.echecs = 0
+        self.erreurs_partage = 0
+
+    def lire(self, version: int, cle: Tuple):
+        """Résultat mis en cache pour (cle, version), ou None"""
+        if self.version is None or version > self.version:
+            # Nouvelle version du graphe : les entrées locales sont périmées
+            self.local.vider()
+            self.version = version
+        elif version < self.version:
+            return None
+        cle = (*cle, version)
+        valeur = self.local.lire(cle)
+        if valeur is not None:
+            self.succes += 1
+            return valeur
+        if self.partage_actif:
+            try:
+                valeur = self.partage.lire(cle)
+            except Exception:  # un cache partagé indisponible ne doit pas bloquer le routage
+                self.erreurs_partage += 1
+            if valeur is not None:
+                self.succes_partages += 1
+                self.local.ecrire(cle, valeur)
+                return valeur
+        self.echecs += 1
+        return None
+
+    def ecrire(self, version: int, cle: Tuple, valeur):
+        if version != self.version:
+            return
+        cle = (*cle, version)
+        self.local.ecrire(cle, valeur)
+        if self.partage_actif:
+            try:
+                self.partage.ecrire(cle, valeur)
+            except Exception:
+                self.erreurs_partage += 1
+
+    def desactiver_partage(self):
+        """Cesse d'utiliser le cache partagé (réseau modifié localement, versions propres au worker)"""
+        self.partage_actif = False
+
+    def migrer(self, version: int, nouvelle_version: int, encore_valide: Callable[[Tuple, Dict], bool]) -> int:
+        """
+        Reporte sur nouvelle_version les entrées locales de version qui restent
+        valides (encore_valide(cle, valeur)), et oublie les autres. Retourne le
+        nombre d'entrées conservées.
+        """
+        def transformer(cle, valeur):
+            if cle[-1] == version and encore_valide(cle[:-1], valeur):
+                return (*cle[:-1], nouvelle_version)
+            return None
+        if self.version != version:
+            self.local.vider()
+            self.version = nouvelle_version
+            return 0
+        self.version = nouvelle_version
+        return self.local.recle(transformer)
+
+    def statistiques(self) -> Dict:
+        total = self.succes + self.succes_partages + self.echecs
+        return {
+            'taille': len(self.local),
+            'taille_max': self.local.taille_max,
+            'succes': self.succes,
+            'succes_partages': self.succes_partages,
+            'echecs': self.echecs,
+            'evictions': self.local.evictions,
+            'erreurs_partage': self.erreurs_partage,
+            'taux_succes': round((self.succes + self.succes_partages) / total, 3) if total else 0.0,
+            'partage': type(self.partage).__name__ if self.partage is not None else None,
+            'partage_actif': self.partage_actif
+        }
@@ -0,0 +1,101 @@
+"""
+Format compact des itinéraires, pour les clients mobiles.
+
+Le format complet répète chaque coordonnée (dans steps[i].coordinates et dans
+path_coords) et chaque nom de nœud (path, from, to). Le format compact
+transmet la géométrie une seule fois, sous forme de polyligne encodée
+(algorithme de Google, compris par les greffons Leaflet et la plupart des SDK
+cartographiques), les nœuds dans une table (le chemin est la suite de ses
+entrées) et les étapes comme des tableaux positionnels renvoyant aux tables.
+"""
+from typing import Dict, List, Sequence, Tuple
+
+# Décimales conservées par la polyligne (5 : environ 1 m)
+PRECISION_POLYLIGNE = 5
+
+# Colonnes des tableaux d'étapes
+COLONNES_ETAPES = ['route', 'distance', 'time', 'vitesse_moyenne']
+
+# Clés de l'itinéraire complet reprises telles quelles
+CLES_CONSERVEES = ('critere', 'total_distance', 'total_time', 'vitesse_moyenne', 'nombre_etapes',
+                   'efficacite', 'heure_depart', 'heure_arrivee', 'algorithme', 'noeuds_explores',
+                   'accrochage')
+
+
+def _encoder_valeur(valeur: int, morceaux: List[str]):
+    valeur = ~(valeur << 1) if valeur < 0 else valeur << 1
+    while valeur >= 0x20:
+        morceaux.append(chr((0x20 | (valeur & 0x1f)) + 63))
+        valeur >>= 5
+    morceaux.append(chr(valeur + 63))
+
+
+def encoder_polyligne(points: Sequence[Tuple[float, float]], precision: int = PRECISION_POLYLIGNE) -> str:
+    """Polyligne encodée de points (lat, lon) : écarts successifs arrondis, en base 64 décalée"""
+    facteur = 10 ** precision
+    morceaux: List[str] = []
+    lat_precedente = lon_precedente = 0
+    for lat, lon in points:
+        lat_entiere, lon_entiere = round(lat * facteur), round(lon * facteur)
+        _encoder_valeur(lat_entiere - lat_precedente, morceaux)
+        _encoder_valeur(lon_entiere - lon_precedente, morceaux)
+        lat_precedente, lon_precedente = lat_entiere, lon_entiere
+    return ''.join(morceaux)
+
+
+def decoder_polyligne(texte: str, precision: int = PRECISION_POLYLIGNE) -> List[Tuple[float, float]]:
+    """Inverse de encoder_polyligne"""
+    facteur = 10 ** precision
+    points = []
+    position = lat = lon = 0
+    while position < len(texte):
+        deltas = []
+        for _ in range(2):
+            resultat = decalage = 0
+            while True:
+                octet = ord(texte[position]) - 63
+                position += 1
+                resultat |= (octet & 0x1f) << decalage
+                decalage += 5
+                if octet < 0x20:
+                    break
+            deltas.append(~(resultat >> 1) if resultat & 1 else resultat >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        points.append((lat / facteur, lon / facteur))
+    return points
+
+
+def compacter_itineraire(itineraire: Dict) -> Dict:
+    """Version compacte d'un itinéraire complet (voir get_shortest_path)"""
+    steps = itineraire['steps']
+    if steps:
+        points = [(lat, lon) for lon, lat in [steps[0]['coordinates']['start']] +
+                  [step['coordinates']['end'] for step in steps]]
+    else:
+        points = []
+    noeuds = [[node_id, nom] for node_id, nom in zip(itineraire['path_ids'], itineraire['path'])]
+
+    routes: List[List[str]] = []
+    index_routes: Dict[Tuple[str, str], int] = {}
+    etapes = []
+    for step in steps:
+        cle = (step['route'], step['type_route'])
+        if cle not in index_routes:
+            index_routes[cle] = len(routes)
+            routes.append(list(cle))
+        etapes.append([index_routes[cle], step['distance'], step['time'], step['vitesse_moyenne']])
+
+    compact = {cle: itineraire[cle] for cle in CLES_CONSERVEES if cle in itineraire}
+    compact.update({
+        'format': 'compact',
+        'noeuds': noeuds,
+        'polyline': encoder_polyligne(points),
+        'precision': PRECISION_POLYLIGNE,
+        'routes': routes,
+        'colonnes_etapes': COLONNES_ETAPES,
+        'etapes': etapes
+    })
+    if steps and 'heure' in steps[0]:
+        compact['heures'] = [step['heure'] for step in steps]
+    return compact
@@ -0,0 +1,513 @@
+"""
+Représentation compacte du réseau de transport et chargement depuis des fichiers.
+
+Le graphe est stocké au format CSR (Compressed Sparse Row) : les arêtes
+sortantes du nœud u occupent les positions offsets[u] .. offsets[u+1]-1 des
+tableaux d'arêtes. Coordonnées, poids et références sont des tableaux typés
+(module array) ; les noms, types et descriptions sont des indices dans une
+table de chaînes internées. Un réseau de plusieurs centaines de milliers de
+nœuds tient ainsi en quelques dizaines d'octets par arête, contre plusieurs
+centaines pour les dictionnaires d'attributs de networkx.
+
+Formats pris en charge :
+  - GeoJSON : points (arrêts) et LineString (routes) ;
+  - CSV : répertoire contenant noeuds.csv et aretes.csv ;
+  - OSM XML : extrait OpenStreetMap (nœuds et voies 'highway').
+"""
+import csv
+import json
+import math
+import os
+import xml.etree.ElementTree as ET
+from array import array
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Classement des voies OpenStreetMap dans les types de route du réseau
+TYPES_ROUTE_OSM = {
+    'motorway': 'express', 'motorway_link': 'express',
+    'trunk': 'express', 'trunk_link': 'express',
+    'primary': 'principale', 'primary_link': 'principale',
+    'secondary': 'principale', 'secondary_link': 'principale',
+    'tertiary': 'alternative', 'tertiary_link': 'alternative',
+    'unclassified': 'alternative', 'residential': 'alternative',
+    'living_street': 'alternative', 'service': 'alternative',
+}
+
+VALEURS_VRAIES = ('yes', 'true', '1', 'oui')
+
+# Fonction de calcul des poids : (lat1, lon1, lat2, lon2, types_route) -> (distances, temps, vitesses)
+CalculPoids = Callable[[Sequence[float], Sequence[float], Sequence[float], Sequence[float], Sequence[str]],
+                       Tuple[Sequence[float], Sequence[float], Sequence[int]]]
+
+
+class GrapheCompact:
+    """Graphe orienté au format CSR, avec tables de chaînes internées"""
+
+    def __init__(self, ids: List[str], lat: array, lon: array,
+                 noms: array, types: array, descriptions: array,
+                 offsets: array, cibles: array, poids: Dict[str, array],
+                 noms_routes: array, types_routes: array, vitesses: array,
+                 chaines: List[str]):
+        self.ids = ids
+        self.index = {node_id: i for i, node_id in enumerate(ids)}
+        # Attributs des nœuds
+        self.lat = lat
+        self.lon = lon
+        self.noms = noms
+        self.types = types
+        self.descriptions = descriptions
+        # Adjacence sortante et attributs des arêtes (ordre CSR)
+        self.offsets = offsets
+        self.cibles = cibles
+        self.poids = poids
+        self.noms_routes = noms_routes
+        self.types_routes = types_routes
+        self.vitesses = vitesses
+        self.chaines = chaines
+        self._construire_adjacence_inverse()
+
+    def __reduce__(self):
+        """
+        Sérialisation (pool de processus) : un réseau projeté depuis un snapshot
+        est rouvert à partir du fichier par le processus qui le reçoit, au lieu
+        d'être recopié.
+        """
+        chemin = getattr(self, 'fichier_snapshot', None)
+        if chemin is not None:
+            if not getattr(self, 'poids_modifies', False):
+                return _rouvrir_snapshot, (chemin,)
+            # Poids modifiés depuis l'ouverture (trafic) : seuls ceux-ci sont recopiés
+            return _rouvrir_snapshot, (chemin, {critere: array('d', poids) for critere, poids in self.poids.items()},
+                                       array('H', self.vitesses))
+        return GrapheCompact.__new__, (GrapheCompact,), self.__dict__
+
+    def _construire_adjacence_inverse(self):
+        """Construit l'adjacence entrante (CSR inverse) : identifiants des arêtes triées par cible"""
+        n = self.nombre_noeuds
+        m = self.nombre_aretes
+        self.sources = array('I', bytes(4 * m))
+        for u in range(n):
+            for e in range(self.offsets[u], self.offsets[u + 1]):
+                self.sources[e] = u
+
+        compteurs = array('I', bytes(4 * (n + 1)))
+        for v in self.cibles:
+            compteurs[v + 1] += 1
+        for i in range(n):
+            compteurs[i + 1] += compteurs[i]
+        self.offsets_entrants = array('I', compteurs)
+        self.aretes_entrantes = array('I', bytes(4 * m))
+        position = array('I', compteurs[:n])
+        for e in range(m):
+            v = self.cibles[e]
+            self.aretes_entrantes[position[v]] = e
+            position[v] += 1
+
+    # --- CONSTRUCTION ---
+
+    @classmethod
+    def depuis_networkx(cls, G) -> 'GrapheCompact':
+        """Construit la représentation compacte à partir d'un DiGraph networkx du réseau"""
+        constructeur = ConstructeurGraphe()
+        for node_id, data in G.nodes(data=True):
+            constructeur.ajouter_noeud(node_id, data.get('nom', node_id), data['lat'], data['lon'],
+                                       data.get('type', 'intermediaire'), data.get('description', ''))
+        for dep, arr, data in G.edges(data=True):
+            constructeur.ajouter_arete(dep, arr, data.get('nom_route', ''), data.get('type_route', ''),
+                                       data['distance'], data['temps'], data.get('vitesse_moyenne'))
+        return constructeur.construire()
+
+    def vers_networkx(self):
+        """Matérialise le réseau sous forme de DiGraph networkx (attributs complets)"""
+        import networkx as nx
+        G = nx.DiGraph()
+        for i, node_id in enumerate(self.ids):
+            G.add_node(node_id, nom=self.nom(i), lat=self.lat[i], lon=self.lon[i],
+                       type=self.type_noeud(i), description=self.description(i))
+        for u in range(self.nombre_noeuds):
+            for e in range(self.offsets[u], self.offsets[u + 1]):
+                dep, arr = self.ids[u], self.ids[self.cibles[e]]
+                # Arêtes parallèles : le DiGraph ne conserve que la plus rapide
+                if G.has_edge(dep, arr) and G[dep][arr]['temps'] <= self.poids['temps'][e]:
+                    continue
+                G.add_edge(dep, arr, distance=self.poids['distance'][e], temps=self.poids['temps'][e],
+                           nom_route=self.nom_route(e), type_route=self.type_route(e),
+                           vitesse_moyenne=self.vitesses[e])
+        return G
+
+    # --- ACCÈS ---
+
+    @property
+    def nombre_noeuds(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nombre_aretes(self) -> int:
+        return len(self.cibles)
+
+    def nom(self, i: int) -> str:
+        return self.chaines[self.noms[i]]
+
+    def type_noeud(self, i: int) -> str:
+        return self.chaines[self.types[i]]
+
+    def description(self, i: int) -> str:
+        return self.chaines[self.descriptions[i]]
+
+    def nom_route(self, e: int) -> str:
+        return self.chaines[self.noms_routes[e]]
+
+    def type_route(self, e: int) -> str:
+        return self.chaines[self.types_routes[e]]
+
+    def successeurs(self, u: int, critere: str):
+        """Itère sur les couples (voisin, poids) des arêtes sortantes de u"""
+        poids = self.poids[critere]
+        for e in range(self.offsets[u], self.offsets[u + 1]):
+            yield self.cibles[e], poids[e]
+
+    def predecesseurs(self, v: int, critere: str):
+        """Itère sur les couples (voisin, poids) des arêtes entrantes de v"""
+        poids = self.poids[critere]
+        for k in range(self.offsets_entrants[v], self.offsets_entrants[v + 1]):
+            e = self.aretes_entrantes[k]
+            yield self.sources[e], poids[e]
+
+    def arete(self, u: int, v: int, critere: str = 'temps') -> Optional[int]:
+        """Identifiant de l'arête u -> v de poids minimal selon le critère, ou None"""
+        poids = self.poids[critere]
+        meilleure = None
+        for e in range(self.offsets[u], self.offsets[u + 1]):
+            if self.cibles[e] == v and (meilleure is None or poids[e] < poids[meilleure]):
+                meilleure = e
+        return meilleure
+
+    def poids_arc(self, u: int, v: int, critere: str) -> float:
+        """Poids minimal d'une arête u -> v"""
+        return self.poids[critere][self.arete(u, v, critere)]
+
+    def cout_chemin(self, chemin: List[int], critere: str) -> float:
+        """Coût total d'un chemin selon le critère"""
+        return sum(self.poids_arc(chemin[i], chemin[i + 1], critere) for i in range(len(chemin) - 1))
+
+    def est_faiblement_connexe(self) -> bool:
+        """Vrai si le graphe, sans tenir compte du sens des arêtes, est connexe"""
+        n = self.nombre_noeuds
+        if n == 0:
+            return False
+        vus = bytearray(n)
+        vus[0] = 1
+        pile = [0]
+        nb_vus = 1
+        while pile:
+            u = pile.pop()
+            voisins = [self.cibles[e] for e in range(self.offsets[u], self.offsets[u + 1])]
+            voisins += [self.sources[self.aretes_entrantes[k]]
+                        for k in range(self.offsets_entrants[u], self.offsets_entrants[u + 1])]
+            for v in voisins:
+                if not vus[v]:
+                    vus[v] = 1
+                    nb_vus += 1
+                    pile.append(v)
+        return nb_vus == n
+
+    def avec_poids(self, poids: Dict[str, Sequence[float]], vitesses=None) -> 'GrapheCompact':
+        """
+        Nouveau graphe de même topologie avec d'autres poids (et vitesses) d'arêtes.
+        Tous les autres tableaux sont partagés : le graphe d'origine reste
+        inchangé, et les deux peuvent être utilisés simultanément.
+        """
+        graphe = GrapheCompact.__new__(GrapheCompact)
+        graphe.__dict__.update(self.__dict__)
+        graphe.poids = poids
+        if vitesses is not None:
+            graphe.vitesses = vitesses
+        graphe.poids_modifies = True
+        return graphe
+
+    def aretes_entre(self, u: int, v: int) -> List[int]:
+        """Toutes les arêtes u -> v (arêtes parallèles comprises)"""
+        return [e for e in range(self.offsets[u], self.offsets[u + 1]) if self.cibles[e] == v]
+
+    def taille_memoire(self) -> int:
+        """Taille approximative (en octets) des tableaux du graphe"""
+        tableaux = [self.lat, self.lon, self.noms, self.types, self.descriptions, self.offsets,
+                    self.cibles, self.noms_routes, self.types_routes, self.vitesses, self.sources,
+                    self.offsets_entrants, self.aretes_entrantes, *self.poids.values()]
+        return sum(t.itemsize * len(t) for t in tableaux)
+
+
+class ConstructeurGraphe:
+    """Accumule nœuds et arêtes (avec internement des chaînes) puis produit un GrapheCompact"""
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.lat = array('d')
+        self.lon = array('d')
+        self.noms = array('I')
+        self.types = array('I')
+        self.descriptions = array('I')
+        self.chaines: List[str] = []
+        self._chaines_index: Dict[str, int] = {}
+        self.sources = array('I')
+        self.cibles = array('I')
+        self.noms_routes = array('I')
+        self.types_routes = array('I')
+        # Poids fournis par le fichier (NaN si à calculer)
+        self.distances = array('d')
+        self.temps = array('d')
+        self.vitesses = array('H')
+
+    def interner(self, chaine: str) -> int:
+        """Retourne l'indice de la chaîne dans la table, en l'ajoutant si nécessaire"""
+        indice = self._chaines_index.get(chaine)
+        if indice is None:
+            indice = len(self.chaines)
+            self.chaines.append(chaine)
+            self._chaines_index[chaine] = indice
+        return indice
+
+    def ajouter_noeud(self, node_id: str, nom: str, lat: float, lon: float,
+                      type: str = 'intermediaire', description: str = '') -> int:
+        """Ajoute un nœud (s'il n'existe pas déjà) et retourne son indice"""
+        i = self.index.get(node_id)
+        if i is not None:
+            return i
+        i = len(self.ids)
+        self.ids.append(node_id)
+        self.index[node_id] = i
+        self.lat.append(float(lat))
+        self.lon.append(float(lon))
+        self.noms.append(self.interner(nom or node_id))
+        self.types.append(self.interner(type or 'intermediaire'))
+        self.descriptions.append(self.interner(description or ''))
+        return i
+
+    def ajouter_arete(self, dep: str, arr: str, nom_route: str, type_route: str,
+                      distance: Optional[float] = None, temps: Optional[float] = None,
+                      vitesse: Optional[int] = None):
+        """Ajoute une arête orientée entre deux nœuds existants"""
+        for node_id in (dep, arr):
+            if node_id not in self.index:
+                raise ValueError(f"Arête {dep} -> {arr} : arrêt inconnu '{node_id}'")
+        self.sources.append(self.index[dep])
+        self.cibles.append(self.index[arr])
+        self.noms_routes.append(self.interner(nom_route or ''))
+        self.types_routes.append(self.interner(type_route or 'alternative'))
+        self.distances.append(math.nan if distance is None else float(distance))
+        self.temps.append(math.nan if temps is None else float(temps))
+        self.vitesses.append(vitesse or 0)
+
+    def construire(self, calculer_poids: Optional[CalculPoids] = None) -> 'GrapheCompact':
+        """
+        Trie les arêtes par origine (tri par dénombrement) et produit le GrapheCompact.
+
+        Les distances, temps et vitesses absents du fichier sont calculés par
+        calculer_poids, en un seul appel sur l'ensemble des arêtes concernées.
+        """
+        n = len(self.ids)
+        m = len(self.sources)
+
+        manquantes = [e for e in range(m)
+                      if math.isnan(self.distances[e]) or math.isnan(self.temps[e]) or not self.vitesses[e]]
+        if manquantes:
+            if calculer_poids is None:
+                raise ValueError("Poids manquants et aucune fonction de calcul fournie")
+            lat, lon = self.lat, self.lon
+            distances, temps, vitesses = calculer_poids(
+                [lat[self.sources[e]] for e in manquantes], [lon[self.sources[e]] for e in manquantes],
+                [lat[self.cibles[e]] for e in manquantes], [lon[self.cibles[e]] for e in manquantes],
+                [self.chaines[self.types_routes[e]] for e in manquantes]
+            )
+            for k, e in enumerate(manquantes):
+                if math.isnan(self.distances[e]):
+                    self.distances[e] = distances[k]
+                if math.isnan(self.temps[e]):
+                    self.temps[e] = temps[k]
+                if not self.vitesses[e]:
+                    self.vitesses[e] = int(vitesses[k])
+
+        offsets = array('I', bytes(4 * (n + 1)))
+        for u in self.sources:
+            offsets[u + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+
+        position = array('I', offsets[:n])
+        cibles = array('I', bytes(4 * m))
+        distances = array('d', bytes(8 * m))
+        temps = array('d', bytes(8 * m))
+        noms_routes = array('I', bytes(4 * m))
+        types_routes = array('I', bytes(4 * m))
+        vitesses = array('H', bytes(2 * m))
+        for e in range(m):
+            u = self.sources[e]
+            k = position[u]
+            position[u] += 1
+            cibles[k] = self.cibles[e]
+            distances[k] = self.distances[e]
+            temps[k] = self.temps[e]
+            noms_routes[k] = self.noms_routes[e]
+            types_routes[k] = self.types_routes[e]
+            vitesses[k] = self.vitesses[e]
+
+        return GrapheCompact(
+            self.ids, self.lat, self.lon, self.noms, self.types, self.descriptions,
+            offsets, cibles, {'distance': distances, 'temps': temps},
+            noms_routes, types_routes, vitesses, self.chaines
+        )
+
+
+def _rouvrir_snapshot(chemin: str, poids: Optional[Dict[str, array]] = None,
+                      vitesses: Optional[array] = None) -> GrapheCompact:
+    """Réseau d'un snapshot binaire, éventuellement avec d'autres poids (import local : snapshot dépend de ce module)"""
+    from snapshot import ouvrir_snapshot
+    reseau = ouvrir_snapshot(chemin)[0]
+    return reseau if poids is None else reseau.avec_poids(poids, vitesses)
+
+
+# --- CHARGEMENT DE FICHIERS ---
+
+def _est_vrai(valeur) -> bool:
+    return valeur is True or str(valeur).strip().lower() in VALEURS_VRAIES
+
+
+def _nombre_ou_none(valeur) -> Optional[float]:
+    if valeur is None or valeur == '':
+        return None
+    return float(valeur)
+
+
+def charger_geojson(chemin: str) -> ConstructeurGraphe:
+    """
+    Charge un réseau GeoJSON.
+
+    Les Point sont des arrêts (propriétés id, nom, type, description). Les
+    LineString / MultiLineString sont des routes (nom_route, type_route ou
+    highway, oneway) : avec des propriétés 'from'/'to', la route relie ces deux
+    arrêts dans ce sens ; sinon chaque segment de la géométrie devient une
+    arête, les sommets étant fusionnés par coordonnées.
+    """
+    with open(chemin, encoding='utf-8') as f:
+        donnees = json.load(f)
+
+    constructeur = ConstructeurGraphe()
+    features = donnees.get('features', [])
+    routes = []
+    for feature in features:
+        geometrie = feature.get('geometry') or {}
+        proprietes = feature.get('properties') or {}
+        if geometrie.get('type') == 'Point':
+            lon, lat = geometrie['coordinates'][:2]
+            node_id = str(proprietes.get('id', feature.get('id', f"{lat:.7f},{lon:.7f}")))
+            constructeur.ajouter_noeud(node_id, proprietes.get('nom', proprietes.get('name', node_id)), lat, lon,
+                                       proprietes.get('type', 'intermediaire'), proprietes.get('description', ''))
+        elif geometrie.get('type') in ('LineString', 'MultiLineString'):
+            routes.append((geometrie, proprietes))
+
+    # Les routes sont traitées après les arrêts pour pouvoir référencer leurs identifiants
+    for geometrie, proprietes in routes:
+        nom_route = proprietes.get('nom_route', proprietes.get('name', ''))
+        type_route = proprietes.get('type_route') or TYPES_ROUTE_OSM.get(proprietes.get('highway'), 'alternative')
+        if 'from' in proprietes and 'to' in proprietes:
+            constructeur.ajouter_arete(str(proprietes['from']), str(proprietes['to']), nom_route, type_route,
+                                       _nombre_ou_none(proprietes.get('distance')),
+                                       _nombre_ou_none(proprietes.get('temps')))
+            if 'oneway' in proprietes and not _est_vrai(proprietes['oneway']):
+                constructeur.ajouter_arete(str(proprietes['to']), str(proprietes['from']), nom_route, type_route,
+                                           _nombre_ou_none(proprietes.get('distance')),
+                                           _nombre_ou_none(proprietes.get('temps')))
+            continue
+
+        sens_unique = _est_vrai(proprietes.get('oneway', False))
+        lignes = geometrie['coordinates'] if geometrie['type'] == 'MultiLineString' else [geometrie['coordinates']]
+        for ligne in lignes:
+            sommets = []
+            for lon, lat, *_ in ligne:
+                node_id = f"{lat:.7f},{lon:.7f}"
+                constructeur.ajouter_noeud(node_id, node_id, lat, lon)
+                sommets.append(node_id)
+            for dep, arr in zip(sommets, sommets[1:]):
+                if dep == arr:
+                    continue
+                constructeur.ajouter_arete(dep, arr, nom_route, type_route)
+                if not sens_unique:
+                    constructeur.ajouter_arete(arr, dep, nom_route, type_route)
+    return constructeur
+
+
+def charger_csv(chemin_noeuds: str, chemin_aretes: str) -> ConstructeurGraphe:
+    """
+    Charge un réseau depuis deux fichiers CSV avec en-têtes :
+      - nœuds : id, nom, lat, lon[, type, description]
+      - arêtes : from, to[, nom_route, type_route, distance, temps]
+    """
+    constructeur = ConstructeurGraphe()
+    with open(chemin_noeuds, encoding='utf-8', newline='') as f:
+        for ligne in csv.DictReader(f):
+            constructeur.ajouter_noeud(ligne['id'], ligne.get('nom') or ligne['id'],
+                                       float(ligne['lat']), float(ligne['lon']),
+                                       ligne.get('type') or 'intermediaire', ligne.get('description') or '')
+    with open(chemin_aretes, encoding='utf-8', newline='') as f:
+        for ligne in csv.DictReader(f):
+            constructeur.ajouter_arete(ligne['from'], ligne['to'], ligne.get('nom_route') or '',
+                                       ligne.get('type_route') or 'alternative',
+                                       _nombre_ou_none(ligne.get('distance')),
+                                       _nombre_ou_none(ligne.get('temps')))
+    return constructeur
+
+
+def charger_osm(chemin: str) -> ConstructeurGraphe:
+    """
+    Charge un extrait OpenStreetMap (XML) en flux : seules les voies 'highway'
+    reconnues sont conservées, et seuls les nœuds qu'elles utilisent.
+    """
+    coordonnees: Dict[str, Tuple[float, float]] = {}
+    noms_noeuds: Dict[str, str] = {}
+    voies = []
+
+    for _, element in ET.iterparse(chemin, events=('end',)):
+        if element.tag == 'node':
+            node_id = element.get('id')
+            coordonnees[node_id] = (float(element.get('lat')), float(element.get('lon')))
+            for tag in element.iter('tag'):
+                if tag.get('k') == 'name':
+                    noms_noeuds[node_id] = tag.get('v')
+            element.clear()
+        elif element.tag == 'way':
+            tags = {tag.get('k'): tag.get('v') for tag in element.iter('tag')}
+            type_route = TYPES_ROUTE_OSM.get(tags.get('highway'))
+            if type_route is not None:
+                refs = [nd.get('ref') for nd in element.iter('nd')]
+                sens_unique = _est_vrai(tags.get('oneway', 'no')) or tags.get('junction') == 'roundabout'
+                voies.append((refs, tags.get('name', ''), type_route, sens_unique, tags.get('oneway') == '-1'))
+            element.clear()
+
+    constructeur = ConstructeurGraphe()
+    for refs, nom_route, type_route, sens_unique, inverse in voies:
+        refs = [ref for ref in refs if ref in coordonnees]
+        if inverse:
+            refs.reverse()
+        for ref in refs:
+            lat, lon = coordonnees[ref]
+            constructeur.ajouter_noeud(f"OSM_{ref}", noms_noeuds.get(ref, f"OSM_{ref}"), lat, lon)
+        for dep, arr in zip(refs, refs[1:]):
+            if dep == arr:
+                continue
+            constructeur.ajouter_arete(f"OSM_{dep}", f"OSM_{arr}", nom_route, type_route)
+            if not sens_unique and not inverse:
+                constructeur.ajouter_arete(f"OSM_{arr}", f"OSM_{dep}", nom_route, type_route)
+    return constructeur
+
+
+def charger_fichier(chemin: str) -> ConstructeurGraphe:
+    """Charge un réseau selon l'extension du fichier (répertoire = CSV noeuds.csv / aretes.csv)"""
+    if os.path.isdir(chemin):
+        return charger_csv(os.path.join(chemin, 'noeuds.csv'), os.path.join(chemin, 'aretes.csv'))
+    extension = os.path.splitext(chemin)[1].lower()
+    if extension in ('.geojson', '.json'):
+        return charger_geojson(chemin)
+    if extension in ('.osm', '.xml'):
+        return charger_osm(chemin)
+    raise ValueError(f"Format de réseau non reconnu : {chemin}")
@@ -0,0 +1,224 @@
+"""
+Index spatial des nœuds et des arêtes du réseau.
+
+Grille régulière en latitude/longitude : chaque cellule contient (au format
+CSR) les nœuds qui y tombent et les arêtes dont l'emprise la recouvre. La
+taille des cellules est choisie pour contenir quelques nœuds en moyenne, si
+bien qu'une recherche des k plus proches voisins n'examine que les anneaux
+de cellules autour du point demandé, indépendamment de la taille du réseau.
+"""
+import heapq
+import math
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+
+KM_PAR_DEGRE = 111.195
+# Nombre moyen de nœuds visé par cellule
+NOEUDS_PAR_CELLULE = 4
+
+Distance = Callable[[float, float, float, float], float]
+
+
+class GrilleSpatiale:
+    """Grille régulière sur les coordonnées du réseau (plus proches voisins, rayon, arêtes)"""
+
+    def __init__(self, lat, lon, distance: Distance, sources=None, cibles=None):
+        """
+        lat, lon : coordonnées des nœuds ; distance : fonction (lat1, lon1, lat2, lon2) -> km.
+        sources, cibles (optionnels) : extrémités des arêtes à indexer.
+        """
+        self.lat = lat
+        self.lon = lon
+        self.distance = distance
+        n = len(lat)
+
+        self.lat_min = min(lat) if n else 0.0
+        self.lon_min = min(lon) if n else 0.0
+        etendue_lat = (max(lat) - self.lat_min) if n else 0.0
+        etendue_lon = (max(lon) - self.lon_min) if n else 0.0
+        # Cellules carrées (en degrés) d'environ NOEUDS_PAR_CELLULE nœuds chacune
+        surface = max(etendue_lat * etendue_lon, 1e-12)
+        self.pas = max(math.sqrt(surface * NOEUDS_PAR_CELLULE / max(n, 1)), 1e-5)
+        self.nb_lignes = int(etendue_lat / self.pas) + 1
+        self.nb_colonnes = int(etendue_lon / self.pas) + 1
+
+        # Taille minimale d'une cellule en km, pour borner la distance des anneaux non visités
+        lat_max_abs = max(abs(self.lat_min), abs(self.lat_min + etendue_lat))
+        self.pas_km = self.pas * KM_PAR_DEGRE * min(1.0, math.cos(math.radians(lat_max_abs)))
+
+        self.offsets_noeuds, self.noeuds = self._remplir(
+            (self._cellule(lat[i], lon[i]), i) for i in range(n)
+        )
+
+        self.sources = sources
+        self.cibles = cibles
+        self.offsets_aretes = None
+        self.aretes = None
+        if sources is not None:
+            self.offsets_aretes, self.aretes = self._remplir(
+                (cellule, e) for e in range(len(sources)) for cellule in self._cellules_arete(e)
+            )
+
+    def _cellule(self, lat: float, lon: float) -> int:
+        ligne, colonne = self._ligne_colonne(lat, lon)
+        return ligne * self.nb_colonnes + colonne
+
+    def _ligne_colonne(self, lat: float, lon: float) -> Tuple[int, int]:
+        ligne = min(max(int((lat - self.lat_min) / self.pas), 0), self.nb_lignes - 1)
+        colonne = min(max(int((lon - self.lon_min) / self.pas), 0), self.nb_colonnes - 1)
+        return ligne, colonne
+
+    def _cellules_arete(self, e: int):
+        """Cellules recouvertes par le rectangle englobant de l'arête e"""
+        u, v = self.sources[e], self.cibles[e]
+        l1, c1 = self._ligne_colonne(self.lat[u], self.lon[u])
+        l2, c2 = self._ligne_colonne(self.lat[v], self.lon[v])
+        for ligne in range(min(l1, l2), max(l1, l2) + 1):
+            for colonne in range(min(c1, c2), max(c1, c2) + 1):
+                yield ligne * self.nb_colonnes + colonne
+
+    def _remplir(self, entrees) -> Tuple[array, array]:
+        """Range des couples (cellule, élément) au format CSR par cellule"""
+        entrees = list(entrees)
+        nb_cellules = self.nb_lignes * self.nb_colonnes
+        offsets = array('I', bytes(4 * (nb_cellules + 1)))
+        for cellule, _ in entrees:
+            offsets[cellule + 1] += 1
+        for i in range(nb_cellules):
+            offsets[i + 1] += offsets[i]
+        elements = array('I', bytes(4 * len(entrees)))
+        position = array('I', offsets[:nb_cellules])
+        for cellule, element in entrees:
+            elements[position[cellule]] = element
+            position[cellule] += 1
+        return offsets, elements
+
+    def _anneau(self, ligne: int, colonne: int, rayon: int):
+        """Cellules à distance de Tchebychev exactement 'rayon' de (ligne, colonne)"""
+        for l in range(ligne - rayon, ligne + rayon + 1):
+            if not 0 <= l < self.nb_lignes:
+                continue
+            if l in (ligne - rayon, ligne + rayon):
+                colonnes = range(colonne - rayon, colonne + rayon + 1)
+            else:
+                colonnes = (colonne - rayon, colonne + rayon)
+            for c in colonnes:
+                if 0 <= c < self.nb_colonnes:
+                    yield l * self.nb_colonnes + c
+
+    # --- REQUÊTES ---
+
+    def plus_proches(self, lat: float, lon: float, k: int = 1) -> List[Tuple[float, int]]:
+        """Les k nœuds les plus proches : liste de (distance en km, indice), triée"""
+        if not len(self.noeuds) or k <= 0:
+            return []
+        ligne, colonne = self._ligne_colonne(lat, lon)
+        rayon_max = max(self.nb_lignes, self.nb_colonnes)
+        meilleurs: List[Tuple[float, int]] = []  # tas max (distances négatives)
+
+        for rayon in range(rayon_max + 1):
+            for cellule in self._anneau(ligne, colonne, rayon):
+                for j in range(self.offsets_noeuds[cellule], self.offsets_noeuds[cellule + 1]):
+                    i = self.noeuds[j]
+                    d = self.distance(lat, lon, self.lat[i], self.lon[i])
+                    if len(meilleurs) < k:
+                        heapq.heappush(meilleurs, (-d, i))
+                    elif d < -meilleurs[0][0]:
+                        heapq.heapreplace(meilleurs, (-d, i))
+            # Tout nœud hors des anneaux déjà visités est à au moins rayon·pas_km
+            if len(meilleurs) == k and -meilleurs[0][0] <= rayon * self.pas_km:
+                break
+
+        return sorted((-d, i) for d, i in meilleurs)
+
+    def dans_rayon(self, lat: float, lon: float, rayon_km: float) -> List[Tuple[float, int]]:
+        """Nœuds situés à moins de rayon_km : liste de (distance en km, indice), triée"""
+        if not 0 <= rayon_km < math.inf:
+            raise ValueError(f"Rayon invalide : {rayon_km}")
+        if not len(self.noeuds):
+            return []
+        ligne, colonne = self._ligne_colonne(lat, lon)
+        nb_anneaux = int(rayon_km / self.pas_km) + 1 if self.pas_km > 0 else max(self.nb_lignes, self.nb_colonnes)
+        resultats = []
+        for rayon in range(min(nb_anneaux, max(self.nb_lignes, self.nb_colonnes)) + 1):
+            for cellule in self._anneau(ligne, colonne, rayon):
+                for j in range(self.offsets_noeuds[cellule], self.offsets_noeuds[cellule + 1]):
+                    i = self.noeuds[j]
+                    d = self.distance(lat, lon, self.lat[i], self.lon[i])
+                    if d <= rayon_km:
+                        resultats.append((d, i))
+        resultats.sort()
+        return resultats
+
+    def dans_rectangle(self, lat_min: float, lon_min: float,
+                       lat_max: float, lon_max: float) -> Tuple[List[int], List[int]]:
+        """
+        Nœuds situés dans le rectangle et arêtes dont le rectangle englobant le
+        recoupe (indices triés), en ne parcourant que les cellules concernées.
+        """
+        if not len(self.lat) or lat_min > lat_max or lon_min > lon_max:
+            return [], []
+        l1, c1 = self._ligne_colonne(lat_min, lon_min)
+        l2, c2 = self._ligne_colonne(lat_max, lon_max)
+        cellules = [l * self.nb_colonnes + c for l in range(l1, l2 + 1) for c in range(c1, c2 + 1)]
+        noeuds = [
+            self.noeuds[j]
+            for cellule in cellules
+            for j in range(self.offsets_noeuds[cellule], self.offsets_noeuds[cellule + 1])
+            if lat_min <= self.lat[self.noeuds[j]] <= lat_max and lon_min <= self.lon[self.noeuds[j]] <= lon_max
+        ]
+        aretes = set()
+        if self.aretes is not None:
+            for cellule in cellules:
+                for j in range(self.offsets_aretes[cellule], self.offsets_aretes[cellule + 1]):
+                    e = self.aretes[j]
+                    u, v = self.sources[e], self.cibles[e]
+                    if min(self.lat[u], self.lat[v]) <= lat_max and max(self.lat[u], self.lat[v]) >= lat_min \
+                            and min(self.lon[u], self.lon[v]) <= lon_max and max(self.lon[u], self.lon[v]) >= lon_min:
+                        aretes.add(e)
+        return sorted(noeuds), sorted(aretes)
+
+    def arete_la_plus_proche(self, lat: float, lon: float) -> Optional[Dict]:
+        """
+        Arête la plus proche du point : indice, distance (km) et projection sur le
+        segment (fraction 0..1 depuis la source, coordonnées du point projeté).
+        """
+        if not self.aretes:
+            return None
+        ligne, colonne = self._ligne_colonne(lat, lon)
+        rayon_max = max(self.nb_lignes, self.nb_colonnes)
+        meilleure = None
+        vues = set()
+
+        for rayon in range(rayon_max + 1):
+            for cellule in self._anneau(ligne, colonne, rayon):
+                for j in range(self.offsets_aretes[cellule], self.offsets_aretes[cellule + 1]):
+                    e = self.aretes[j]
+                    if e in vues:
+                        continue
+                    vues.add(e)
+                    projection = self._projeter(lat, lon, e)
+                    if meilleure is None or projection['distance_km'] < meilleure['distance_km']:
+                        meilleure = projection
+            if meilleure is not None and meilleure['distance_km'] <= rayon * self.pas_km:
+                break
+        return meilleure
+
+    def _projeter(self, lat: float, lon: float, e: int) -> Dict:
+        """Projection du point sur le segment de l'arête e (projection équirectangulaire locale)"""
+        u, v = self.sources[e], self.cibles[e]
+        echelle = math.cos(math.radians(lat))
+        ax, ay = (self.lon[u] - lon) * echelle, self.lat[u] - lat
+        bx, by = (self.lon[v] - lon) * echelle, self.lat[v] - lat
+        dx, dy = bx - ax, by - ay
+        longueur2 = dx * dx + dy * dy
+        t = 0.0 if longueur2 == 0 else min(max(-(ax * dx + ay * dy) / longueur2, 0.0), 1.0)
+        proj_lat = self.lat[u] + t * (self.lat[v] - self.lat[u])
+        proj_lon = self.lon[u] + t * (self.lon[v] - self.lon[u])
+        return {
+            'arete': e,
+            'fraction': t,
+            'lat': proj_lat,
+            'lon': proj_lon,
+            'distance_km': self.distance(lat, lon, proj_lat, proj_lon),
+        }
@@ -0,0 +1,103 @@
+"""
+Géométrie des isochrones.
+
+Une isochrone est dérivée des coûts d'une seule recherche bornée depuis les
+sources (routage.distances_depuis) : aucun chemin n'est matérialisé. Pour
+chaque seuil, les points atteints sont les nœuds de coût inférieur au seuil et,
+sur chaque arête quittée avant le seuil, le point où le seuil est atteint
+(interpolation linéaire le long de l'arête). Les points sont regroupés par
+composante connexe de la zone atteinte (des sources éloignées donnent des
+zones disjointes). La zone est rendue soit comme l'enveloppe convexe de chaque
+composante, soit comme l'ensemble des cellules d'une grille régulière qui
+contiennent au moins un point.
+"""
+import math
+from typing import Dict, List, Sequence, Tuple
+
+from index_spatial import KM_PAR_DEGRE
+
+Point = Tuple[float, float]  # (lon, lat), ordre GeoJSON
+
+FORMES = ('enveloppe', 'grille')
+
+
+def points_atteints(graphe, couts: Sequence[float], poids: Sequence[float], seuil: float) -> List[List[Point]]:
+    """
+    Nœuds de coût ≤ seuil et points des arêtes sortantes où le seuil est atteint,
+    groupés par composante connexe (arêtes entre nœuds atteints, sans orientation)
+    """
+    lat, lon = graphe.lat, graphe.lon
+    offsets, cibles = graphe.offsets, graphe.cibles
+    # Union-find sur les nœuds atteints
+    parents: Dict[int, int] = {u: u for u, cout in enumerate(couts) if cout <= seuil}
+
+    def racine(u: int) -> int:
+        while parents[u] != u:
+            parents[u] = parents[parents[u]]
+            u = parents[u]
+        return u
+
+    points: Dict[int, List[Point]] = {}
+    for u in parents:
+        cout = couts[u]
+        points.setdefault(u, []).append((lon[u], lat[u]))
+        for e in range(offsets[u], offsets[u + 1]):
+            w = poids[e]
+            if math.isinf(w):
+                continue
+            v = cibles[e]
+            if cout + w <= seuil:
+                if v in parents:
+                    parents[racine(u)] = racine(v)
+                continue
+            f = (seuil - cout) / w
+            points[u].append((lon[u] + f * (lon[v] - lon[u]), lat[u] + f * (lat[v] - lat[u])))
+    composantes: Dict[int, List[Point]] = {}
+    for u, points_u in points.items():
+        composantes.setdefault(racine(u), []).extend(points_u)
+    return list(composantes.values())
+
+
+def _produit_vectoriel(o: Point, a: Point, b: Point) -> float:
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def enveloppe_convexe(points: List[Point]) -> List[Point]:
+    """Anneau fermé de l'enveloppe convexe (chaîne monotone d'Andrew), sens trigonométrique"""
+    points = sorted(set(points))
+    if len(points) < 3:
+        return points + points[:1]
+    inferieure: List[Point] = []
+    for p in points:
+        while len(inferieure) >= 2 and _produit_vectoriel(inferieure[-2], inferieure[-1], p) <= 0:
+            inferieure.pop()
+        inferieure.append(p)
+    superieure: List[Point] = []
+    for p in reversed(points):
+        while len(superieure) >= 2 and _produit_vectoriel(superieure[-2], superieure[-1], p) <= 0:
+            superieure.pop()
+        superieure.append(p)
+    anneau = inferieure[:-1] + superieure[:-1]
+    return anneau + anneau[:1]
+
+
+def cellules_grille(points: List[Point], taille_km: float, lat_reference: float) -> List[List[Point]]:
+    """Anneaux des cellules carrées (d'environ taille_km de côté) contenant au moins un point"""
+    pas_lat = taille_km / KM_PAR_DEGRE
+    pas_lon = pas_lat / max(math.cos(math.radians(lat_reference)), 1e-6)
+    cellules = sorted({(math.floor(lon / pas_lon), math.floor(lat / pas_lat)) for lon, lat in points})
+    anneaux = []
+    for i, j in cellules:
+        x0, y0 = i * pas_lon, j * pas_lat
+        x1, y1 = x0 + pas_lon, y0 + pas_lat
+        anneaux.append([(x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0, y0)])
+    return anneaux
+
+
+def geometrie(composantes: List[List[Point]], forme: str, taille_km: float, lat_reference: float) -> Dict:
+    """Géométrie GeoJSON (MultiPolygon) de la zone couverte par les composantes de points"""
+    if forme == 'grille':
+        anneaux = cellules_grille([p for points in composantes for p in points], taille_km, lat_reference)
+    else:
+        anneaux = [enveloppe_convexe(points) for points in composantes]
+    return {'type': 'MultiPolygon', 'coordinates': [[[list(p) for p in anneau]] for anneau in anneaux]}
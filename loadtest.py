@@ -0,0 +1,327 @@
+"""
+Test de charge de l'API, hors ligne.
+
+Le script démarre l'application en local sous gunicorn (nombre de workers et
+de threads réglable ; serveur de développement Flask si gunicorn est absent)
+ou vise un serveur déjà lancé (--url), puis rejoue pendant une durée donnée un
+mélange pondéré de requêtes (réseau, plus courts chemins, chemins simples,
+détails de nœud, santé) depuis plusieurs clients concurrents. Les paires de
+nœuds sont tirées parmi ceux du réseau servi, avec une graine fixe.
+
+Le rapport donne, par endpoint et au total : débit, latences p50/p95/p99 et
+maximale, taux d'erreur (statut ≥ 500, délai dépassé ou connexion refusée) et
+répartition des statuts — les paires étant tirées au hasard, les 404 « aucun
+chemin » y figurent sans compter comme erreurs. Avec --slo-p95-ms, --slo-p99-ms ou --slo-erreurs, les
+endpoints hors objectif sont signalés (code de sortie 1) :
+
+    python loadtest.py --workers 4 --concurrence 32 --duree 30 --sortie charge.json
+    python loadtest.py --melange shortest-path=1 --slo-p99-ms 200 --slo-erreurs 0.01
+
+Les variables d'environnement (TRANSPORT_RESEAU, TRANSPORT_SNAPSHOT,
+TRANSPORT_CACHE_TAILLE...) sont transmises au serveur démarré.
+"""
+import argparse
+import http.client
+import importlib.util
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urlsplit
+
+MELANGE_DEFAUT = 'network=1,shortest-path=4,all-simple-paths=1,node=3,health=1'
+K_CHEMINS_SIMPLES = 10
+DELAI_REQUETE = 30.0
+ATTENTE_DEMARRAGE = 120.0
+
+
+def _paire(aleatoire: random.Random, noeuds: Sequence[str]) -> Tuple[str, str]:
+    """Deux nœuds distincts (si le réseau en a au moins deux), encodés pour l'URL"""
+    dep, arr = aleatoire.sample(noeuds, 2) if len(noeuds) > 1 else (noeuds[0], noeuds[0])
+    return quote(dep, safe=''), quote(arr, safe='')
+
+
+def _plus_court_chemin(aleatoire: random.Random, noeuds: Sequence[str]) -> str:
+    dep, arr = _paire(aleatoire, noeuds)
+    return f"/api/shortest-path/{aleatoire.choice(('distance', 'temps'))}?from={dep}&to={arr}"
+
+
+def _chemins_simples(aleatoire: random.Random, noeuds: Sequence[str]) -> str:
+    dep, arr = _paire(aleatoire, noeuds)
+    return f"/api/all-simple-paths?from={dep}&to={arr}&k={K_CHEMINS_SIMPLES}"
+
+
+# Endpoints du mélange : nom -> construction de l'URL d'une requête
+ENDPOINTS: Dict[str, Callable[[random.Random, Sequence[str]], str]] = {
+    'network': lambda aleatoire, noeuds: '/api/network',
+    'shortest-path': _plus_court_chemin,
+    'all-simple-paths': _chemins_simples,
+    'node': lambda aleatoire, noeuds: f"/api/node/{quote(aleatoire.choice(noeuds), safe='')}",
+    'health': lambda aleatoire, noeuds: '/api/health',
+}
+
+
+def lire_melange(texte: str) -> Dict[str, float]:
+    """'network=1,node=3' -> {'network': 1.0, 'node': 3.0} (endpoints de ENDPOINTS, poids positifs)"""
+    melange = {}
+    for element in texte.split(','):
+        nom, _, poids = element.partition('=')
+        nom = nom.strip()
+        if nom not in ENDPOINTS:
+            raise ValueError(f"Endpoint inconnu '{nom}' (disponibles : {', '.join(ENDPOINTS)})")
+        melange[nom] = float(poids or 1)
+        if melange[nom] < 0:
+            raise ValueError(f"Poids négatif pour '{nom}'")
+    if not any(melange.values()):
+        raise ValueError("Mélange vide")
+    return melange
+
+
+# --- SERVEUR ---
+
+def port_libre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def demarrer_serveur(port: int, workers: int, threads: int, journal) -> subprocess.Popen:
+    """Lance l'application sur 127.0.0.1:port, sous gunicorn s'il est installé"""
+    repertoire = os.path.dirname(os.path.abspath(__file__))
+    if importlib.util.find_spec('gunicorn') is not None:
+        commande = [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--threads', str(threads),
+                    '--bind', f'127.0.0.1:{port}', '--timeout', '120', 'app:app']
+    else:
+        print("gunicorn absent : serveur de développement Flask (un processus, --workers ignoré)")
+        commande = [sys.executable, '-c',
+                    f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    return subprocess.Popen(commande, cwd=repertoire, stdout=journal, stderr=subprocess.STDOUT)
+
+
+def attendre_serveur(hote: str, port: int, delai: float, serveur: Optional[subprocess.Popen] = None):
+    """Attend que /api/health/live réponde (ValueError si le serveur s'arrête ou tarde trop)"""
+    limite = time.monotonic() + delai
+    while time.monotonic() < limite:
+        if serveur is not None and serveur.poll() is not None:
+            raise ValueError(f"Le serveur s'est arrêté au démarrage (code {serveur.returncode})")
+        try:
+            connexion = http.client.HTTPConnection(hote, port, timeout=2)
+            connexion.request('GET', '/api/health/live')
+            if connexion.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise ValueError(f"Le serveur ne répond pas après {delai:.0f} s")
+
+
+def charger_noeuds(hote: str, port: int) -> List[str]:
+    connexion = http.client.HTTPConnection(hote, port, timeout=DELAI_REQUETE)
+    connexion.request('GET', '/api/nodes')
+    reponse = connexion.getresponse()
+    if reponse.status != 200:
+        raise ValueError(f"/api/nodes a répondu {reponse.status}")
+    return [noeud['id'] for noeud in json.loads(reponse.read())['nodes']]
+
+
+# --- CHARGE ---
+
+class Client(threading.Thread):
+    """Client concurrent : connexion persistante, requêtes tirées du mélange jusqu'à l'échéance"""
+
+    def __init__(self, hote: str, port: int, melange: Dict[str, float], noeuds: Sequence[str],
+                 graine: int, debut_mesure: float, fin: float):
+        super().__init__(daemon=True)
+        self.hote, self.port = hote, port
+        self.noms = list(melange)
+        self.poids = [melange[nom] for nom in self.noms]
+        self.noeuds = noeuds
+        self.aleatoire = random.Random(graine)
+        self.debut_mesure, self.fin = debut_mesure, fin
+        # (endpoint, statut ou 0 si échec de connexion, latence en secondes)
+        self.mesures: List[Tuple[str, int, float]] = []
+
+    def run(self):
+        connexion = http.client.HTTPConnection(self.hote, self.port, timeout=DELAI_REQUETE)
+        while True:
+            debut = time.monotonic()
+            if debut >= self.fin:
+                break
+            nom = self.aleatoire.choices(self.noms, self.poids)[0]
+            chemin = ENDPOINTS[nom](self.aleatoire, self.noeuds)
+            try:
+                connexion.request('GET', chemin, headers={'Accept-Encoding': 'gzip'})
+                reponse = connexion.getresponse()
+                reponse.read()
+                statut = reponse.status
+            except (OSError, http.client.HTTPException):
+                statut = 0
+                connexion.close()
+            if debut >= self.debut_mesure:
+                self.mesures.append((nom, statut, time.monotonic() - debut))
+        connexion.close()
+
+
+def executer(hote: str, port: int, melange: Dict[str, float], noeuds: Sequence[str],
+             concurrence: int, duree: float, echauffement: float, graine: int) -> Tuple[List, float]:
+    """Lance les clients ; retourne les mesures (hors échauffement) et la durée mesurée"""
+    debut_mesure = time.monotonic() + echauffement
+    fin = debut_mesure + duree
+    clients = [Client(hote, port, melange, noeuds, graine + i, debut_mesure, fin) for i in range(concurrence)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    # Les dernières requêtes peuvent se terminer après l'échéance
+    duree_mesuree = max(duree, time.monotonic() - debut_mesure)
+    return [mesure for client in clients for mesure in client.mesures], duree_mesuree
+
+
+# --- RAPPORT ---
+
+def centile(valeurs: List[float], p: float) -> float:
+    """Centile p (0-100) d'une liste triée, par rang le plus proche"""
+    return valeurs[max(0, min(len(valeurs) - 1, int(math.ceil(p / 100 * len(valeurs))) - 1))]
+
+
+def resumer(mesures: List[Tuple[str, int, float]], duree: float) -> Dict:
+    latences = sorted(latence for _, _, latence in mesures)
+    erreurs = sum(1 for _, statut, _ in mesures if statut == 0 or statut >= 500)
+    codes: Dict[str, int] = {}
+    for _, statut, _ in mesures:
+        cle = str(statut) if statut else 'echec'
+        codes[cle] = codes.get(cle, 0) + 1
+    resume = {'requetes': len(mesures), 'debit_rps': round(len(mesures) / duree, 1),
+              'erreurs': erreurs, 'taux_erreur': round(erreurs / len(mesures), 4) if mesures else 0,
+              'codes': dict(sorted(codes.items()))}
+    if latences:
+        resume.update({
+            'p50_ms': round(centile(latences, 50) * 1000, 2),
+            'p95_ms': round(centile(latences, 95) * 1000, 2),
+            'p99_ms': round(centile(latences, 99) * 1000, 2),
+            'max_ms': round(latences[-1] * 1000, 2)
+        })
+    return resume
+
+
+def rapport(mesures: List[Tuple[str, int, float]], duree: float) -> Dict:
+    par_endpoint: Dict[str, List] = {}
+    for mesure in mesures:
+        par_endpoint.setdefault(mesure[0], []).append(mesure)
+    return {
+        'endpoints': {nom: resumer(liste, duree) for nom, liste in sorted(par_endpoint.items())},
+        'total': resumer(mesures, duree)
+    }
+
+
+def verifier_slo(resultats: Dict, p95_ms: Optional[float], p99_ms: Optional[float],
+                 taux_erreur: Optional[float]) -> List[str]:
+    """Objectifs non tenus, par endpoint"""
+    ecarts = []
+    for nom, resume in resultats['endpoints'].items():
+        if p95_ms is not None and resume.get('p95_ms', 0) > p95_ms:
+            ecarts.append(f"{nom} : p95 {resume['p95_ms']} ms > {p95_ms} ms")
+        if p99_ms is not None and resume.get('p99_ms', 0) > p99_ms:
+            ecarts.append(f"{nom} : p99 {resume['p99_ms']} ms > {p99_ms} ms")
+        if taux_erreur is not None and resume['taux_erreur'] > taux_erreur:
+            ecarts.append(f"{nom} : taux d'erreur {resume['taux_erreur']} > {taux_erreur}")
+    return ecarts
+
+
+def afficher(resultats: Dict):
+    print(f"\n{'endpoint':<18}{'requêtes':>9}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'max ms':>10}{'erreurs':>9}  statuts")
+    lignes = list(resultats['endpoints'].items()) + [('TOTAL', resultats['total'])]
+    for nom, r in lignes:
+        print(f"{nom:<18}{r['requetes']:>9}{r['debit_rps']:>9}{r.get('p50_ms', '-'):>10}{r.get('p95_ms', '-'):>10}"
+              f"{r.get('p99_ms', '-'):>10}{r.get('max_ms', '-'):>10}{r['taux_erreur']:>9.2%}  "
+              f"{' '.join(f'{c}:{n}' for c, n in r['codes'].items())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de l'API de transport")
+    parser.add_argument('--url', help="Serveur déjà lancé (http://hote:port) ; sinon un serveur local est démarré")
+    parser.add_argument('--workers', type=int, default=2, help="Workers gunicorn du serveur démarré")
+    parser.add_argument('--threads', type=int, default=1, help="Threads par worker gunicorn")
+    parser.add_argument('--concurrence', type=int, default=8, help="Clients simultanés")
+    parser.add_argument('--duree', type=float, default=20.0, help="Durée mesurée (secondes)")
+    parser.add_argument('--echauffement', type=float, default=2.0, help="Durée non mesurée au début (secondes)")
+    parser.add_argument('--melange', default=MELANGE_DEFAUT,
+                        help=f"Poids des endpoints (disponibles : {', '.join(ENDPOINTS)})")
+    parser.add_argument('--graine', type=int, default=0)
+    parser.add_argument('--attente', type=float, default=ATTENTE_DEMARRAGE,
+                        help="Délai maximal de démarrage du serveur (secondes)")
+    parser.add_argument('--journal', help="Fichier recevant la sortie du serveur démarré")
+    parser.add_argument('--sortie', help="Fichier JSON du rapport")
+    parser.add_argument('--slo-p95-ms', type=float)
+    parser.add_argument('--slo-p99-ms', type=float)
+    parser.add_argument('--slo-erreurs', type=float, help="Taux d'erreur maximal (0-1)")
+    args = parser.parse_args()
+
+    try:
+        melange = lire_melange(args.melange)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.concurrence < 1 or args.workers < 1 or args.threads < 1 or args.duree <= 0:
+        parser.error("Concurrence, workers, threads et durée doivent être positifs")
+
+    serveur = None
+    journal = open(args.journal, 'w') if args.journal else subprocess.DEVNULL
+    try:
+        if args.url:
+            adresse = urlsplit(args.url)
+            hote, port = adresse.hostname, adresse.port or 80
+        else:
+            hote, port = '127.0.0.1', port_libre()
+            serveur = demarrer_serveur(port, args.workers, args.threads, journal)
+        attendre_serveur(hote, port, args.attente, serveur)
+        noeuds = charger_noeuds(hote, port)
+        if not noeuds:
+            raise ValueError("Le réseau servi n'a aucun nœud")
+        print(f"Serveur {hote}:{port} ({len(noeuds)} nœuds) — {args.concurrence} clients pendant {args.duree:.0f} s"
+              + (f", {args.workers} workers x {args.threads} threads" if serveur else ''))
+        mesures, duree = executer(hote, port, melange, noeuds, args.concurrence, args.duree,
+                                  args.echauffement, args.graine)
+    except ValueError as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        sys.exit(2)
+    finally:
+        if serveur is not None:
+            serveur.terminate()
+            try:
+                serveur.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                serveur.kill()
+        if args.journal:
+            journal.close()
+
+    resultats = rapport(mesures, duree)
+    resultats['configuration'] = {
+        'url': args.url, 'workers': None if args.url else args.workers, 'threads': None if args.url else args.threads,
+        'concurrence': args.concurrence, 'duree_s': round(duree, 2), 'echauffement_s': args.echauffement,
+        'melange': melange, 'graine': args.graine
+    }
+    afficher(resultats)
+    ecarts = verifier_slo(resultats, args.slo_p95_ms, args.slo_p99_ms, args.slo_erreurs)
+    resultats['slo'] = {'p95_ms': args.slo_p95_ms, 'p99_ms': args.slo_p99_ms, 'taux_erreur': args.slo_erreurs,
+                        'respecte': not ecarts, 'ecarts': ecarts}
+
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump(resultats, f, ensure_ascii=False, indent=2)
+        print(f"\nRapport écrit dans {args.sortie}")
+    if ecarts:
+        print("\nObjectifs non tenus :")
+        for ecart in ecarts:
+            print(f"  {ecart}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Matrices de distances et de temps de parcours (N origines × M destinations).
+
+Une seule recherche un-vers-plusieurs par origine (routage.un_vers_plusieurs)
+au lieu d'une recherche par couple. Au-delà de SEUIL_PARALLELE couples, les
+origines sont réparties par blocs sur un pool de processus, conservé tant que
+le réseau ne change pas : chaque processus reçoit le réseau une seule fois, à
+sa création (un réseau issu d'un snapshot y est simplement rouvert par mmap).
+Les processus sont lancés par 'spawn' et non par fork : le serveur est
+multi-thread, et un fork copierait des verrous tenus par d'autres threads.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List, Optional, Sequence
+
+from graphe_compact import GrapheCompact
+from routage import poids_avec_departage, un_vers_plusieurs
+
+# Nombre de couples origine-destination à partir duquel le calcul passe par le pool
+SEUIL_PARALLELE = 20000
+# Blocs d'origines par processus (plusieurs, pour équilibrer la charge)
+BLOCS_PAR_PROCESSUS = 4
+
+Ligne = Dict[str, List[float]]
+
+# État d'un processus du pool, fixé par _initialiser_processus
+_reseau_processus: Optional[GrapheCompact] = None
+_departages_processus: Dict[str, Optional[str]] = {}
+_poids_processus: Dict[str, Sequence[float]] = {}
+
+
+def _initialiser_processus(reseau: GrapheCompact, departages: Dict[str, Optional[str]]):
+    global _reseau_processus, _departages_processus
+    _reseau_processus = reseau
+    _departages_processus = departages
+    _poids_processus.clear()
+
+
+def _calculer_bloc(origines: Sequence[int], cibles: Sequence[int], critere: str) -> List[Ligne]:
+    """Lignes de la matrice pour un bloc d'origines, dans un processus du pool"""
+    if critere not in _poids_processus:
+        _poids_processus[critere] = poids_avec_departage(
+            _reseau_processus, critere, _departages_processus.get(critere))
+    poids = _poids_processus[critere]
+    return [un_vers_plusieurs(_reseau_processus, origine, cibles, critere, poids) for origine in origines]
+
+
+class CalculateurMatrice:
+    """Calcul de matrices sur un réseau fixé, avec un pool de processus créé à la première grosse matrice"""
+
+    def __init__(self, reseau: GrapheCompact, departages: Dict[str, Optional[str]],
+                 processus: Optional[int] = None, seuil_parallele: int = SEUIL_PARALLELE):
+        """
+        departages : critère de départage à appliquer pour chaque critère ;
+        processus : taille du pool (par défaut le nombre de processeurs).
+        """
+        self.reseau = reseau
+        self.departages = departages
+        self.processus = processus or os.cpu_count() or 1
+        self.seuil_parallele = seuil_parallele
+        self._poids: Dict[str, Sequence[float]] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._verrou = threading.Lock()
+
+    def poids(self, critere: str) -> Sequence[float]:
+        if critere not in self._poids:
+            self._poids[critere] = poids_avec_departage(self.reseau, critere, self.departages.get(critere))
+        return self._poids[critere]
+
+    def calculer(self, origines: Sequence[int], cibles: Sequence[int], critere: str) -> List[Ligne]:
+        """Une ligne par origine : coûts de chaque critère vers chaque cible (INFINI si inaccessible)"""
+        if self.processus <= 1 or len(origines) * len(cibles) < self.seuil_parallele:
+            poids = self.poids(critere)
+            return [un_vers_plusieurs(self.reseau, origine, cibles, critere, poids) for origine in origines]
+
+        taille = -(-len(origines) // (self.processus * BLOCS_PAR_PROCESSUS))
+        blocs = [origines[i:i + taille] for i in range(0, len(origines), taille)]
+        lignes: List[Ligne] = []
+        for resultat in self._get_pool().map(_calculer_bloc, blocs, repeat(cibles), repeat(critere)):
+            lignes.extend(resultat)
+        return lignes
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._verrou:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processus,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_initialiser_processus,
+                    initargs=(self.reseau, self.departages),
+                )
+            return self._pool
+
+    def fermer(self):
+        """Arrête le pool de processus (sans attendre les calculs en cours)"""
+        with self._verrou:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
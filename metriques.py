@@ -0,0 +1,171 @@
+"""
+Métriques de l'application au format texte de Prometheus.
+
+Compteurs et histogrammes sont tenus en mémoire par processus (chaque worker
+gunicorn expose les siens, agrégés par Prometheus) ; une observation ne coûte
+qu'une recherche dichotomique et quelques additions sous verrou, si bien que
+l'instrumentation peut rester active en production. Les valeurs tenues
+ailleurs (cache d'itinéraires, par exemple) sont lues au moment de l'export
+par des collecteurs.
+"""
+import bisect
+import functools
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Bornes des histogrammes (secondes, octets, éléments)
+BORNES_DUREE = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BORNES_TAILLE = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+BORNES_COMPTE = (16, 64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+TYPE_CONTENU = 'text/plain; version=0.0.4; charset=utf-8'
+
+Etiquettes = Tuple[Tuple[str, str], ...]
+# Un collecteur retourne des familles (nom, type, aide, [(étiquettes, valeur)])
+Famille = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _etiquettes(valeurs: Dict[str, str]) -> Etiquettes:
+    return tuple(sorted((cle, str(valeur)) for cle, valeur in valeurs.items()))
+
+
+def _formater_etiquettes(etiquettes: Etiquettes, supplementaires: Etiquettes = ()) -> str:
+    paires = etiquettes + supplementaires
+    if not paires:
+        return ''
+    echapper = lambda v: v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{cle}="{echapper(valeur)}"' for cle, valeur in paires) + '}'
+
+
+def _formater_valeur(valeur: float) -> str:
+    if valeur == float('inf'):
+        return '+Inf'
+    return repr(float(valeur)) if isinstance(valeur, float) else str(valeur)
+
+
+class Histogramme:
+    """Répartition cumulée d'observations par borne, avec somme et nombre"""
+
+    def __init__(self, bornes: Sequence[float]):
+        self.bornes = tuple(bornes)
+        self.compteurs = [0] * (len(self.bornes) + 1)
+        self.somme = 0.0
+        self.nombre = 0
+
+    def observer(self, valeur: float):
+        self.compteurs[bisect.bisect_left(self.bornes, valeur)] += 1
+        self.somme += valeur
+        self.nombre += 1
+
+    def lignes(self, nom: str, etiquettes: Etiquettes) -> List[str]:
+        lignes = []
+        cumul = 0
+        for borne, compteur in zip(self.bornes + (float('inf'),), self.compteurs):
+            cumul += compteur
+            le = (('le', _formater_valeur(float(borne))),)
+            lignes.append(f'{nom}_bucket{_formater_etiquettes(etiquettes, le)} {cumul}')
+        lignes.append(f'{nom}_sum{_formater_etiquettes(etiquettes)} {_formater_valeur(self.somme)}')
+        lignes.append(f'{nom}_count{_formater_etiquettes(etiquettes)} {self.nombre}')
+        return lignes
+
+
+class RegistreMetriques:
+    """Compteurs et histogrammes étiquetés, plus collecteurs lus à l'export"""
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        # nom -> (type, aide, bornes)
+        self._familles: Dict[str, Tuple[str, str, Optional[Sequence[float]]]] = {}
+        self._compteurs: Dict[str, Dict[Etiquettes, float]] = {}
+        self._histogrammes: Dict[str, Dict[Etiquettes, Histogramme]] = {}
+        self._collecteurs: List[Callable[[], Iterable[Famille]]] = []
+
+    def declarer_compteur(self, nom: str, aide: str):
+        self._familles[nom] = ('counter', aide, None)
+        self._compteurs.setdefault(nom, {})
+
+    def declarer_histogramme(self, nom: str, aide: str, bornes: Sequence[float] = BORNES_DUREE):
+        self._familles[nom] = ('histogram', aide, bornes)
+        self._histogrammes.setdefault(nom, {})
+
+    def incrementer(self, nom: str, valeur: float = 1, **etiquettes):
+        cle = _etiquettes(etiquettes)
+        with self._verrou:
+            serie = self._compteurs[nom]
+            serie[cle] = serie.get(cle, 0) + valeur
+
+    def observer(self, nom: str, valeur: float, **etiquettes):
+        cle = _etiquettes(etiquettes)
+        with self._verrou:
+            serie = self._histogrammes[nom]
+            histogramme = serie.get(cle)
+            if histogramme is None:
+                histogramme = serie[cle] = Histogramme(self._familles[nom][2])
+            histogramme.observer(valeur)
+
+    def ajouter_collecteur(self, collecteur: Callable[[], Iterable[Famille]]):
+        self._collecteurs.append(collecteur)
+
+    def exporter(self) -> str:
+        """Toutes les métriques au format texte de Prometheus (version 0.0.4)"""
+        lignes = []
+        with self._verrou:
+            for nom, (type_metrique, aide, _) in self._familles.items():
+                lignes.append(f'# HELP {nom} {aide}')
+                lignes.append(f'# TYPE {nom} {type_metrique}')
+                if type_metrique == 'counter':
+                    for etiquettes, valeur in self._compteurs[nom].items():
+                        lignes.append(f'{nom}{_formater_etiquettes(etiquettes)} {_formater_valeur(valeur)}')
+                else:
+                    for etiquettes, histogramme in self._histogrammes[nom].items():
+                        lignes.extend(histogramme.lignes(nom, etiquettes))
+        for collecteur in self._collecteurs:
+            for nom, type_metrique, aide, echantillons in collecteur():
+                lignes.append(f'# HELP {nom} {aide}')
+                lignes.append(f'# TYPE {nom} {type_metrique}')
+                for etiquettes, valeur in echantillons:
+                    lignes.append(f'{nom}{_formater_etiquettes(_etiquettes(etiquettes))} {_formater_valeur(valeur)}')
+        return '\n'.join(lignes) + '\n'
+
+
+# Registre du processus
+METRIQUES = RegistreMetriques()
+METRIQUES.declarer_compteur('transport_http_requetes_total', "Requêtes HTTP traitées, par route et statut")
+METRIQUES.declarer_histogramme('transport_http_duree_secondes',
+                               "Durée de traitement des requêtes HTTP (jusqu'aux en-têtes pour un flux)")
+METRIQUES.declarer_histogramme('transport_http_reponse_octets',
+                               "Taille des corps de réponse (hors flux)", BORNES_TAILLE)
+METRIQUES.declarer_histogramme('transport_methode_duree_secondes',
+                               "Durée des méthodes instrumentées du système de transport")
+METRIQUES.declarer_compteur('transport_recherches_total', "Recherches d'itinéraire exécutées (hors cache)")
+METRIQUES.declarer_histogramme('transport_recherche_noeuds_explores',
+                               "Nœuds explorés (fixés) par recherche", BORNES_COMPTE)
+METRIQUES.declarer_histogramme('transport_recherche_aretes_relachees',
+                               "Arêtes relâchées par recherche", BORNES_COMPTE)
+
+
+def chronometrer(nom: Optional[str] = None):
+    """Décorateur : durée de chaque appel dans transport_methode_duree_secondes{methode=nom}"""
+    def decorer(fonction):
+        methode = nom or fonction.__name__
+
+        @functools.wraps(fonction)
+        def chronometree(*args, **kwargs):
+            debut = time.perf_counter()
+            try:
+                return fonction(*args, **kwargs)
+            finally:
+                METRIQUES.observer('transport_methode_duree_secondes', time.perf_counter() - debut,
+                                   methode=methode)
+        return chronometree
+    return decorer
+
+
+def observer_recherche(algorithme: str, statistiques: Dict):
+    """Enregistre les compteurs d'une recherche (voir routage._comptabiliser)"""
+    METRIQUES.incrementer('transport_recherches_total', algorithme=algorithme)
+    METRIQUES.observer('transport_recherche_noeuds_explores', statistiques.get('noeuds_explores', 0),
+                       algorithme=algorithme)
+    METRIQUES.observer('transport_recherche_aretes_relachees', statistiques.get('aretes_relachees', 0),
+                       algorithme=algorithme)
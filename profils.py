@@ -0,0 +1,114 @@
+"""
+Profils horaires de trafic.
+
+Un profil est une suite de NB_INTERVALLES facteurs multiplicatifs du temps de
+parcours à vitesse libre, un par quart d'heure de la journée. Tous les profils
+sont rangés dans un seul tableau plat de flottants simple précision et chaque
+arête ne porte que le numéro de son profil : la recherche dépendante du temps
+ne fait que des accès indexés à des tableaux.
+
+Entre les centres de deux intervalles, le facteur est interpolé linéairement.
+Les temps de parcours varient ainsi continûment, et tant qu'ils ne chutent pas
+plus vite que l'horloge (propriété FIFO : partir plus tard ne fait jamais
+arriver plus tôt), un Dijkstra sur les heures d'arrivée reste exact.
+"""
+import math
+from array import array
+from typing import Dict, List, Sequence
+
+NB_INTERVALLES = 96
+MINUTES_PAR_JOUR = 24 * 60
+DUREE_INTERVALLE = MINUTES_PAR_JOUR / NB_INTERVALLES
+
+# Pointes de congestion (heure centrale, largeur en heures, intensité relative)
+POINTES = ((7.5, 1.2, 1.0), (17.5, 1.5, 1.1), (12.5, 1.0, 0.35))
+
+
+def forme_journaliere() -> List[float]:
+    """Congestion relative de chaque intervalle (pointes du matin, du midi et du soir), de moyenne 1"""
+    valeurs = []
+    for i in range(NB_INTERVALLES):
+        heure = (i + 0.5) * DUREE_INTERVALLE / 60
+        valeurs.append(0.15 + sum(intensite * math.exp(-((heure - centre) / largeur) ** 2 / 2)
+                                  for centre, largeur, intensite in POINTES))
+    moyenne = sum(valeurs) / NB_INTERVALLES
+    return [v / moyenne for v in valeurs]
+
+
+def profil_depuis_facteur(facteur_moyen: float) -> List[float]:
+    """Profil dont le surcoût moyen sur la journée est celui d'un facteur de trafic statique"""
+    return [1 + (facteur_moyen - 1) * c for c in forme_journaliere()]
+
+
+def chute_maximale(facteurs: Sequence[float]) -> float:
+    """Plus forte baisse du facteur d'un intervalle au suivant (minuit compris), 0 si aucune"""
+    return max(0.0, max(facteurs[i] - facteurs[(i + 1) % len(facteurs)] for i in range(len(facteurs))))
+
+
+class ProfilsHoraires:
+    """Profils de trafic (tableau plat de facteurs) et numéro de profil de chaque arête"""
+
+    def __init__(self, nb_aretes: int, temps_libre_max: float = 0.0):
+        # Plus long temps à vitesse libre (minutes) d'une arête pouvant porter un profil
+        self.temps_libre_max = temps_libre_max
+        self.noms: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.facteurs = array('f')
+        self.profil_arete = array('H', bytes(2 * nb_aretes))
+
+    def ajouter(self, nom: str, facteurs: Sequence[float]) -> int:
+        """Ajoute (ou remplace) un profil et retourne son numéro"""
+        if len(facteurs) != NB_INTERVALLES:
+            raise ValueError(f"Un profil compte {NB_INTERVALLES} facteurs (un par quart d'heure)")
+        if not all(isinstance(f, (int, float)) and 0 < f < 100 for f in facteurs):
+            raise ValueError("Les facteurs d'un profil doivent être des nombres entre 0 et 100")
+        # FIFO : sur un intervalle, le temps de parcours ne doit pas baisser plus que l'horloge n'avance
+        chute = chute_maximale(facteurs)
+        if chute * self.temps_libre_max > DUREE_INTERVALLE:
+            raise ValueError(f"Profil non FIFO : le facteur baisse de {chute:.3g} en un quart d'heure, "
+                             f"au plus {DUREE_INTERVALLE / self.temps_libre_max:.3g} pour une arête de "
+                             f"{self.temps_libre_max:.1f} min à vitesse libre")
+        if nom in self.index:
+            numero = self.index[nom]
+            self.facteurs[numero * NB_INTERVALLES:(numero + 1) * NB_INTERVALLES] = array('f', facteurs)
+            return numero
+        numero = len(self.noms)
+        if numero > 0xFFFF:
+            raise ValueError("Trop de profils")
+        self.noms.append(nom)
+        self.index[nom] = numero
+        self.facteurs.extend(facteurs)
+        return numero
+
+    def profil(self, nom: str) -> List[float]:
+        debut = self.index[nom] * NB_INTERVALLES
+        return self.facteurs[debut:debut + NB_INTERVALLES].tolist()
+
+    def facteur(self, e: int, minute: float) -> float:
+        """Facteur interpolé de l'arête e à l'instant donné (minutes depuis minuit)"""
+        x = (minute % MINUTES_PAR_JOUR) / DUREE_INTERVALLE - 0.5
+        i = math.floor(x)
+        f = x - i
+        base = self.profil_arete[e] * NB_INTERVALLES
+        return self.facteurs[base + i % NB_INTERVALLES] * (1 - f) + self.facteurs[base + (i + 1) % NB_INTERVALLES] * f
+
+    def facteur_minimal(self, numero: int) -> float:
+        return min(self.facteurs[numero * NB_INTERVALLES:(numero + 1) * NB_INTERVALLES])
+
+    def taille_memoire(self) -> int:
+        return self.facteurs.itemsize * len(self.facteurs) + self.profil_arete.itemsize * len(self.profil_arete)
+
+
+def lire_heure(texte: str) -> float:
+    """'HH:MM' -> minutes depuis minuit (ValueError si le format est invalide)"""
+    heures, _, minutes = texte.strip().partition(':')
+    heures, minutes = int(heures), int(minutes or 0)
+    if not (0 <= heures < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Heure invalide : {texte}")
+    return float(heures * 60 + minutes)
+
+
+def formater_heure(minute: float) -> str:
+    """Minutes depuis minuit (éventuellement au-delà de 24 h) -> 'HH:MM'"""
+    minute = int(round(minute)) % MINUTES_PAR_JOUR
+    return f"{minute // 60:02d}:{minute % 60:02d}"
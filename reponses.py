@@ -0,0 +1,64 @@
+"""
+Réponses JSON pré-sérialisées et pré-compressées.
+
+Les charges utiles qui ne changent qu'avec le graphe (réseau complet,
+statistiques) sont sérialisées une fois par version, puis conservées en
+clair, en gzip et en brotli. Chaque réponse porte un ETag fort (empreinte du
+contenu) et un Last-Modified (date de la modification du graphe) : un client
+qui possède déjà la version courante reçoit un 304 sans corps.
+"""
+import gzip
+import hashlib
+from typing import Dict, Optional
+
+from flask import Request, Response
+
+try:
+    import brotli
+except ImportError:  # Variantes gzip uniquement
+    brotli = None
+
+NIVEAU_GZIP = 9
+# La qualité maximale (11) est trop lente sur les gros réseaux pour un gain marginal
+QUALITE_BROTLI = 9
+TYPE_JSON = 'application/json'
+
+
+class ReponsePreparee:
+    """Corps JSON d'une version du graphe, avec ses variantes compressées et ses validateurs"""
+
+    def __init__(self, corps: bytes, derniere_modification: float):
+        """corps : JSON encodé ; derniere_modification : horodatage (secondes) de la version"""
+        self.derniere_modification = derniere_modification
+        self.empreinte = hashlib.sha256(corps).hexdigest()[:32]
+        # Variantes par codage, dans l'ordre de préférence
+        self.variantes: Dict[str, bytes] = {}
+        if brotli is not None:
+            self.variantes['br'] = brotli.compress(corps, quality=QUALITE_BROTLI)
+        self.variantes['gzip'] = gzip.compress(corps, compresslevel=NIVEAU_GZIP, mtime=0)
+        self.variantes['identity'] = corps
+
+    def etag(self, codage: str) -> str:
+        """ETag fort de la variante : chaque codage est une représentation distincte"""
+        return self.empreinte if codage == 'identity' else f'{self.empreinte}-{codage}'
+
+    def choisir_codage(self, requete: Request) -> str:
+        """Meilleur codage accepté par le client parmi les variantes disponibles"""
+        acceptes = requete.accept_encodings
+        for codage in self.variantes:
+            if codage == 'identity' or acceptes[codage]:
+                return codage
+        return 'identity'
+
+    def servir(self, requete: Request, cache_control: Optional[str] = 'no-cache') -> Response:
+        """Réponse à la requête : variante compressée adaptée, ou 304 si le client est à jour"""
+        codage = self.choisir_codage(requete)
+        reponse = Response(self.variantes[codage], mimetype=TYPE_JSON)
+        if codage != 'identity':
+            reponse.headers['Content-Encoding'] = codage
+        reponse.vary.add('Accept-Encoding')
+        reponse.set_etag(self.etag(codage))
+        reponse.last_modified = self.derniere_modification
+        if cache_control:
+            reponse.headers['Cache-Control'] = cache_control
+        return reponse.make_conditional(requete)
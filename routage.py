@@ -0,0 +1,1162 @@
+"""
+Moteurs de recherche d'itinéraires pour le réseau de transport.
+
+Les algorithmes travaillent sur la représentation compacte du graphe (nœuds
+numérotés de 0 à n-1, adjacence au format CSR, voir graphe_compact) plutôt
+que sur le graphe networkx, afin d'éviter les dictionnaires d'attributs par
+arête.
+"""
+import heapq
+import math
+from array import array
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from graphe_compact import GrapheCompact
+from profils import DUREE_INTERVALLE, MINUTES_PAR_JOUR, NB_INTERVALLES, ProfilsHoraires
+
+INFINI = float('inf')
+# Poids du critère de départage : assez faible pour ne jamais inverser deux
+# coûts distincts du critère principal (arrondis au millième ou au dixième)
+FACTEUR_DEPARTAGE = 1e-8
+
+
+def _comptabiliser(statistiques: Optional[Dict], explores: int, relachees: int):
+    """Ajoute les compteurs d'une recherche au dictionnaire de statistiques fourni"""
+    if statistiques is not None:
+        statistiques['noeuds_explores'] = statistiques.get('noeuds_explores', 0) + explores
+        statistiques['aretes_relachees'] = statistiques.get('aretes_relachees', 0) + relachees
+
+
+def poids_avec_departage(graphe: GrapheCompact, critere: str, departage: Optional[str]) -> Sequence[float]:
+    """Poids de recherche : critère principal, plus le critère de départage éventuel"""
+    poids = graphe.poids[critere]
+    if departage is None:
+        return poids
+    secondaire = graphe.poids[departage]
+    return array('d', (poids[e] + FACTEUR_DEPARTAGE * secondaire[e] for e in range(len(poids))))
+
+
+class HierarchieContraction:
+    """
+    Hiérarchie de contraction (Contraction Hierarchies) pour un critère donné.
+
+    Le prétraitement contracte les nœuds un par un, du moins important au plus
+    important, en ajoutant des raccourcis lorsque aucun chemin témoin n'existe.
+    Une requête est ensuite un Dijkstra bidirectionnel restreint aux arêtes
+    « montantes », qui ne visite qu'une petite partie du graphe.
+
+    Avec un critère de départage, les chemins de coût égal sont départagés
+    par ce second critère (par exemple le plus rapide parmi les plus courts).
+    """
+
+    # Limite de nœuds explorés par recherche de témoin (un témoin manqué ajoute
+    # seulement un raccourci superflu, sans fausser les résultats)
+    LIMITE_TEMOIN = 500
+
+    def __init__(self, graphe: GrapheCompact, critere: str, departage: Optional[str] = None,
+                 rang: Optional[Sequence[int]] = None):
+        """
+        rang (optionnel) : ordre de contraction imposé, typiquement celui d'une
+        hiérarchie précédente du même réseau. Après une simple modification des
+        poids, recontracter dans cet ordre évite le calcul des priorités, qui
+        représente l'essentiel du prétraitement.
+        """
+        self.graphe = graphe
+        self.critere = critere
+        self.departage = departage
+        n = graphe.nombre_noeuds
+        poids = poids_avec_departage(graphe, critere, departage)
+
+        # Graphe dynamique pendant la contraction : poids minimal et nœud milieu
+        # (None pour une arête originale) par couple (u, v)
+        sortants: List[Dict[int, Tuple[float, Optional[int]]]] = [{} for _ in range(n)]
+        entrants: List[Dict[int, Tuple[float, Optional[int]]]] = [{} for _ in range(n)]
+        for u in range(n):
+            for e in range(graphe.offsets[u], graphe.offsets[u + 1]):
+                v = graphe.cibles[e]
+                if u == v:
+                    continue
+                w = poids[e]
+                if w == INFINI:  # arête fermée
+                    continue
+                if v not in sortants[u] or w < sortants[u][v][0]:
+                    sortants[u][v] = (w, None)
+                    entrants[v][u] = (w, None)
+
+        self._sortants = sortants
+        self._entrants = entrants
+        self.rang = array('I', bytes(4 * n))
+        if rang is None:
+            self._contracter(n)
+        else:
+            self._contracter_dans_ordre(rang)
+
+        # Graphe de recherche au format CSR : arêtes montantes (vers un rang
+        # supérieur) pour la recherche avant, arêtes descendantes inversées pour
+        # la recherche arrière. Le milieu vaut -1 pour une arête originale.
+        montantes: List[List[Tuple[int, float, int]]] = [[] for _ in range(n)]
+        descendantes: List[List[Tuple[int, float, int]]] = [[] for _ in range(n)]
+        for u in range(n):
+            for v, (w, milieu) in sortants[u].items():
+                milieu = -1 if milieu is None else milieu
+                if self.rang[u] < self.rang[v]:
+                    montantes[u].append((v, w, milieu))
+                else:
+                    descendantes[v].append((u, w, milieu))
+        self.montantes = _vers_csr(montantes)
+        self.descendantes = _vers_csr(descendantes)
+        del self._sortants, self._entrants
+
+    @classmethod
+    def depuis_tableaux(cls, graphe: GrapheCompact, critere: str, departage: Optional[str],
+                        rang, montantes: Tuple, descendantes: Tuple) -> 'HierarchieContraction':
+        """Reconstitue une hiérarchie déjà calculée (par exemple depuis un snapshot)"""
+        hierarchie = cls.__new__(cls)
+        hierarchie.graphe = graphe
+        hierarchie.critere = critere
+        hierarchie.departage = departage
+        hierarchie.rang = rang
+        hierarchie.montantes = montantes
+        hierarchie.descendantes = descendantes
+        return hierarchie
+
+    # --- PRÉTRAITEMENT ---
+
+    def _contracter(self, n: int):
+        """Contracte tous les nœuds selon une file de priorité à mise à jour paresseuse"""
+        contractes = [False] * n
+        voisins_contractes = [0] * n
+        file = [(self._priorite(v, contractes, voisins_contractes), v) for v in range(n)]
+        heapq.heapify(file)
+        ordre = 0
+
+        while file:
+            _, v = heapq.heappop(file)
+            if contractes[v]:
+                continue
+            priorite = self._priorite(v, contractes, voisins_contractes)
+            if file and priorite > file[0][0]:
+                heapq.heappush(file, (priorite, v))
+                continue
+
+            for u, x, w in self._raccourcis(v, contractes):
+                actuel = self._sortants[u].get(x)
+                if actuel is None or w < actuel[0]:
+                    self._sortants[u][x] = (w, v)
+                    self._entrants[x][u] = (w, v)
+
+            contractes[v] = True
+            self.rang[v] = ordre
+            ordre += 1
+            for voisin in set(self._sortants[v]) | set(self._entrants[v]):
+                if not contractes[voisin]:
+                    voisins_contractes[voisin] += 1
+
+    def _contracter_dans_ordre(self, rang: Sequence[int]):
+        """Contracte les nœuds dans l'ordre imposé (rang croissant), sans calcul de priorité"""
+        n = len(rang)
+        contractes = [False] * n
+        for v in sorted(range(n), key=rang.__getitem__):
+            for u, x, w in self._raccourcis(v, contractes):
+                actuel = self._sortants[u].get(x)
+                if actuel is None or w < actuel[0]:
+                    self._sortants[u][x] = (w, v)
+                    self._entrants[x][u] = (w, v)
+            contractes[v] = True
+            self.rang[v] = rang[v]
+
+    def _priorite(self, v: int, contractes: List[bool], voisins_contractes: List[int]) -> int:
+        """Différence d'arêtes (raccourcis ajoutés - arêtes supprimées) + voisins déjà contractés"""
+        nb_raccourcis = len(self._raccourcis(v, contractes))
+        nb_entrants = sum(1 for u in self._entrants[v] if not contractes[u])
+        nb_sortants = sum(1 for x in self._sortants[v] if not contractes[x])
+        return nb_raccourcis - nb_entrants - nb_sortants + voisins_contractes[v]
+
+    def _raccourcis(self, v: int, contractes: List[bool]) -> List[Tuple[int, int, float]]:
+        """Raccourcis nécessaires pour contracter v (u -> v -> x sans chemin témoin)"""
+        entrants = [(u, w) for u, (w, _) in self._entrants[v].items() if not contractes[u]]
+        sortants = [(x, w) for x, (w, _) in self._sortants[v].items() if not contractes[x]]
+        if not entrants or not sortants:
+            return []
+
+        max_sortant = max(w for _, w in sortants)
+        raccourcis = []
+        for u, w_uv in entrants:
+            distances = self._recherche_temoin(u, v, w_uv + max_sortant, contractes)
+            for x, w_vx in sortants:
+                if x == u:
+                    continue
+                w = w_uv + w_vx
+                if distances.get(x, INFINI) > w:
+                    raccourcis.append((u, x, w))
+        return raccourcis
+
+    def _recherche_temoin(self, source: int, exclu: int, limite: float,
+                          contractes: List[bool]) -> Dict[int, float]:
+        """Dijkstra borné depuis source, sans passer par le nœud en cours de contraction"""
+        distances = {source: 0.0}
+        file = [(0.0, source)]
+        explores = 0
+        while file and explores < self.LIMITE_TEMOIN:
+            d, u = heapq.heappop(file)
+            if d > distances.get(u, INFINI):
+                continue
+            if d > limite:
+                break
+            explores += 1
+            for x, (w, _) in self._sortants[u].items():
+                if x == exclu or contractes[x]:
+                    continue
+                nd = d + w
+                if nd < distances.get(x, INFINI):
+                    distances[x] = nd
+                    heapq.heappush(file, (nd, x))
+        return distances
+
+    # --- REQUÊTES ---
+
+    def plus_court_chemin(self, source: int, cible: int,
+                          statistiques: Optional[Dict] = None) -> Optional[Tuple[float, List[int]]]:
+        """Retourne (coût, liste des nœuds) du plus court chemin, ou None s'il n'existe pas"""
+        if source == cible:
+            _comptabiliser(statistiques, 1, 0)
+            return 0.0, [source]
+        explores = relachees = 0
+
+        dist_avant = {source: 0.0}
+        dist_arriere = {cible: 0.0}
+        parent_avant = {source: None}
+        parent_arriere = {cible: None}
+        file_avant = [(0.0, source)]
+        file_arriere = [(0.0, cible)]
+        meilleur = INFINI
+        rencontre = None
+
+        while file_avant or file_arriere:
+            # Chaque sens s'arrête dès que sa plus petite clé dépasse le meilleur coût connu
+            if file_avant and file_avant[0][0] >= meilleur:
+                file_avant = []
+            if file_arriere and file_arriere[0][0] >= meilleur:
+                file_arriere = []
+
+            for file, dist, parent, autre, (offsets, cibles, poids, _) in (
+                (file_avant, dist_avant, parent_avant, dist_arriere, self.montantes),
+                (file_arriere, dist_arriere, parent_arriere, dist_avant, self.descendantes),
+            ):
+                if not file:
+                    continue
+                d, u = heapq.heappop(file)
+                if d > dist[u]:
+                    continue
+                explores += 1
+                if u in autre and d + autre[u] < meilleur:
+                    meilleur = d + autre[u]
+                    rencontre = u
+                for k in range(offsets[u], offsets[u + 1]):
+                    v = cibles[k]
+                    nd = d + poids[k]
+                    relachees += 1
+                    if nd < dist.get(v, INFINI):
+                        dist[v] = nd
+                        parent[v] = u
+                        heapq.heappush(file, (nd, v))
+
+        _comptabiliser(statistiques, explores, relachees)
+        if rencontre is None:
+            return None
+
+        # Reconstruction : source -> rencontre (avant) puis rencontre -> cible (arrière)
+        chemin_ch = []
+        u = rencontre
+        while u is not None:
+            chemin_ch.append(u)
+            u = parent_avant[u]
+        chemin_ch.reverse()
+        u = parent_arriere[rencontre]
+        while u is not None:
+            chemin_ch.append(u)
+            u = parent_arriere[u]
+
+        chemin = self._deplier(chemin_ch)
+        if self.departage is None:
+            return meilleur, chemin
+        return self.graphe.cout_chemin(chemin, self.critere), chemin
+
+    def _deplier(self, chemin_ch: List[int]) -> List[int]:
+        """Remplace récursivement chaque raccourci par les deux arêtes qu'il représente"""
+        chemin = [chemin_ch[0]]
+        pile = [(chemin_ch[i], chemin_ch[i + 1]) for i in range(len(chemin_ch) - 2, -1, -1)]
+        while pile:
+            u, v = pile.pop()
+            milieu = self._milieu(u, v)
+            if milieu < 0:
+                chemin.append(v)
+            else:
+                pile.append((milieu, v))
+                pile.append((u, milieu))
+        return chemin
+
+
+    def _milieu(self, u: int, v: int) -> int:
+        """Nœud contourné par l'arête u -> v de la hiérarchie (-1 pour une arête originale)"""
+        if self.rang[u] < self.rang[v]:
+            offsets, cibles, _, milieux = self.montantes
+            origine, extremite = u, v
+        else:
+            offsets, cibles, _, milieux = self.descendantes
+            origine, extremite = v, u
+        for k in range(offsets[origine], offsets[origine + 1]):
+            if cibles[k] == extremite:
+                return milieux[k]
+        return -1
+
+
+def _vers_csr(listes: List[List[Tuple[int, float, int]]]) -> Tuple[array, array, array, array]:
+    """Convertit des listes d'adjacence (cible, poids, milieu) en tableaux CSR"""
+    offsets = array('I', [0])
+    cibles = array('I')
+    poids = array('d')
+    milieux = array('i')
+    for aretes in listes:
+        for v, w, milieu in aretes:
+            cibles.append(v)
+            poids.append(w)
+            milieux.append(milieu)
+        offsets.append(len(cibles))
+    return offsets, cibles, poids, milieux
+
+
+class HierarchiePersonnalisable(HierarchieContraction):
+    """
+    Hiérarchie de contraction personnalisable (Customizable Contraction Hierarchies).
+
+    Sa structure ne dépend pas des poids : les nœuds sont ordonnés par
+    dissection emboîtée géographique, puis éliminés dans cet ordre en reliant
+    tous leurs voisins supérieurs, sans recherche de témoin. Les poids des
+    arcs sont ensuite calculés par la personnalisation, qui parcourt les
+    triangles inférieurs de bas en haut. Quand seuls quelques poids d'arêtes
+    changent (trafic), seuls les arcs qui peuvent en dépendre sont recalculés.
+
+    Les requêtes sont celles de HierarchieContraction : montantes et
+    descendantes partagent offsets et cibles (un arc par couple de voisins,
+    vers le nœud de rang supérieur), avec le poids de chacun des deux sens.
+    """
+
+    # Taille des cellules de la dissection en deçà de laquelle les nœuds sont
+    # ordonnés par degré croissant plutôt que séparés
+    TAILLE_FEUILLE = 16
+
+    def __init__(self, graphe: GrapheCompact, critere: str, departage: Optional[str] = None,
+                 rang: Optional[Sequence[int]] = None):
+        """rang (optionnel) : ordre d'élimination imposé, sinon celui de la dissection emboîtée"""
+        self.graphe = graphe
+        self.critere = critere
+        self.departage = departage
+        n = graphe.nombre_noeuds
+        voisins: List[set] = [set() for _ in range(n)]
+        for e in range(graphe.nombre_aretes):
+            u, v = graphe.sources[e], graphe.cibles[e]
+            if u != v:
+                voisins[u].add(v)
+                voisins[v].add(u)
+
+        if rang is None:
+            ordre = _ordre_dissection(graphe, voisins, self.TAILLE_FEUILLE)
+            rang = array('I', bytes(4 * n))
+            for position, v in enumerate(ordre):
+                rang[v] = position
+        else:
+            rang = array('I', rang)
+            ordre = sorted(range(n), key=rang.__getitem__)
+        self.rang = rang
+
+        # Élimination symbolique : les voisins supérieurs d'un nœud éliminé sont
+        # transmis au plus bas d'entre eux, ce qui en fait une clique
+        superieurs = [{v for v in voisins[u] if rang[v] > rang[u]} for u in range(n)]
+        for u in ordre:
+            if len(superieurs[u]) > 1:
+                parent = min(superieurs[u], key=rang.__getitem__)
+                superieurs[parent].update(v for v in superieurs[u] if v != parent)
+
+        offsets = array('I', [0])
+        cibles = array('I')
+        for u in range(n):
+            cibles.extend(sorted(superieurs[u]))
+            offsets.append(len(cibles))
+        nombre_arcs = len(cibles)
+        self.montantes = (offsets, cibles, array('d', [INFINI]) * nombre_arcs, array('i', [-1]) * nombre_arcs)
+        self.descendantes = (offsets, cibles, array('d', [INFINI]) * nombre_arcs, array('i', [-1]) * nombre_arcs)
+        self._personnaliser_tout(ordre)
+
+    # --- STRUCTURE ---
+
+    def _position(self, u: int, v: int) -> int:
+        """Position de l'arc entre u et v (u de rang inférieur), -1 s'il n'existe pas"""
+        offsets, cibles = self.montantes[0], self.montantes[1]
+        fin = offsets[u + 1]
+        k = bisect_left(cibles, v, offsets[u], fin)
+        return k if k < fin and cibles[k] == v else -1
+
+    def _inferieurs(self) -> List[List[Tuple[int, int]]]:
+        """(voisin inférieur, position de l'arc) de chaque nœud, partagés par les hiérarchies du même réseau"""
+        inferieurs = self.__dict__.get('_liste_inferieurs')
+        if inferieurs is None:
+            offsets, cibles = self.montantes[0], self.montantes[1]
+            inferieurs = [[] for _ in range(len(offsets) - 1)]
+            for u in range(len(offsets) - 1):
+                for k in range(offsets[u], offsets[u + 1]):
+                    inferieurs[cibles[k]].append((u, k))
+            self._liste_inferieurs = inferieurs
+        return inferieurs
+
+    def _milieu(self, u: int, v: int) -> int:
+        if self.rang[u] < self.rang[v]:
+            k = self._position(u, v)
+            return self.montantes[3][k] if k >= 0 else -1
+        k = self._position(v, u)
+        return self.descendantes[3][k] if k >= 0 else -1
+
+    # --- PERSONNALISATION ---
+
+    def _poids_arete(self, e: int) -> float:
+        """Poids de recherche d'une arête (critère, plus le départage éventuel)"""
+        poids = self.graphe.poids
+        if self.departage is None:
+            return poids[self.critere][e]
+        return poids[self.critere][e] + FACTEUR_DEPARTAGE * poids[self.departage][e]
+
+    def _personnaliser_tout(self, ordre: Sequence[int]):
+        """Poids de tous les arcs : arêtes d'origine, puis triangles inférieurs dans l'ordre d'élimination"""
+        graphe, rang = self.graphe, self.rang
+        offsets, cibles, montant, milieux_montants = self.montantes
+        descendant, milieux_descendants = self.descendantes[2], self.descendantes[3]
+        poids = poids_avec_departage(graphe, self.critere, self.departage)
+        for e in range(graphe.nombre_aretes):
+            u, v = graphe.sources[e], graphe.cibles[e]
+            if u == v:
+                continue
+            if rang[u] < rang[v]:
+                k = self._position(u, v)
+                montant[k] = min(montant[k], poids[e])
+            else:
+                k = self._position(v, u)
+                descendant[k] = min(descendant[k], poids[e])
+
+        for x in ordre:
+            debut, fin = offsets[x], offsets[x + 1]
+            for i in range(debut, fin):
+                for j in range(i + 1, fin):
+                    y, z = cibles[i], cibles[j]
+                    if rang[y] > rang[z]:
+                        i_bas, i_haut, bas, haut = j, i, z, y
+                    else:
+                        i_bas, i_haut, bas, haut = i, j, y, z
+                    # L'arc existe : les voisins supérieurs de x forment une clique
+                    k = bisect_left(cibles, haut, offsets[bas], offsets[bas + 1])
+                    # bas -> x -> haut, puis haut -> x -> bas
+                    w = descendant[i_bas] + montant[i_haut]
+                    if w < montant[k]:
+                        montant[k] = w
+                        milieux_montants[k] = x
+                    w = descendant[i_haut] + montant[i_bas]
+                    if w < descendant[k]:
+                        descendant[k] = w
+                        milieux_descendants[k] = x
+
+    def personnaliser(self, graphe: GrapheCompact, aretes: Iterable[int]) -> 'HierarchiePersonnalisable':
+        """
+        Hiérarchie du même réseau avec les poids de graphe (même topologie), où
+        seules les arêtes données ont changé. Les poids des arcs sont recopiés
+        puis seuls les arcs touchés sont recalculés, de bas en haut : l'arc des
+        arêtes modifiées, puis ceux dont un triangle inférieur a changé. La
+        hiérarchie courante reste inchangée et utilisable pendant ce temps.
+        """
+        hierarchie = HierarchiePersonnalisable.__new__(HierarchiePersonnalisable)
+        hierarchie.graphe = graphe
+        hierarchie.critere = self.critere
+        hierarchie.departage = self.departage
+        hierarchie.rang = rang = self.rang
+        offsets, cibles = self.montantes[0], self.montantes[1]
+        hierarchie.montantes = (offsets, cibles, array('d', self.montantes[2]), array('i', self.montantes[3]))
+        hierarchie.descendantes = (offsets, cibles, array('d', self.descendantes[2]),
+                                   array('i', self.descendantes[3]))
+        hierarchie._liste_inferieurs = inferieurs = self._inferieurs()
+        montant, milieux_montants = hierarchie.montantes[2], hierarchie.montantes[3]
+        descendant, milieux_descendants = hierarchie.descendantes[2], hierarchie.descendantes[3]
+
+        # Arcs à recalculer, par rang croissant de leur extrémité inférieure
+        file: List[Tuple[int, int, int, int]] = []
+        en_attente = set()
+
+        def planifier(u: int, v: int):
+            bas, haut = (u, v) if rang[u] < rang[v] else (v, u)
+            k = hierarchie._position(bas, haut)
+            if k not in en_attente:
+                en_attente.add(k)
+                heapq.heappush(file, (rang[bas], k, bas, haut))
+
+        for e in aretes:
+            if graphe.sources[e] != graphe.cibles[e]:
+                planifier(graphe.sources[e], graphe.cibles[e])
+
+        while file:
+            _, k, bas, haut = heapq.heappop(file)
+            en_attente.discard(k)
+            w_montant = min((hierarchie._poids_arete(e) for e in graphe.aretes_entre(bas, haut)), default=INFINI)
+            w_descendant = min((hierarchie._poids_arete(e) for e in graphe.aretes_entre(haut, bas)), default=INFINI)
+            m_montant = m_descendant = -1
+            for x, k_bas in inferieurs[bas]:
+                fin = offsets[x + 1]
+                k_haut = bisect_left(cibles, haut, offsets[x], fin)
+                if k_haut == fin or cibles[k_haut] != haut:
+                    continue
+                w = descendant[k_bas] + montant[k_haut]
+                if w < w_montant:
+                    w_montant, m_montant = w, x
+                w = descendant[k_haut] + montant[k_bas]
+                if w < w_descendant:
+                    w_descendant, m_descendant = w, x
+            change = w_montant != montant[k] or w_descendant != descendant[k]
+            montant[k], milieux_montants[k] = w_montant, m_montant
+            descendant[k], milieux_descendants[k] = w_descendant, m_descendant
+            if change:
+                # L'arc est un côté des triangles inférieurs des arcs (haut, z)
+                for j in range(offsets[bas], offsets[bas + 1]):
+                    if cibles[j] != haut:
+                        planifier(haut, cibles[j])
+        return hierarchie
+
+
+def _ordre_dissection(graphe: GrapheCompact, voisins: List[set], taille_feuille: int) -> List[int]:
+    """
+    Ordre d'élimination par dissection emboîtée géographique : chaque cellule
+    est coupée à la médiane de son plus grand côté, les nœuds d'un côté qui
+    touchent l'autre forment le séparateur, placé après les deux moitiés.
+    """
+    ordre: List[int] = []
+    cos_lat = math.cos(math.radians(sum(graphe.lat) / graphe.nombre_noeuds)) if graphe.nombre_noeuds else 1.0
+    # Pile de (cellule, séparateur à placer après elle) ; une cellule déjà traitée vaut None
+    pile: List[Tuple[Optional[List[int]], List[int]]] = [(list(range(graphe.nombre_noeuds)), [])]
+    while pile:
+        cellule, separateur = pile.pop()
+        if cellule is None:
+            ordre.extend(separateur)
+            continue
+        if len(cellule) <= taille_feuille:
+            ordre.extend(sorted(cellule, key=lambda v: len(voisins[v])))
+            ordre.extend(separateur)
+            continue
+        etendue_lat = max(graphe.lat[v] for v in cellule) - min(graphe.lat[v] for v in cellule)
+        etendue_lon = (max(graphe.lon[v] for v in cellule) - min(graphe.lon[v] for v in cellule)) * cos_lat
+        coordonnees = graphe.lat if etendue_lat >= etendue_lon else graphe.lon
+        cellule.sort(key=coordonnees.__getitem__)
+        gauche, droite = cellule[:len(cellule) // 2], cellule[len(cellule) // 2:]
+        cote_droit = set(droite)
+        bord_gauche = {v for v in gauche if any(w in cote_droit for w in voisins[v])}
+        cote_gauche = set(gauche)
+        bord_droit = {v for v in droite if any(w in cote_gauche for w in voisins[v])}
+        coupe = bord_gauche if len(bord_gauche) <= len(bord_droit) else bord_droit
+        pile.append((None, separateur + sorted(coupe, key=lambda v: len(voisins[v]))))
+        pile.append(([v for v in droite if v not in coupe], []))
+        pile.append(([v for v in gauche if v not in coupe], []))
+    return ordre
+
+
+# --- DIJKSTRA ---
+
+def _remonter(parents: Dict[int, Optional[int]], u: int) -> List[int]:
+    """Chemin de la racine de l'arbre des parents jusqu'à u"""
+    chemin = []
+    while u is not None:
+        chemin.append(u)
+        u = parents[u]
+    chemin.reverse()
+    return chemin
+
+
+def dijkstra(graphe: GrapheCompact, source: int, cible: int, critere: str,
+             noeuds_exclus=frozenset(), aretes_exclues=frozenset(),
+             statistiques: Optional[Dict] = None) -> Optional[Tuple[float, List[int]]]:
+    """Dijkstra point à point, en ignorant les nœuds et arêtes exclus"""
+    distances = {source: 0.0}
+    parents = {source: None}
+    file = [(0.0, source)]
+    explores = relachees = 0
+    while file:
+        d, u = heapq.heappop(file)
+        if d > distances[u]:
+            continue
+        explores += 1
+        if u == cible:
+            _comptabiliser(statistiques, explores, relachees)
+            return d, _remonter(parents, u)
+        for v, w in graphe.successeurs(u, critere):
+            if v in noeuds_exclus or (u, v) in aretes_exclues:
+                continue
+            relachees += 1
+            nd = d + w
+            if nd < distances.get(v, INFINI):
+                distances[v] = nd
+                parents[v] = u
+                heapq.heappush(file, (nd, v))
+    _comptabiliser(statistiques, explores, relachees)
+    return None
+
+
+# --- A* ---
+
+Heuristique = Callable[[int], float]
+
+
+def astar(graphe: GrapheCompact, source: int, cible: int, critere: str, heuristique: Heuristique,
+          poids: Optional[Sequence[float]] = None,
+          statistiques: Optional[Dict] = None) -> Optional[Tuple[float, List[int]]]:
+    """
+    A* point à point. L'heuristique (minorant cohérent du coût restant jusqu'à
+    la cible) oriente la recherche : le résultat est celui de Dijkstra, mais
+    seuls les nœuds « en direction » de la cible sont explorés.
+
+    poids : poids de recherche par arête (par défaut ceux du critère, voir
+    poids_avec_departage) ; le coût retourné est toujours celui du critère.
+    """
+    exact = poids is None
+    if exact:
+        poids = graphe.poids[critere]
+    offsets, cibles = graphe.offsets, graphe.cibles
+    distances = {source: 0.0}
+    parents = {source: None}
+    file = [(heuristique(source), 0.0, source)]
+    explores = relachees = 0
+    while file:
+        _, d, u = heapq.heappop(file)
+        if d > distances[u]:
+            continue
+        explores += 1
+        if u == cible:
+            _comptabiliser(statistiques, explores, relachees)
+            chemin = _remonter(parents, u)
+            return (d if exact else graphe.cout_chemin(chemin, critere)), chemin
+        for e in range(offsets[u], offsets[u + 1]):
+            v = cibles[e]
+            relachees += 1
+            nd = d + poids[e]
+            if nd < distances.get(v, INFINI):
+                distances[v] = nd
+                parents[v] = u
+                heapq.heappush(file, (nd + heuristique(v), nd, v))
+    _comptabiliser(statistiques, explores, relachees)
+    return None
+
+
+def astar_bidirectionnel(graphe: GrapheCompact, source: int, cible: int, critere: str,
+                         vers_cible: Heuristique, depuis_source: Heuristique,
+                         poids: Optional[Sequence[float]] = None,
+                         statistiques: Optional[Dict] = None) -> Optional[Tuple[float, List[int]]]:
+    """
+    A* bidirectionnel à potentiel moyen : p(v) = (vers_cible(v) - depuis_source(v)) / 2
+    pour la recherche avant et -p(v) pour la recherche arrière, ce qui garde les
+    deux potentiels cohérents. On s'arrête quand la somme des deux plus petites
+    clés atteint le meilleur coût trouvé.
+    """
+    if source == cible:
+        _comptabiliser(statistiques, 1, 0)
+        return 0.0, [source]
+
+    exact = poids is None
+    if exact:
+        poids = graphe.poids[critere]
+    offsets, cibles = graphe.offsets, graphe.cibles
+    offsets_entrants, aretes_entrantes, sources = graphe.offsets_entrants, graphe.aretes_entrantes, graphe.sources
+    potentiels: Dict[int, float] = {}
+
+    def potentiel(v: int) -> float:
+        p = potentiels.get(v)
+        if p is None:
+            p = potentiels[v] = (vers_cible(v) - depuis_source(v)) / 2
+        return p
+
+    dist_avant = {source: 0.0}
+    dist_arriere = {cible: 0.0}
+    parent_avant = {source: None}
+    parent_arriere = {cible: None}
+    file_avant = [(potentiel(source), source)]
+    file_arriere = [(-potentiel(cible), cible)]
+    meilleur = INFINI
+    rencontre = None
+    explores = relachees = 0
+
+    while file_avant and file_arriere:
+        if file_avant[0][0] + file_arriere[0][0] >= meilleur:
+            break
+        if file_avant[0][0] <= file_arriere[0][0]:
+            cle, u = heapq.heappop(file_avant)
+            d = dist_avant[u]
+            if cle > d + potentiel(u):
+                continue
+            explores += 1
+            for e in range(offsets[u], offsets[u + 1]):
+                v = cibles[e]
+                relachees += 1
+                nd = d + poids[e]
+                if nd < dist_avant.get(v, INFINI):
+                    dist_avant[v] = nd
+                    parent_avant[v] = u
+                    heapq.heappush(file_avant, (nd + potentiel(v), v))
+                    if v in dist_arriere and nd + dist_arriere[v] < meilleur:
+                        meilleur = nd + dist_arriere[v]
+                        rencontre = v
+        else:
+            cle, v = heapq.heappop(file_arriere)
+            d = dist_arriere[v]
+            if cle > d - potentiel(v):
+                continue
+            explores += 1
+            for k in range(offsets_entrants[v], offsets_entrants[v + 1]):
+                e = aretes_entrantes[k]
+                u = sources[e]
+                relachees += 1
+                nd = d + poids[e]
+                if nd < dist_arriere.get(u, INFINI):
+                    dist_arriere[u] = nd
+                    parent_arriere[u] = v
+                    heapq.heappush(file_arriere, (nd - potentiel(u), u))
+                    if u in dist_avant and nd + dist_avant[u] < meilleur:
+                        meilleur = nd + dist_avant[u]
+                        rencontre = u
+
+    _comptabiliser(statistiques, explores, relachees)
+    if rencontre is None:
+        return None
+    chemin = _remonter(parent_avant, rencontre)
+    u = parent_arriere[rencontre]
+    while u is not None:
+        chemin.append(u)
+        u = parent_arriere[u]
+    return (meilleur if exact else graphe.cout_chemin(chemin, critere)), chemin
+
+
+# --- DÉPENDANT DU TEMPS ---
+
+def astar_horaire(graphe: GrapheCompact, source: int, cible: int, depart: float,
+                  temps_libres: Sequence[float], profils: ProfilsHoraires, heuristique: Heuristique,
+                  statistiques: Optional[Dict] = None) -> Optional[Tuple[float, List[int]]]:
+    """
+    A* sur les heures d'arrivée : le temps de parcours de l'arête e, abordée à
+    l'instant t (minutes depuis minuit), vaut temps_libres[e] × facteur du
+    profil de e à l'instant t. L'heuristique doit minorer le temps restant
+    quelle que soit l'heure. Retourne (heure d'arrivée, chemin), ou None.
+    """
+    offsets, cibles = graphe.offsets, graphe.cibles
+    facteurs, profil_arete = profils.facteurs, profils.profil_arete
+    duree_intervalle = DUREE_INTERVALLE
+    arrivees = {source: depart}
+    parents = {source: None}
+    file = [(depart + heuristique(source), depart, source)]
+    explores = relachees = 0
+    while file:
+        _, t, u = heapq.heappop(file)
+        if t > arrivees[u]:
+            continue
+        explores += 1
+        if u == cible:
+            _comptabiliser(statistiques, explores, relachees)
+            return t, _remonter(parents, u)
+        # Position dans la journée, commune à toutes les arêtes sortantes de u
+        x = (t % MINUTES_PAR_JOUR) / duree_intervalle - 0.5
+        i = int(x // 1)
+        f = x - i
+        i0 = i % NB_INTERVALLES
+        i1 = (i + 1) % NB_INTERVALLES
+        for e in range(offsets[u], offsets[u + 1]):
+            libre = temps_libres[e]
+            if libre == INFINI:
+                continue
+            relachees += 1
+            p = profil_arete[e] * NB_INTERVALLES
+            nt = t + libre * (facteurs[p + i0] * (1 - f) + facteurs[p + i1] * f)
+            v = cibles[e]
+            if nt < arrivees.get(v, INFINI):
+                arrivees[v] = nt
+                parents[v] = u
+                heapq.heappush(file, (nt + heuristique(v), nt, v))
+    _comptabiliser(statistiques, explores, relachees)
+    return None
+
+
+# --- UN VERS PLUSIEURS ---
+
+def un_vers_plusieurs(graphe: GrapheCompact, source: int, cibles: Sequence[int], critere: str,
+                      poids: Optional[Sequence[float]] = None) -> Dict[str, List[float]]:
+    """
+    Coûts des plus courts chemins (selon critere) de source vers chaque cible,
+    par un seul Dijkstra arrêté dès que toutes les cibles sont fixées.
+
+    Retourne, pour chaque critère du graphe, la liste des coûts le long des
+    chemins retenus (INFINI pour une cible inaccessible), dans l'ordre de cibles.
+    """
+    if poids is None:
+        poids = graphe.poids[critere]
+    offsets, successeurs = graphe.offsets, graphe.cibles
+    n = graphe.nombre_noeuds
+    # Tableaux indexés par nœud plutôt que dictionnaires : la recherche couvre
+    # en général une grande partie du graphe
+    distances = [INFINI] * n
+    arete_parent = [-1] * n
+    restantes = bytearray(n)
+    for v in cibles:
+        restantes[v] = 1
+    nb_restantes = sum(restantes)
+    distances[source] = 0.0
+    fixes = []
+    file = [(0.0, source)]
+    pousser, extraire = heapq.heappush, heapq.heappop
+    while file and nb_restantes:
+        d, u = extraire(file)
+        if d > distances[u]:
+            continue
+        fixes.append(u)
+        if restantes[u]:
+            restantes[u] = 0
+            nb_restantes -= 1
+        for e in range(offsets[u], offsets[u + 1]):
+            v = successeurs[e]
+            nd = d + poids[e]
+            if nd < distances[v]:
+                distances[v] = nd
+                arete_parent[v] = e
+                pousser(file, (nd, v))
+
+    # Cumul de chaque critère le long de l'arbre, dans l'ordre où les nœuds ont été fixés
+    couts = {}
+    sources = graphe.sources
+    for nom, valeurs in graphe.poids.items():
+        cumuls = [INFINI] * n
+        cumuls[source] = 0.0
+        for v in fixes[1:]:
+            e = arete_parent[v]
+            cumuls[v] = cumuls[sources[e]] + valeurs[e]
+        couts[nom] = [cumuls[v] for v in cibles]
+    return couts
+
+
+def distances_depuis(graphe: GrapheCompact, sources: Sequence[int], poids: Sequence[float],
+                     borne: float = INFINI, inverse: bool = False) -> List[float]:
+    """
+    Coût minimal depuis l'ensemble des sources vers chaque nœud (INFINI au-delà
+    de borne ou si inaccessible). Avec inverse, les arêtes sont parcourues à
+    rebours : coût minimal de chaque nœud vers l'une des sources.
+    """
+    if inverse:
+        offsets, adjacence, extremites = graphe.offsets_entrants, graphe.aretes_entrantes, graphe.sources
+    else:
+        offsets, adjacence, extremites = graphe.offsets, None, graphe.cibles
+    distances = [INFINI] * graphe.nombre_noeuds
+    file = []
+    for s in sources:
+        distances[s] = 0.0
+        file.append((0.0, s))
+    heapq.heapify(file)
+    pousser, extraire = heapq.heappush, heapq.heappop
+    while file:
+        d, u = extraire(file)
+        if d > distances[u]:
+            continue
+        for k in range(offsets[u], offsets[u + 1]):
+            e = adjacence[k] if inverse else k
+            nd = d + poids[e]
+            v = extremites[e]
+            if nd < distances[v] and nd <= borne:
+                distances[v] = nd
+                pousser(file, (nd, v))
+    return distances
+
+
+# --- FRONT DE PARETO ---
+
+def front_pareto(graphe: GrapheCompact, source: int, cible: int, poids: Sequence[Sequence[float]],
+                 limite: int = 200000,
+                 statistiques: Optional[Dict] = None) -> Tuple[List[Tuple[Tuple[float, ...], List[int], List[int]]], bool]:
+    """
+    Itinéraires non dominés de source à cible selon plusieurs critères à la
+    fois (un tableau de poids par critère), par une seule recherche à étiquettes.
+
+    Les étiquettes sont traitées dans l'ordre lexicographique de leur coût
+    augmenté d'un minorant du coût restant (Dijkstra inverse par critère) :
+    une étiquette extraite n'est jamais dominée par une étiquette ultérieure du
+    même nœud. Une étiquette est élaguée dès qu'une étiquette fixée de son nœud,
+    ou un itinéraire déjà trouvé (compte tenu du minorant), la domine.
+
+    Retourne ([(coûts, nœuds, arêtes)], complet), complet valant False si la
+    recherche s'est arrêtée après limite étiquettes fixées.
+    """
+    nb_criteres = len(poids)
+    minorants = [distances_depuis(graphe, [cible], p, inverse=True) for p in poids]
+    offsets, successeurs = graphe.offsets, graphe.cibles
+    # Étiquettes : coûts, nœud, étiquette parente et arête empruntée
+    couts: List[Tuple[float, ...]] = [(0.0,) * nb_criteres]
+    noeuds = [source]
+    parents = [-1]
+    aretes = [-1]
+    fixees: Dict[int, List[Tuple[float, ...]]] = {}
+    front: List[int] = []
+    file = [(tuple(m[source] for m in minorants), 0)]
+    explores = relachees = 0
+    complet = True
+
+    def domine(a: Tuple[float, ...], b: Tuple[float, ...]) -> bool:
+        return all(x <= y for x, y in zip(a, b))
+
+    def domine_par_front(estimation: Tuple[float, ...]) -> bool:
+        return any(domine(couts[f], estimation) for f in front)
+
+    if INFINI in file[0][0]:
+        _comptabiliser(statistiques, explores, relachees)
+        return [], complet
+    while file:
+        estimation, etiquette = heapq.heappop(file)
+        u, c = noeuds[etiquette], couts[etiquette]
+        sac = fixees.setdefault(u, [])
+        if any(domine(autre, c) for autre in sac) or domine_par_front(estimation):
+            continue
+        if explores >= limite:
+            complet = False
+            break
+        sac.append(c)
+        explores += 1
+        if u == cible:
+            front.append(etiquette)
+            continue
+        for e in range(offsets[u], offsets[u + 1]):
+            relachees += 1
+            v = successeurs[e]
+            nc = tuple(c[i] + poids[i][e] for i in range(nb_criteres))
+            ne = tuple(nc[i] + minorants[i][v] for i in range(nb_criteres))
+            # Arête fermée, ou cible inaccessible depuis v
+            if INFINI in ne or domine_par_front(ne) or any(domine(autre, nc) for autre in fixees.get(v, ())):
+                continue
+            couts.append(nc)
+            noeuds.append(v)
+            parents.append(etiquette)
+            aretes.append(e)
+            heapq.heappush(file, (ne, len(couts) - 1))
+
+    _comptabiliser(statistiques, explores, relachees)
+    itineraires = []
+    for etiquette in front:
+        chemin, empruntees = [], []
+        k = etiquette
+        while k != -1:
+            chemin.append(noeuds[k])
+            if aretes[k] != -1:
+                empruntees.append(aretes[k])
+            k = parents[k]
+        itineraires.append((couts[etiquette], chemin[::-1], empruntees[::-1]))
+    return itineraires, complet
+
+
+# --- ITINÉRAIRES ALTERNATIFS (PLATEAUX) ---
+
+def _arbre_borne(graphe: GrapheCompact, racine: int, poids: Sequence[float], borne: float,
+                 inverse: bool = False, cible: Optional[int] = None, etirement: float = 1.0,
+                 compteurs: Optional[List[int]] = None) -> Tuple[Dict[int, float], Dict[int, int], float]:
+    """
+    Arbre des plus courts chemins depuis racine (vers racine avec inverse),
+    limité aux coûts ≤ borne : distances et arête parente de chaque nœud
+    atteint. Si cible est donnée, la borne devient etirement fois son coût dès
+    qu'elle est fixée. Retourne (distances, parents, borne finale).
+    """
+    if inverse:
+        offsets, adjacence, extremites = graphe.offsets_entrants, graphe.aretes_entrantes, graphe.sources
+    else:
+        offsets, adjacence, extremites = graphe.offsets, None, graphe.cibles
+    distances = {racine: 0.0}
+    parents: Dict[int, int] = {}
+    file = [(0.0, racine)]
+    explores = relachees = 0
+    while file:
+        d, u = heapq.heappop(file)
+        if d > distances[u]:
+            continue
+        if d > borne:
+            break
+        explores += 1
+        if u == cible:
+            borne = min(borne, d * etirement)
+        for k in range(offsets[u], offsets[u + 1]):
+            e = adjacence[k] if inverse else k
+            relachees += 1
+            nd = d + poids[e]
+            v = extremites[e]
+            if nd < distances.get(v, INFINI) and nd <= borne:
+                distances[v] = nd
+                parents[v] = e
+                heapq.heappush(file, (nd, v))
+    if compteurs is not None:
+        compteurs[0] += explores
+        compteurs[1] += relachees
+    return distances, parents, borne
+
+
+def itineraires_alternatifs(graphe: GrapheCompact, source: int, cible: int, poids: Sequence[float],
+                            nombre: int = 3, etirement_max: float = 1.3, partage_max: float = 0.6,
+                            plateau_min: float = 0.2,
+                            statistiques: Optional[Dict] = None) -> List[Tuple[float, List[int], List[int]]]:
+    """
+    Jusqu'à nombre itinéraires de source à cible : le plus court, puis des
+    alternatives nettement différentes, par la méthode des plateaux.
+
+    Deux recherches suffisent : l'arbre des plus courts chemins depuis source
+    et l'arbre inverse vers cible, bornés à etirement_max fois le coût optimal.
+    Une arête présente dans les deux arbres est sur le plus court chemin qui
+    l'emprunte ; une suite de telles arêtes (plateau) désigne un itinéraire
+    « via » optimal sur toute cette portion. Sont retenus, par coût croissant,
+    les itinéraires dont le plateau couvre au moins plateau_min du coût optimal,
+    sans boucle, dont le via n'est sur aucun itinéraire déjà retenu (il en
+    redonnerait un) et qui ne partagent pas plus de partage_max de leur coût
+    avec un itinéraire déjà retenu.
+
+    Retourne [(coût, nœuds, arêtes)], l'itinéraire optimal en premier.
+    """
+    compteurs = [0, 0]
+    avant, parents_avant, borne = _arbre_borne(graphe, source, poids, INFINI, cible=cible,
+                                               etirement=etirement_max, compteurs=compteurs)
+    if cible not in avant:
+        _comptabiliser(statistiques, *compteurs)
+        return []
+    optimal = avant[cible]
+    arriere, parents_arriere, _ = _arbre_borne(graphe, cible, poids, borne, inverse=True, compteurs=compteurs)
+    _comptabiliser(statistiques, *compteurs)
+    sources, cibles = graphe.sources, graphe.cibles
+
+    def chemin_via(via: int) -> Tuple[List[int], List[int]]:
+        aretes = []
+        v = via
+        while v != source:
+            e = parents_avant[v]
+            aretes.append(e)
+            v = sources[e]
+        aretes.reverse()
+        v = via
+        while v != cible:
+            e = parents_arriere[v]
+            aretes.append(e)
+            v = cibles[e]
+        return [source] + [cibles[e] for e in aretes], aretes
+
+    # Arêtes des deux arbres, puis plateaux (suites maximales de ces arêtes)
+    communes = {e for v, e in parents_avant.items() if parents_arriere.get(sources[e]) == e}
+    candidats = []
+    for e in communes:
+        debut = sources[e]
+        if parents_avant.get(debut) in communes:
+            continue
+        fin = cibles[e]
+        while parents_arriere.get(fin) in communes:
+            fin = cibles[parents_arriere[fin]]
+        cout = avant[fin] + arriere[fin]
+        longueur = avant[fin] - avant[debut]
+        if cout <= borne and longueur >= plateau_min * optimal:
+            candidats.append((cout, -longueur, fin))
+    candidats.sort()
+
+    noeuds, aretes = chemin_via(cible)
+    retenus = [(optimal, noeuds, aretes)]
+    ensembles = [set(aretes)]
+    # Nœuds des itinéraires retenus : un via qui en fait partie redonnerait l'un d'eux
+    noeuds_retenus = set(noeuds)
+    for cout, _, via in candidats:
+        if len(retenus) >= nombre:
+            break
+        if via in noeuds_retenus:
+            continue
+        noeuds, aretes = chemin_via(via)
+        ensemble_candidat = set(aretes)
+        if len(set(noeuds)) != len(noeuds) or ensemble_candidat in ensembles:
+            continue
+        if any(sum(poids[e] for e in aretes if e in ensemble) > partage_max * cout for ensemble in ensembles):
+            continue
+        retenus.append((cout, noeuds, aretes))
+        ensembles.append(ensemble_candidat)
+        noeuds_retenus.update(noeuds)
+    return retenus
+
+
+# --- K PLUS COURTS CHEMINS (YEN) ---
+
+def k_plus_courts_chemins(graphe: GrapheCompact, source: int, cible: int, critere: str):
+    """
+    Générateur des chemins sans boucle de source à cible, par coût croissant (algorithme de Yen).
+
+    Chaque nouveau chemin coûte au plus une recherche de Dijkstra par nœud du
+    chemin précédent, soit O(k·V·(E + V log V)) pour les k premiers chemins.
+    """
+    premier = dijkstra(graphe, source, cible, critere)
+    if premier is None:
+        return
+    trouves = [premier[1]]
+    yield premier
+
+    candidats: List[Tuple[float, Tuple[int, ...]]] = []
+    deja_vus = {tuple(premier[1])}
+
+    while True:
+        precedent = trouves[-1]
+        cout_racine = 0.0
+        for i in range(len(precedent) - 1):
+            noeud_deviation = precedent[i]
+            racine = precedent[:i + 1]
+
+            # Les arêtes qui prolongent la même racine dans les chemins déjà trouvés sont interdites
+            aretes_exclues = {
+                (chemin[i], chemin[i + 1]) for chemin in trouves
+                if len(chemin) > i + 1 and chemin[:i + 1] == racine
+            }
+            noeuds_exclus = set(racine[:-1])
+
+            deviation = dijkstra(graphe, noeud_deviation, cible, critere, noeuds_exclus, aretes_exclues)
+            if deviation is not None:
+                chemin = tuple(racine[:-1]) + tuple(deviation[1])
+                if chemin not in deja_vus:
+                    deja_vus.add(chemin)
+                    heapq.heappush(candidats, (cout_racine + deviation[0], chemin))
+
+            cout_racine += graphe.poids_arc(precedent[i], precedent[i + 1], critere)
+
+        if not candidats:
+            return
+        cout, chemin = heapq.heappop(candidats)
+        trouves.append(list(chemin))
+        yield cout, list(chemin)
+
+
+# --- DÉNOMBREMENT ---
+
+def compter_chemins(graphe: GrapheCompact, source: int, cible: int, longueur_max: int) -> int:
+    """
+    Nombre de chemins de source à cible comportant au plus longueur_max arêtes.
+
+    Programmation dynamique sur la longueur en O(longueur_max·E), sans
+    énumérer les chemins. Sur un graphe acyclique le résultat est exactement
+    le nombre de chemins simples ; sinon les marches avec cycles sont aussi
+    comptées et le résultat est un majorant. Les arêtes fermées (temps INFINI)
+    sont ignorées.
+    """
+    temps = graphe.poids['temps']
+    courant = {source: 1}
+    total = 1 if source == cible else 0
+    for _ in range(longueur_max):
+        suivant: Dict[int, int] = {}
+        for u, nombre in courant.items():
+            if u == cible:
+                continue
+            for e in range(graphe.offsets[u], graphe.offsets[u + 1]):
+                if temps[e] == INFINI:
+                    continue
+                v = graphe.cibles[e]
+                suivant[v] = suivant.get(v, 0) + nombre
+        total += suivant.get(cible, 0)
+        courant = suivant
+        if not courant:
+            break
+    return total
@@ -0,0 +1,217 @@
+"""
+Snapshot binaire du réseau préparé, ouvert par mmap au démarrage des workers.
+
+Le fichier contient les tableaux du GrapheCompact (nœuds, adjacence CSR,
+poids, table de chaînes) et les hiérarchies de contraction personnalisables de
+chaque critère.
+À l'ouverture, chaque section devient une vue memoryview typée sur le fichier
+projeté en mémoire : aucune donnée n'est recopiée ni recalculée, et les pages
+en lecture seule sont partagées par tous les processus de la machine.
+
+Construction :
+    python snapshot.py reseau.snap [--reseau data/kinshasa.geojson]
+
+Utilisation par les workers :
+    TRANSPORT_SNAPSHOT=reseau.snap gunicorn app:app
+"""
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Dict, List, Optional, Tuple
+
+from graphe_compact import GrapheCompact
+from routage import HierarchiePersonnalisable
+
+MAGIC = b'KINGRAPH'
+VERSION_FORMAT = 2
+# En-tête : magic, version du format, ordre des octets (1 = petit-boutiste), nombre de sections
+FORMAT_ENTETE = '=8sIII'
+# Section : nom, code de type (array), position dans le fichier, nombre d'éléments
+FORMAT_SECTION = '=32s4sQQ'
+ALIGNEMENT = 8
+
+# Tableaux du GrapheCompact sauvegardés tels quels
+SECTIONS_GRAPHE = (
+    'lat', 'lon', 'noms', 'types', 'descriptions', 'offsets', 'cibles',
+    'noms_routes', 'types_routes', 'vitesses', 'sources', 'offsets_entrants', 'aretes_entrantes',
+)
+
+
+class TableChaines(Sequence):
+    """Table de chaînes UTF-8 lue à la demande dans le snapshot"""
+
+    def __init__(self, octets: memoryview, offsets: memoryview):
+        self._octets = octets
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.octets(i).decode('utf-8')
+
+    def octets(self, i: int) -> bytes:
+        return self._octets[self._offsets[i]:self._offsets[i + 1]].tobytes()
+
+
+class IndexIdentifiants(Mapping):
+    """Index identifiant -> indice de nœud, par recherche dichotomique dans un ordre trié"""
+
+    def __init__(self, ids: TableChaines, ordre: memoryview):
+        self._ids = ids
+        self._ordre = ordre
+
+    def __getitem__(self, node_id) -> int:
+        if not isinstance(node_id, str):
+            raise KeyError(node_id)
+        cle = node_id.encode('utf-8')
+        ordre, ids = self._ordre, self._ids
+        bas, haut = 0, len(ordre)
+        while bas < haut:
+            milieu = (bas + haut) // 2
+            if ids.octets(ordre[milieu]) < cle:
+                bas = milieu + 1
+            else:
+                haut = milieu
+        if bas < len(ordre) and ids.octets(ordre[bas]) == cle:
+            return ordre[bas]
+        raise KeyError(node_id)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+def _table_chaines(chaines) -> Tuple[array, array]:
+    """Encode une liste de chaînes en (octets UTF-8 concaténés, offsets)"""
+    octets = bytearray()
+    offsets = array('Q', [0])
+    for chaine in chaines:
+        octets += chaine.encode('utf-8')
+        offsets.append(len(octets))
+    return array('B', bytes(octets)), offsets
+
+
+def ecrire_snapshot(chemin: str, reseau: GrapheCompact,
+                    hierarchies: Optional[Dict[str, HierarchiePersonnalisable]] = None):
+    """Écrit le réseau (et ses hiérarchies de contraction) dans un fichier snapshot"""
+    sections: List[Tuple[str, str, bytes, int]] = []
+
+    def ajouter(nom: str, typecode: str, valeurs):
+        tableau = valeurs if isinstance(valeurs, array) and valeurs.typecode == typecode else array(typecode, valeurs)
+        sections.append((nom, typecode, tableau.tobytes(), len(tableau)))
+
+    for nom in SECTIONS_GRAPHE:
+        valeurs = getattr(reseau, nom)
+        ajouter(nom, valeurs.typecode if isinstance(valeurs, array) else valeurs.format, valeurs)
+    for critere, poids in reseau.poids.items():
+        ajouter(f'poids:{critere}', 'd', poids)
+
+    ids = list(reseau.ids)
+    octets, offsets = _table_chaines(ids)
+    ajouter('ids:octets', 'B', octets)
+    ajouter('ids:offsets', 'Q', offsets)
+    encodes = [node_id.encode('utf-8') for node_id in ids]
+    ajouter('ids:ordre', 'I', sorted(range(len(ids)), key=encodes.__getitem__))
+    octets, offsets = _table_chaines(reseau.chaines)
+    ajouter('chaines:octets', 'B', octets)
+    ajouter('chaines:offsets', 'Q', offsets)
+
+    for critere, hierarchie in (hierarchies or {}).items():
+        prefixe = f'ch:{critere}:{hierarchie.departage or ""}'
+        ajouter(f'{prefixe}:rang', 'I', hierarchie.rang)
+        for sens, tableaux in (('m', hierarchie.montantes), ('d', hierarchie.descendantes)):
+            for suffixe, typecode, valeurs in zip('ocpx', 'IIdi', tableaux):
+                ajouter(f'{prefixe}:{sens}{suffixe}', typecode, valeurs)
+
+    taille_entete = struct.calcsize(FORMAT_ENTETE) + len(sections) * struct.calcsize(FORMAT_SECTION)
+    position = -(-taille_entete // ALIGNEMENT) * ALIGNEMENT
+    table = []
+    for nom, typecode, donnees, nombre in sections:
+        table.append(struct.pack(FORMAT_SECTION, nom.encode('ascii'), typecode.encode('ascii'), position, nombre))
+        position += -(-len(donnees) // ALIGNEMENT) * ALIGNEMENT
+
+    with open(chemin, 'wb') as f:
+        f.write(struct.pack(FORMAT_ENTETE, MAGIC, VERSION_FORMAT, sys.byteorder == 'little', len(sections)))
+        f.writelines(table)
+        for _, _, donnees, _ in sections:
+            f.write(b'\0' * (-f.tell() % ALIGNEMENT))
+            f.write(donnees)
+
+
+def ouvrir_snapshot(chemin: str) -> Tuple[GrapheCompact, Dict[str, HierarchiePersonnalisable]]:
+    """Projette un snapshot en mémoire et retourne (réseau, hiérarchies par critère)"""
+    with open(chemin, 'rb') as f:
+        projection = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    vue = memoryview(projection)
+
+    magic, version, petit_boutiste, nb_sections = struct.unpack_from(FORMAT_ENTETE, vue)
+    if magic != MAGIC:
+        raise ValueError(f"{chemin} n'est pas un snapshot de réseau")
+    if version != VERSION_FORMAT:
+        raise ValueError(f"Version de snapshot {version} non prise en charge (attendue : {VERSION_FORMAT})")
+    if bool(petit_boutiste) != (sys.byteorder == 'little'):
+        raise ValueError("Snapshot écrit sur une machine d'ordre des octets différent")
+
+    sections = {}
+    position = struct.calcsize(FORMAT_ENTETE)
+    for _ in range(nb_sections):
+        nom, typecode, debut, nombre = struct.unpack_from(FORMAT_SECTION, vue, position)
+        position += struct.calcsize(FORMAT_SECTION)
+        typecode = typecode.rstrip(b'\0').decode('ascii')
+        taille = nombre * struct.calcsize(typecode)
+        sections[nom.rstrip(b'\0').decode('ascii')] = vue[debut:debut + taille].cast(typecode)
+
+    reseau = GrapheCompact.__new__(GrapheCompact)
+    for nom in SECTIONS_GRAPHE:
+        setattr(reseau, nom, sections[nom])
+    reseau.poids = {nom.split(':', 1)[1]: tableau for nom, tableau in sections.items() if nom.startswith('poids:')}
+    reseau.ids = TableChaines(sections['ids:octets'], sections['ids:offsets'])
+    reseau.index = IndexIdentifiants(reseau.ids, sections['ids:ordre'])
+    reseau.chaines = TableChaines(sections['chaines:octets'], sections['chaines:offsets'])
+    reseau.fichier_snapshot = chemin
+    # La projection doit vivre aussi longtemps que les vues qui la référencent
+    reseau._projection = projection
+
+    hierarchies = {}
+    for nom in sections:
+        if nom.startswith('ch:') and nom.endswith(':rang'):
+            _, critere, departage, _ = nom.split(':')
+            prefixe = nom[:-len(':rang')]
+            hierarchies[critere] = HierarchiePersonnalisable.depuis_tableaux(
+                reseau, critere, departage or None, sections[nom],
+                tuple(sections[f'{prefixe}:m{suffixe}'] for suffixe in 'ocpx'),
+                tuple(sections[f'{prefixe}:d{suffixe}'] for suffixe in 'ocpx'),
+            )
+    return reseau, hierarchies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construit le snapshot binaire du réseau de transport")
+    parser.add_argument('sortie', help="Fichier snapshot à écrire")
+    parser.add_argument('--reseau', help="Fichier réseau source (GeoJSON, OSM ou répertoire CSV) ; "
+                                         "par défaut le réseau de démonstration")
+    args = parser.parse_args()
+
+    from app import TransportSystem
+    systeme = TransportSystem(fichier=args.reseau)
+    systeme.preparer_routage()
+    hierarchies = {critere: systeme.get_hierarchie(critere) for critere in systeme.CRITERES}
+    ecrire_snapshot(args.sortie, systeme.reseau, hierarchies)
+    print(f"Snapshot écrit dans {args.sortie} : {systeme.reseau.nombre_noeuds} nœuds, "
+          f"{systeme.reseau.nombre_aretes} arêtes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Statistiques du réseau tenues à jour incrémentalement.
+
+Les agrégats (totaux, répartition par type de route et par type d'arrêt,
+degrés) sont calculés en une passe sur le réseau compact, puis ajustés à
+chaque ajout ou suppression d'arrêt ou de connexion : lire les statistiques ne
+coûte plus un parcours du graphe. La connectivité par nœud, proportionnelle à
+la taille du réseau, n'est produite qu'à la demande, par pages.
+"""
+import threading
+from itertools import islice
+from typing import Dict, List, Optional
+
+
+class StatistiquesReseau:
+    """Agrégats du réseau de référence et degrés par nœud"""
+
+    def __init__(self):
+        self.nombre_aretes = 0
+        self.distance_totale = 0.0
+        self.temps_total = 0.0
+        self.types_routes: Dict[str, Dict] = {}
+        self.noeuds_par_type: Dict[str, int] = {}
+        # Type et degrés [entrant, sortant] de chaque nœud, dans l'ordre d'ajout
+        self.types_noeuds: Dict[str, str] = {}
+        self.degres: Dict[str, List[int]] = {}
+        self._verrou = threading.Lock()
+
+    @classmethod
+    def depuis_reseau(cls, reseau) -> 'StatistiquesReseau':
+        """Statistiques d'un GrapheCompact, en une passe sur ses tableaux"""
+        stats = cls()
+        ids = reseau.ids
+        for i in range(reseau.nombre_noeuds):
+            stats.ajouter_noeud(ids[i], reseau.type_noeud(i))
+        sources, cibles = reseau.sources, reseau.cibles
+        distances, temps = reseau.poids['distance'], reseau.poids['temps']
+        for e in range(reseau.nombre_aretes):
+            stats.ajouter_arete(ids[sources[e]], ids[cibles[e]], reseau.type_route(e), distances[e], temps[e])
+        return stats
+
+    # --- MISES À JOUR ---
+
+    def ajouter_noeud(self, node_id: str, type_noeud: str):
+        with self._verrou:
+            if node_id in self.types_noeuds:
+                self._decompter_type_noeud(self.types_noeuds[node_id])
+            else:
+                self.degres[node_id] = [0, 0]
+            self.types_noeuds[node_id] = type_noeud
+            self.noeuds_par_type[type_noeud] = self.noeuds_par_type.get(type_noeud, 0) + 1
+
+    def retirer_noeud(self, node_id: str):
+        """Retire un nœud (ses arêtes doivent avoir été retirées auparavant)"""
+        with self._verrou:
+            self._decompter_type_noeud(self.types_noeuds.pop(node_id))
+            del self.degres[node_id]
+
+    def _decompter_type_noeud(self, type_noeud: str):
+        self.noeuds_par_type[type_noeud] -= 1
+        if not self.noeuds_par_type[type_noeud]:
+            del self.noeuds_par_type[type_noeud]
+
+    def ajouter_arete(self, dep: str, arr: str, type_route: str, distance: float, temps: float):
+        self._compter_arete(dep, arr, type_route, distance, temps, 1)
+
+    def retirer_arete(self, dep: str, arr: str, type_route: str, distance: float, temps: float):
+        self._compter_arete(dep, arr, type_route, distance, temps, -1)
+
+    def _compter_arete(self, dep: str, arr: str, type_route: str, distance: float, temps: float, signe: int):
+        with self._verrou:
+            self.nombre_aretes += signe
+            self.distance_totale += signe * distance
+            self.temps_total += signe * temps
+            par_type = self.types_routes.setdefault(type_route, {'count': 0, 'distance': 0, 'temps': 0})
+            par_type['count'] += signe
+            par_type['distance'] += signe * distance
+            par_type['temps'] += signe * temps
+            if not par_type['count']:
+                del self.types_routes[type_route]
+            self.degres[dep][1] += signe
+            self.degres[arr][0] += signe
+
+    # --- LECTURE ---
+
+    def instantane(self) -> Dict:
+        """Statistiques globales (sans la connectivité par nœud), en temps constant en la taille du réseau"""
+        with self._verrou:
+            n, m = len(self.degres), self.nombre_aretes
+            distance_totale = round(self.distance_totale, 2)
+            temps_total = round(self.temps_total, 1)
+            return {
+                'nombre_noeuds': n,
+                'nombre_aretes': m,
+                'densite': round(m / (n * (n - 1)), 3) if n > 1 else 0,
+                'distance_totale_reseau': distance_totale,
+                'temps_total_reseau': temps_total,
+                'vitesse_moyenne_reseau': round(distance_totale / (temps_total / 60), 1) if temps_total > 0 else 0,
+                'types_routes': {t: dict(valeurs) for t, valeurs in self.types_routes.items()},
+                'noeuds_par_type': dict(self.noeuds_par_type)
+            }
+
+    def connectivite(self, debut: int = 0, nombre: Optional[int] = None) -> Dict[str, Dict]:
+        """Degrés entrant, sortant et total des nœuds [debut, debut + nombre) dans l'ordre d'ajout"""
+        with self._verrou:
+            fin = None if nombre is None else debut + nombre
+            return {
+                node_id: {'degree_entrant': entrant, 'degree_sortant': sortant, 'degree_total': entrant + sortant}
+                for node_id, (entrant, sortant) in islice(self.degres.items(), debut, fin)
+            }
@@ -0,0 +1,90 @@
+"""
+Fixtures communes : réseaux synthétiques de benchmark.generer_reseau et
+graphes networkx de référence construits sur les mêmes poids.
+"""
+import math
+import os
+import random
+import sys
+from typing import List, Sequence, Tuple
+
+import networkx as nx
+import pytest
+
+# Modules de l'application, à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import TransportSystem
+from benchmark import generer_reseau
+from cache_routes import CacheRoutes
+from graphe_compact import GrapheCompact
+from routage import INFINI
+
+# Tolérance des comparaisons de coûts (sommes de flottants dans un ordre différent)
+TOLERANCE = 1e-9
+
+
+def systeme_synthetique(nombre_noeuds: int, graine: int) -> TransportSystem:
+    systeme = TransportSystem(cache_routes=CacheRoutes())
+    systeme.charger_constructeur(generer_reseau(nombre_noeuds, graine))
+    return systeme
+
+
+def graphe_reference(reseau: GrapheCompact, poids: Sequence[float]) -> nx.DiGraph:
+    """DiGraph networkx des arêtes ouvertes, la plus légère de chaque groupe d'arêtes parallèles"""
+    G = nx.DiGraph()
+    G.add_nodes_from(range(reseau.nombre_noeuds))
+    for e in range(reseau.nombre_aretes):
+        w = poids[e]
+        if w == INFINI:
+            continue
+        u, v = reseau.sources[e], reseau.cibles[e]
+        if not G.has_edge(u, v) or w < G[u][v]['poids']:
+            G.add_edge(u, v, poids=w)
+    return G
+
+
+def distance_reference(G: nx.DiGraph, source: int, cible: int) -> float:
+    try:
+        return nx.dijkstra_path_length(G, source, cible, weight='poids')
+    except nx.NetworkXNoPath:
+        return math.inf
+
+
+def cout_aretes(poids: Sequence[float], aretes: Sequence[int]) -> float:
+    return sum(poids[e] for e in aretes)
+
+
+def assert_chemin_valide(reseau: GrapheCompact, chemin: List[int], source: int, cible: int):
+    """Le chemin relie source à cible par des arêtes du réseau"""
+    assert chemin[0] == source and chemin[-1] == cible
+    for u, v in zip(chemin, chemin[1:]):
+        assert reseau.aretes_entre(u, v), f"aucune arête {u} -> {v}"
+
+
+def assert_proches(a: float, b: float):
+    assert math.isclose(a, b, rel_tol=TOLERANCE, abs_tol=TOLERANCE), (a, b)
+
+
+@pytest.fixture(scope='session')
+def systeme() -> TransportSystem:
+    """Réseau synthétique de 400 nœuds (tronçons absents et sens uniques compris)"""
+    return systeme_synthetique(400, graine=7)
+
+
+@pytest.fixture(scope='session')
+def petit_systeme() -> TransportSystem:
+    """Réseau synthétique de 120 nœuds, pour les recherches coûteuses (Pareto, Yen)"""
+    return systeme_synthetique(120, graine=11)
+
+
+def tirer_paires(reseau: GrapheCompact, nombre: int, graine: int) -> List[Tuple[int, int]]:
+    aleatoire = random.Random(graine)
+    return [tuple(aleatoire.sample(range(reseau.nombre_noeuds), 2)) for _ in range(nombre)]
+
+
+@pytest.fixture(scope='session')
+def client():
+    """Client de test Flask de l'application (réseau de démonstration)"""
+    from app import app
+    return app.test_client()
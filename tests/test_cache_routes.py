@@ -0,0 +1,92 @@
+"""
+Cache d'itinéraires (cache_routes.py) : éviction LRU, clés par version du
+graphe, second niveau partagé, et itinéraires servis depuis le cache.
+"""
+from cache_routes import CacheLRU, CacheRoutes
+from conftest import systeme_synthetique
+
+
+class CachePartage:
+    """Second niveau en mémoire, partagé entre plusieurs CacheRoutes"""
+
+    def __init__(self):
+        self.entrees = {}
+
+    def lire(self, cle):
+        return self.entrees.get(cle)
+
+    def ecrire(self, cle, valeur):
+        self.entrees[cle] = valeur
+
+
+class CacheIndisponible:
+    def lire(self, cle):
+        raise ConnectionError('cache partagé indisponible')
+
+    def ecrire(self, cle, valeur):
+        raise ConnectionError('cache partagé indisponible')
+
+
+def test_eviction_lru():
+    cache = CacheLRU(taille_max=2)
+    cache.ecrire('a', 1)
+    cache.ecrire('b', 2)
+    assert cache.lire('a') == 1
+    cache.ecrire('c', 3)
+    assert cache.lire('b') is None
+    assert cache.lire('a') == 1 and cache.lire('c') == 3
+    assert cache.evictions == 1 and len(cache) == 2
+
+
+def test_cles_par_version():
+    cache = CacheRoutes(taille_max=8)
+    assert cache.lire(1, ('chemin', 'A', 'B')) is None
+    cache.ecrire(1, ('chemin', 'A', 'B'), {'cout': 1})
+    assert cache.lire(1, ('chemin', 'A', 'B')) == {'cout': 1}
+
+    # Une nouvelle version vide le cache local ; l'ancienne n'est plus ni lue ni écrite
+    assert cache.lire(2, ('chemin', 'A', 'B')) is None
+    assert len(cache.local) == 0
+    cache.ecrire(1, ('chemin', 'A', 'B'), {'cout': 1})
+    assert cache.lire(1, ('chemin', 'A', 'B')) is None and len(cache.local) == 0
+
+    statistiques = cache.statistiques()
+    assert statistiques['succes'] == 1 and statistiques['echecs'] == 2
+
+
+def test_second_niveau_partage():
+    partage = CachePartage()
+    premier, second = CacheRoutes(partage=partage), CacheRoutes(partage=partage)
+    premier.lire(1, ('chemin', 'A', 'B'))
+    premier.ecrire(1, ('chemin', 'A', 'B'), {'cout': 1})
+
+    assert second.lire(1, ('chemin', 'A', 'B')) == {'cout': 1}
+    assert second.succes_partages == 1 and len(second.local) == 1
+
+    second.desactiver_partage()
+    assert second.lire(1, ('chemin', 'A', 'C')) is None
+    assert second.statistiques()['partage_actif'] is False
+
+
+def test_second_niveau_indisponible():
+    cache = CacheRoutes(partage=CacheIndisponible())
+    assert cache.lire(1, ('chemin', 'A', 'B')) is None
+    cache.ecrire(1, ('chemin', 'A', 'B'), {'cout': 1})
+    assert cache.lire(1, ('chemin', 'A', 'B')) == {'cout': 1}
+    assert cache.erreurs_partage == 2
+
+
+def test_itineraire_servi_depuis_le_cache():
+    systeme = systeme_synthetique(60, graine=5)
+    reseau = systeme.reseau
+    depart, arrivee = reseau.ids[0], reseau.ids[-1]
+
+    chemin = systeme.get_shortest_path(depart, arrivee, 'temps')
+    succes = systeme.cache_routes.succes
+    assert systeme.get_shortest_path(depart, arrivee, 'temps') is chemin
+    assert systeme.cache_routes.succes == succes + 1
+
+    # Après une modification de la structure, l'itinéraire est recalculé
+    systeme.ajouter_arret('NOUVEL_ARRET', 'Nouvel arrêt', -4.3, 15.3)
+    recalcule = systeme.get_shortest_path(depart, arrivee, 'temps')
+    assert recalcule is not chemin and recalcule['path_ids'] == chemin['path_ids']
@@ -0,0 +1,61 @@
+"""
+Format compact des itinéraires (format_compact.py) : la polyligne encodée
+redonne la géométrie, et les tables restituent chemin et étapes.
+"""
+import random
+
+import pytest
+
+from format_compact import PRECISION_POLYLIGNE, compacter_itineraire, decoder_polyligne, encoder_polyligne
+
+
+def test_polyligne_exemple_de_reference():
+    # Exemple de la documentation de l'algorithme
+    points = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+    assert encoder_polyligne(points) == '_p~iF~ps|U_ulLnnqC_mqNvxq`@'
+    assert decoder_polyligne('_p~iF~ps|U_ulLnnqC_mqNvxq`@') == points
+
+
+@pytest.mark.parametrize('precision', [PRECISION_POLYLIGNE, 6])
+def test_polyligne_aller_retour(precision):
+    aleatoire = random.Random(precision)
+    points = [(aleatoire.uniform(-90, 90), aleatoire.uniform(-180, 180)) for _ in range(200)]
+    decodes = decoder_polyligne(encoder_polyligne(points, precision), precision)
+    assert len(decodes) == len(points)
+    for (lat, lon), (lat_decodee, lon_decodee) in zip(points, decodes):
+        assert abs(lat - lat_decodee) <= 0.5 / 10 ** precision + 1e-12
+        assert abs(lon - lon_decodee) <= 0.5 / 10 ** precision + 1e-12
+    assert encoder_polyligne([]) == '' and decoder_polyligne('') == []
+
+
+def test_itineraire_compact(systeme):
+    reseau = systeme.reseau
+    itineraire = next(chemin for chemin in (systeme.get_shortest_path(reseau.ids[i], reseau.ids[-1 - i], 'temps')
+                                            for i in range(20)) if chemin and chemin['steps'])
+    compact = compacter_itineraire(itineraire)
+
+    assert [node_id for node_id, _ in compact['noeuds']] == itineraire['path_ids']
+    assert [nom for _, nom in compact['noeuds']] == itineraire['path']
+    points = decoder_polyligne(compact['polyline'], compact['precision'])
+    attendus = [(reseau.lat[reseau.index[node_id]], reseau.lon[reseau.index[node_id]])
+                for node_id in itineraire['path_ids']]
+    assert len(points) == len(attendus)
+    for point, attendu in zip(points, attendus):
+        assert point == pytest.approx(attendu, abs=1e-5)
+
+    assert len(compact['etapes']) == len(itineraire['steps'])
+    for etape, step in zip(compact['etapes'], itineraire['steps']):
+        valeurs = dict(zip(compact['colonnes_etapes'], etape))
+        assert compact['routes'][valeurs.pop('route')] == [step['route'], step['type_route']]
+        assert valeurs == {cle: step[cle] for cle in valeurs}
+    assert len(compact['routes']) == len({(step['route'], step['type_route']) for step in itineraire['steps']})
+    assert compact['total_time'] == itineraire['total_time']
+
+
+def test_api_format(client):
+    url = '/api/route?from=RP_VICTOIRE&to=GARE_CENTRALE'
+    complet, compact = client.get(url), client.get(f'{url}&format=compact')
+    assert compact.get_json()['format'] == 'compact'
+    assert [node_id for node_id, _ in compact.get_json()['noeuds']] == complet.get_json()['path_ids']
+    assert len(compact.data) < len(complet.data)
+    assert client.get(f'{url}&format=xml').status_code == 400
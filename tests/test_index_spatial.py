@@ -0,0 +1,75 @@
+"""
+Index spatial (index_spatial.GrilleSpatiale) comparé à un parcours exhaustif,
+et endpoints qui accrochent des coordonnées au réseau.
+"""
+import random
+
+import pytest
+
+from conftest import assert_proches
+
+
+def points_aleatoires(reseau, nombre, graine):
+    aleatoire = random.Random(graine)
+    lat_min, lat_max = min(reseau.lat), max(reseau.lat)
+    lon_min, lon_max = min(reseau.lon), max(reseau.lon)
+    marge = 0.1 * (lat_max - lat_min)
+    return [(aleatoire.uniform(lat_min - marge, lat_max + marge), aleatoire.uniform(lon_min - marge, lon_max + marge))
+            for _ in range(nombre)]
+
+
+@pytest.mark.parametrize('k', (1, 5))
+def test_plus_proches_et_rayon(systeme, k):
+    reseau, index = systeme.reseau_base, systeme.get_index_spatial()
+    for lat, lon in points_aleatoires(reseau, 40, graine=k):
+        distances = sorted(systeme.calculer_distance_reelle(lat, lon, reseau.lat[i], reseau.lon[i])
+                           for i in range(reseau.nombre_noeuds))
+        trouves = index.plus_proches(lat, lon, k)
+        assert len(trouves) == k
+        for (d, i), attendu in zip(trouves, distances):
+            assert_proches(d, attendu)
+            assert_proches(d, systeme.calculer_distance_reelle(lat, lon, reseau.lat[i], reseau.lon[i]))
+        rayon = distances[2 * k]
+        assert [d for d, _ in index.dans_rayon(lat, lon, rayon)] == [d for d in distances if d <= rayon]
+
+
+def test_arete_la_plus_proche(systeme):
+    reseau, index = systeme.reseau_base, systeme.get_index_spatial()
+    for lat, lon in points_aleatoires(reseau, 40, graine=3):
+        attendu = min(index._projeter(lat, lon, e)['distance_km'] for e in range(reseau.nombre_aretes))
+        projection = index.arete_la_plus_proche(lat, lon)
+        assert_proches(projection['distance_km'], attendu)
+        assert 0 <= projection['fraction'] <= 1
+
+
+def test_api_nearest(client):
+    reponse = client.get('/api/nearest?lat=-4.32&lon=15.31&k=3')
+    assert reponse.status_code == 200
+    noeuds = reponse.get_json()['nodes']
+    assert len(noeuds) == 3
+    assert [n['distance_km'] for n in noeuds] == sorted(n['distance_km'] for n in noeuds)
+
+    arete = client.get('/api/nearest?lat=-4.32&lon=15.31&mode=arete').get_json()['edge']
+    assert 0 <= arete['fraction'] <= 1
+    assert arete['distance_km'] <= noeuds[0]['distance_km'] + 1e-3
+
+    for requete in ('/api/nearest?lat=-4.32&lon=15.31&k=0', '/api/nearest?lat=-4.32&lon=15.31&mode=bogus',
+                    '/api/nearest?lat=200&lon=15.31', '/api/nearest?lat=-4.32&lon=15.31&radius=-1'):
+        assert client.get(requete).status_code == 400, requete
+
+
+def test_accrochage_des_extremites(client):
+    coordonnees = 'from_lat=-4.3368&from_lon=15.305&to_lat=-4.31&to_lon=15.315'
+    assert client.get(f'/api/route?{coordonnees}&snap=bogus').status_code == 400
+
+    par_noeud = client.get(f'/api/route?{coordonnees}').get_json()
+    assert 'approche' not in par_noeud['accrochage']['from']
+    assert par_noeud['path_ids'][0] == par_noeud['accrochage']['from']['node_id']
+
+    par_arete = client.get(f'/api/route?{coordonnees}&snap=arete').get_json()
+    for role in ('from', 'to'):
+        accrochage = par_arete['accrochage'][role]
+        assert accrochage['mode'] == 'arete'
+        assert accrochage['approche']['distance_km'] >= 0 and accrochage['approche']['temps_min'] >= 0
+    assert par_arete['path_ids'][0] == par_arete['accrochage']['from']['node_id']
+    assert par_arete['path_ids'][-1] == par_arete['accrochage']['to']['node_id']
@@ -0,0 +1,63 @@
+"""
+Matrices de distances et de temps (matrice.py) : chaque case est le coût du
+chemin optimal, en séquentiel comme par le pool de processus.
+"""
+import math
+import random
+
+from conftest import distance_reference, graphe_reference
+from matrice import CalculateurMatrice
+from routage import INFINI
+
+
+def test_matrice_et_chemins_optimaux(systeme):
+    reseau = systeme.reseau
+    aleatoire = random.Random(10)
+    origines = [reseau.ids[i] for i in aleatoire.sample(range(reseau.nombre_noeuds), 12)]
+    destinations = [reseau.ids[i] for i in aleatoire.sample(range(reseau.nombre_noeuds), 15)]
+    G = graphe_reference(reseau, reseau.poids['temps'])
+
+    matrice = systeme.get_matrix(origines, destinations, 'temps')
+    assert matrice['origins'] == origines and matrice['destinations'] == destinations
+    for i, origine in enumerate(origines):
+        for j, destination in enumerate(destinations):
+            attendu = distance_reference(G, reseau.index[origine], reseau.index[destination])
+            if attendu == math.inf:
+                assert matrice['times'][i][j] is None and matrice['distances'][i][j] is None
+                continue
+            chemin = systeme.get_shortest_path(origine, destination, 'temps')
+            assert matrice['times'][i][j] == round(attendu, 1)
+            assert matrice['distances'][i][j] == chemin['total_distance']
+
+    assert systeme.get_matrix(origines, ['inconnu'], 'temps') is None
+
+
+def test_pool_de_processus(systeme):
+    reseau = systeme.reseau
+    departages = {critere: systeme.critere_departage(critere) for critere in systeme.CRITERES}
+    origines = list(range(0, reseau.nombre_noeuds, 37))
+    cibles = list(range(5, reseau.nombre_noeuds, 23))
+    sequentiel = CalculateurMatrice(reseau, departages, processus=1).calculer(origines, cibles, 'distance')
+    parallele = CalculateurMatrice(reseau, departages, processus=2, seuil_parallele=1)
+    try:
+        assert parallele.calculer(origines, cibles, 'distance') == sequentiel
+    finally:
+        parallele.fermer()
+    assert len(sequentiel) == len(origines)
+    assert any(d < INFINI for ligne in sequentiel for d in ligne['distance'])
+
+
+def test_api_matrix(client):
+    reponse = client.get('/api/matrix?origins=RP_VICTOIRE,GARE_CENTRALE&criteria=distance')
+    assert reponse.status_code == 200
+    matrice = reponse.get_json()
+    assert matrice['destinations'] == ['RP_VICTOIRE', 'GARE_CENTRALE']
+    assert matrice['distances'][0][0] == 0 and matrice['distances'][0][1] > 0
+
+    corps = {'origins': ['RP_VICTOIRE'], 'destinations': ['GARE_CENTRALE'], 'criteria': 'temps'}
+    assert client.post('/api/matrix', json=corps).get_json()['times'] == \
+        client.get('/api/matrix?origins=RP_VICTOIRE&destinations=GARE_CENTRALE').get_json()['times']
+
+    assert client.get('/api/matrix?origins=RP_VICTOIRE&destinations=INCONNU').status_code == 404
+    assert client.get('/api/matrix?origins=RP_VICTOIRE&criteria=vitesse').status_code == 400
+    assert client.get('/api/matrix').status_code == 400
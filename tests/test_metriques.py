@@ -0,0 +1,72 @@
+"""
+Métriques Prometheus (metriques.py) : histogrammes cumulés, étiquettes
+échappées, collecteurs lus à l'export et instrumentation des requêtes.
+"""
+import pytest
+
+from metriques import METRIQUES, RegistreMetriques, chronometrer
+
+
+def valeur(texte: str, serie: str) -> float:
+    """Valeur de l'échantillon 'serie' (nom et étiquettes tels qu'exportés), 0 s'il est absent"""
+    for ligne in texte.splitlines():
+        if ligne.startswith(serie + ' '):
+            return float(ligne[len(serie) + 1:])
+    return 0.0
+
+
+def test_histogramme_cumule():
+    registre = RegistreMetriques()
+    registre.declarer_histogramme('duree', 'Durée', bornes=(1, 2, 5))
+    for observation in (0.5, 1, 2, 3, 10):
+        registre.observer('duree', observation, route='/a')
+    texte = registre.exporter()
+    assert '# TYPE duree histogram' in texte
+    attendus = {'1.0': 2, '2.0': 3, '5.0': 4, '+Inf': 5}
+    for borne, cumul in attendus.items():
+        assert valeur(texte, f'duree_bucket{{route="/a",le="{borne}"}}') == cumul
+    assert valeur(texte, 'duree_sum{route="/a"}') == 16.5
+    assert valeur(texte, 'duree_count{route="/a"}') == 5
+
+
+def test_compteurs_et_collecteurs():
+    registre = RegistreMetriques()
+    registre.declarer_compteur('requetes_total', 'Requêtes')
+    registre.incrementer('requetes_total', route='/a', statut=200)
+    registre.incrementer('requetes_total', 2, route='/a', statut=200)
+    registre.incrementer('requetes_total', motif='guillemet " et\nretour')
+    registre.ajouter_collecteur(lambda: [('entrees', 'gauge', 'Entrées', [({'cache': 'local'}, 7)])])
+    texte = registre.exporter()
+    assert valeur(texte, 'requetes_total{route="/a",statut="200"}') == 3
+    assert valeur(texte, 'requetes_total{motif="guillemet \\" et\\nretour"}') == 1
+    assert '# TYPE entrees gauge' in texte and valeur(texte, 'entrees{cache="local"}') == 7
+
+
+def test_chronometrer_meme_en_cas_d_erreur():
+    @chronometrer('test_echec')
+    def echouer():
+        raise RuntimeError
+
+    serie = 'transport_methode_duree_secondes_count{methode="test_echec"}'
+    avant = valeur(METRIQUES.exporter(), serie)
+    with pytest.raises(RuntimeError):
+        echouer()
+    assert valeur(METRIQUES.exporter(), serie) == avant + 1
+
+
+def test_api_metrics(client):
+    serie = 'transport_http_requetes_total{methode="GET",route="/api/stats",statut="200"}'
+    avant = valeur(client.get('/api/metrics').data.decode('utf-8'), serie)
+    client.get('/api/stats')
+    client.get('/api/stats')
+    reponse = client.get('/api/metrics')
+    assert reponse.content_type.startswith('text/plain; version=0.0.4')
+    texte = reponse.data.decode('utf-8')
+    assert valeur(texte, serie) == avant + 2
+    assert valeur(texte, 'transport_http_duree_secondes_count{route="/api/stats"}') >= 2
+    assert '# TYPE transport_graphe_version gauge' in texte
+    assert valeur(texte, 'transport_reseau_elements{element="noeuds"}') > 0
+
+    client.get('/api/route?from=RP_VICTOIRE&to=GARE_CENTRALE&algorithm=dijkstra&criteria=temps')
+    texte = client.get('/api/metrics').data.decode('utf-8')
+    assert valeur(texte, 'transport_recherches_total{algorithme="dijkstra"}') >= 1
@@ -0,0 +1,61 @@
+"""
+Énumération des chemins simples : pages reprises par curseur (avec ou sans
+recherche conservée) et diffusion NDJSON, identiques à la liste complète.
+"""
+import json
+
+import pytest
+
+from conftest import systeme_synthetique
+
+
+def test_pages_par_curseur(petit_systeme):
+    depart, arrivee = petit_systeme.reseau.ids[0], petit_systeme.reseau.ids[-1]
+    attendus = [chemin['path_ids'] for chemin in petit_systeme.get_all_simple_paths(depart, arrivee, 12, 'temps')]
+    assert len(attendus) == 12
+
+    trouves, curseur = [], None
+    for numero in range(3):
+        page = petit_systeme.get_page_chemins_simples(depart, arrivee, 'temps', 4, curseur, ['path_ids'])
+        assert page['offset'] == 4 * numero
+        assert all(chemin.keys() == {'path_ids'} for chemin in page['paths'])
+        trouves.extend(chemin['path_ids'] for chemin in page['paths'])
+        curseur = page['next_cursor']
+        if numero == 1:
+            # Recherche évincée : la page suivante est recalculée depuis le début
+            petit_systeme._curseurs.vider()
+    assert trouves == attendus
+
+
+def test_curseur_invalide_ou_perime():
+    systeme = systeme_synthetique(60, graine=29)
+    depart, arrivee = systeme.reseau.ids[0], systeme.reseau.ids[-1]
+    page = systeme.get_page_chemins_simples(depart, arrivee, 'temps', 2)
+    with pytest.raises(ValueError, match='invalide'):
+        systeme.get_page_chemins_simples(depart, arrivee, 'distance', 2, page['next_cursor'])
+    with pytest.raises(ValueError, match='invalide'):
+        systeme.get_page_chemins_simples(depart, arrivee, 'temps', 2, 'pas-un-curseur')
+
+    systeme.marquer_modification()
+    with pytest.raises(ValueError, match='périmé'):
+        systeme.get_page_chemins_simples(depart, arrivee, 'temps', 2, page['next_cursor'])
+
+
+def test_api_ndjson_et_curseur(client):
+    complet = client.get('/api/all-simple-paths?k=6&fields=path_ids,total_time_min').get_json()['paths']
+
+    flux = client.get('/api/all-simple-paths?k=6&fields=path_ids,total_time_min&format=ndjson')
+    assert flux.mimetype == 'application/x-ndjson'
+    assert [json.loads(ligne) for ligne in flux.data.decode('utf-8').splitlines()] == complet
+
+    pages, curseur = [], ''
+    while curseur is not None and len(pages) < len(complet):
+        page = client.get(f'/api/all-simple-paths?limit=4&fields=path_ids,total_time_min&cursor={curseur}'
+                          if curseur else '/api/all-simple-paths?limit=4&fields=path_ids,total_time_min').get_json()
+        pages.extend(page['paths'])
+        curseur = page['next_cursor']
+    assert pages[:len(complet)] == complet
+
+    assert client.get('/api/all-simple-paths?cursor=pas-un-curseur').status_code == 400
+    assert client.get('/api/all-simple-paths?format=xml').status_code == 400
+    assert client.get('/api/all-simple-paths?fields=inconnu').status_code == 400
@@ -0,0 +1,57 @@
+"""
+Réponses pré-sérialisées (reponses.py) : négociation du codage, ETag par
+variante, 304 conditionnel et nouvelle empreinte à chaque version du graphe.
+"""
+import gzip
+import json
+
+import pytest
+
+from conftest import systeme_synthetique
+from reponses import brotli
+
+
+def test_negociation_du_codage(client):
+    clair = client.get('/api/network', headers={'Accept-Encoding': 'identity'})
+    assert clair.status_code == 200 and 'Content-Encoding' not in clair.headers
+    assert 'Accept-Encoding' in clair.headers['Vary']
+    assert 'nodes' in json.loads(clair.data)
+
+    compresse = client.get('/api/network', headers={'Accept-Encoding': 'gzip'})
+    assert compresse.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compresse.data) == clair.data
+    assert compresse.headers['ETag'] != clair.headers['ETag']
+    assert compresse.headers['Last-Modified'] == clair.headers['Last-Modified']
+
+
+@pytest.mark.skipif(brotli is None, reason='brotli non installé')
+def test_brotli_prefere(client):
+    clair = client.get('/api/network')
+    reponse = client.get('/api/network', headers={'Accept-Encoding': 'gzip, br'})
+    assert reponse.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(reponse.data) == clair.data
+
+
+@pytest.mark.parametrize('url', ['/api/network', '/api/stats'])
+def test_requete_conditionnelle(client, url):
+    premiere = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    etag = premiere.headers['ETag']
+
+    a_jour = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert a_jour.status_code == 304 and a_jour.data == b''
+    assert a_jour.headers['ETag'] == etag
+
+    # L'ETag d'une autre variante ne valide pas celle-ci
+    autre_variante = client.get(url, headers={'If-None-Match': etag})
+    assert autre_variante.status_code == 200 and autre_variante.data
+
+
+def test_empreinte_par_version():
+    systeme = systeme_synthetique(30, graine=3)
+    avant = systeme.get_reponse_preparee('stats', systeme.get_network_stats)
+    assert systeme.get_reponse_preparee('stats', systeme.get_network_stats) is avant
+
+    systeme.ajouter_arret('NOUVEL_ARRET', 'Nouvel arrêt', -4.3, 15.3)
+    apres = systeme.get_reponse_preparee('stats', systeme.get_network_stats)
+    assert apres is not avant
+    assert apres.etag('identity') != avant.etag('identity')
@@ -0,0 +1,202 @@
+"""
+Moteurs de routage de routage.py comparés à networkx sur des réseaux
+synthétiques : contraction hiérarchique, A* (uni- et bidirectionnel), Yen,
+front de Pareto, itinéraires alternatifs et A* dépendant de l'heure.
+"""
+import math
+from itertools import islice
+
+import networkx as nx
+import pytest
+
+from app import TransportSystem
+from conftest import (assert_chemin_valide, assert_proches, cout_aretes, distance_reference, graphe_reference,
+                      systeme_synthetique, tirer_paires)
+from profils import NB_INTERVALLES
+from routage import (INFINI, astar, astar_bidirectionnel, astar_horaire, front_pareto, itineraires_alternatifs,
+                     k_plus_courts_chemins)
+
+CRITERES = ('distance', 'temps')
+
+
+@pytest.mark.parametrize('critere', CRITERES)
+def test_contraction_hierarchique(systeme, critere):
+    reseau = systeme.reseau
+    G = graphe_reference(reseau, reseau.poids[critere])
+    hierarchie = systeme.get_hierarchie(critere)
+    for source, cible in tirer_paires(reseau, 60, graine=1):
+        attendu = distance_reference(G, source, cible)
+        resultat = hierarchie.plus_court_chemin(source, cible)
+        if attendu == math.inf:
+            assert resultat is None
+            continue
+        _, chemin = resultat
+        assert_chemin_valide(reseau, chemin, source, cible)
+        assert_proches(reseau.cout_chemin(chemin, critere), attendu)
+
+
+def test_contraction_a_la_demande(monkeypatch):
+    systeme = systeme_synthetique(200, graine=3)
+    assert not systeme.etat.hierarchies
+    monkeypatch.setattr(TransportSystem, 'SEUIL_CONTRACTION_A_LA_DEMANDE', 100)
+    assert systeme.get_hierarchie('temps') is None
+    assert systeme.algorithme_effectif('ch', 'temps', systeme.etat) == 'bidirectionnel'
+    systeme.preparer_routage()
+    assert systeme.algorithme_effectif('ch', 'temps', systeme.etat) == 'ch'
+
+
+def test_yen(petit_systeme):
+    reseau = petit_systeme.reseau
+    poids = reseau.poids['temps']
+    G = graphe_reference(reseau, poids)
+    k = 8
+    for source, cible in tirer_paires(reseau, 10, graine=3):
+        trouves = list(islice(k_plus_courts_chemins(reseau, source, cible, 'temps'), k))
+        try:
+            attendus = [nx.path_weight(G, chemin, 'poids')
+                        for chemin in islice(nx.shortest_simple_paths(G, source, cible, weight='poids'), k)]
+        except nx.NetworkXNoPath:
+            attendus = []
+        assert len(trouves) == len(attendus)
+        assert len({tuple(chemin) for _, chemin in trouves}) == len(trouves)
+        for (cout, chemin), attendu in zip(trouves, attendus):
+            assert_chemin_valide(reseau, chemin, source, cible)
+            assert len(set(chemin)) == len(chemin)
+            assert_proches(cout, reseau.cout_chemin(chemin, 'temps'))
+            assert_proches(cout, attendu)
+
+
+@pytest.mark.parametrize('critere', CRITERES)
+def test_astar_et_astar_bidirectionnel(systeme, critere):
+    reseau = systeme.reseau
+    G = graphe_reference(reseau, reseau.poids[critere])
+    for source, cible in tirer_paires(reseau, 60, graine=2):
+        attendu = distance_reference(G, source, cible)
+        resultats = (
+            astar(reseau, source, cible, critere, systeme.heuristique(cible, critere)),
+            astar_bidirectionnel(reseau, source, cible, critere, systeme.heuristique(cible, critere),
+                                 systeme.heuristique(source, critere)),
+        )
+        for resultat in resultats:
+            if attendu == math.inf:
+                assert resultat is None
+                continue
+            cout, chemin = resultat
+            assert_chemin_valide(reseau, chemin, source, cible)
+            assert_proches(cout, attendu)
+            assert_proches(reseau.cout_chemin(chemin, critere), attendu)
+
+
+def test_astar_horaire(systeme):
+    reseau = systeme.reseau
+    # Profil marqué sur les routes express (pointe de 3 à 8 h, décroissance FIFO)
+    systeme.definir_profil('pointe', [1.0 + 1.5 * math.exp(-((i - 30) / 6) ** 2) for i in range(NB_INTERVALLES)],
+                           types_route=['express'])
+    profils, temps_libres = systeme.get_profils(), systeme.get_temps_libres()
+    G = graphe_reference(reseau, temps_libres)
+
+    def arrivee_reference(source: int, cible: int, depart: float) -> float:
+        # Dijkstra networkx sur les heures d'arrivée : le poids d'une arête dépend
+        # de l'heure de passage à son origine, fixée quand celle-ci est extraite
+        heures = {source: depart}
+
+        def duree(u, v, _):
+            t = heures[u]
+            d = min(temps_libres[e] * profils.facteur(e, t)
+                    for e in reseau.aretes_entre(u, v) if temps_libres[e] < INFINI)
+            heures[v] = min(heures.get(v, math.inf), t + d)
+            return d
+        try:
+            return depart + nx.dijkstra_path_length(G, source, cible, weight=duree)
+        except nx.NetworkXNoPath:
+            return math.inf
+
+    for numero, (source, cible) in enumerate(tirer_paires(reseau, 30, graine=6)):
+        depart = 6 * 60 + 20 * numero
+        attendu = arrivee_reference(source, cible, depart)
+        resultat = astar_horaire(reseau, source, cible, depart, temps_libres, profils,
+                                 systeme.heuristique(cible, 'temps', systeme.get_coefficient_horaire()))
+        if attendu == math.inf:
+            assert resultat is None
+            continue
+        arrivee, chemin = resultat
+        assert_chemin_valide(reseau, chemin, source, cible)
+        assert math.isclose(arrivee, attendu, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def test_profil_invalide(systeme, client):
+    facteurs = [1.0] * NB_INTERVALLES
+    with pytest.raises(ValueError, match='Type de route inconnu'):
+        systeme.definir_profil('invalide', facteurs, types_route=['autoroute_lunaire'])
+    with pytest.raises(ValueError, match='Connexion inconnue'):
+        systeme.definir_profil('invalide', facteurs, connexions=[('inconnu', systeme.reseau.ids[0])])
+    assert 'invalide' not in systeme.definitions_profils
+
+    for corps in ({'name': 'invalide', 'factors': facteurs, 'road_types': ['autoroute_lunaire']},
+                  {'name': 'invalide', 'factors': facteurs, 'connections': [['RP_VICTOIRE', 'INCONNU']]},
+                  {'name': 'invalide', 'factors': facteurs, 'connections': ['RP_VICTOIRE']},
+                  {'name': 'invalide', 'factors': facteurs[:10]}):
+        assert client.post('/api/profiles', json=corps).status_code == 400
+
+
+def test_front_pareto(petit_systeme):
+    reseau = petit_systeme.reseau
+    distances, temps = reseau.poids['distance'], reseau.poids['temps']
+    # Une solution de somme pondérée minimale est toujours sur le front
+    ponderations = (0.0, 0.25, 0.5, 0.75, 1.0)
+    references = {lam: graphe_reference(reseau, [lam * d + (1 - lam) * t for d, t in zip(distances, temps)])
+                  for lam in ponderations}
+    for source, cible in tirer_paires(reseau, 15, graine=4):
+        front, complet = front_pareto(reseau, source, cible, [distances, temps])
+        assert complet
+        if distance_reference(references[0.0], source, cible) == math.inf:
+            assert front == []
+            continue
+        for couts, chemin, aretes in front:
+            assert chemin[0] == source and chemin[-1] == cible
+            assert [reseau.sources[e] for e in aretes] == chemin[:-1]
+            assert [reseau.cibles[e] for e in aretes] == chemin[1:]
+            assert_proches(couts[0], cout_aretes(distances, aretes))
+            assert_proches(couts[1], cout_aretes(temps, aretes))
+        vecteurs = [couts for couts, _, _ in front]
+        for a in vecteurs:
+            assert not any(b != a and b[0] <= a[0] and b[1] <= a[1] for b in vecteurs)
+        for lam, G in references.items():
+            assert_proches(min(lam * d + (1 - lam) * t for d, t in vecteurs),
+                           distance_reference(G, source, cible))
+
+
+
+
+def test_itineraires_alternatifs(systeme):
+    reseau = systeme.reseau
+    poids = reseau.poids['temps']
+    G = graphe_reference(reseau, poids)
+    etirement, partage = 1.3, 0.6
+    alternatives_trouvees = 0
+    for source, cible in tirer_paires(reseau, 40, graine=5):
+        routes = itineraires_alternatifs(reseau, source, cible, poids, nombre=4,
+                                         etirement_max=etirement, partage_max=partage)
+        optimal = distance_reference(G, source, cible)
+        if optimal == math.inf:
+            assert routes == []
+            continue
+        assert_proches(routes[0][0], optimal)
+        depuis_source = nx.single_source_dijkstra_path_length(G, source, weight='poids')
+        vers_cible = nx.single_source_dijkstra_path_length(G.reverse(copy=False), cible, weight='poids')
+        ensembles = []
+        for cout, chemin, aretes in routes:
+            assert_chemin_valide(reseau, chemin, source, cible)
+            assert len(set(chemin)) == len(chemin)
+            assert_proches(cout, cout_aretes(poids, aretes))
+            assert cout <= etirement * optimal * (1 + 1e-9)
+            # Chaque route est un plus court chemin via l'un de ses nœuds
+            assert any(math.isclose(depuis_source[v] + vers_cible[v], cout, rel_tol=1e-9) for v in chemin)
+            ensemble = set(aretes)
+            for precedent in ensembles:
+                assert ensemble != precedent
+                assert cout_aretes(poids, ensemble & precedent) <= partage * cout * (1 + 1e-9)
+            ensembles.append(ensemble)
+        alternatives_trouvees += len(routes) - 1
+    assert alternatives_trouvees > 0
+
@@ -0,0 +1,50 @@
+"""
+Aller-retour d'un snapshot binaire (snapshot.py) : le réseau et les
+hiérarchies relus par mmap sont identiques à ceux écrits et donnent les mêmes
+itinéraires que networkx.
+"""
+import math
+
+from app import TransportSystem
+from cache_routes import CacheRoutes
+from conftest import assert_proches, distance_reference, graphe_reference, tirer_paires
+from snapshot import SECTIONS_GRAPHE, ecrire_snapshot, ouvrir_snapshot
+
+
+def test_aller_retour(systeme, tmp_path):
+    reseau = systeme.reseau_base
+    systeme.preparer_routage()
+    hierarchies = {critere: systeme.get_hierarchie(critere) for critere in systeme.CRITERES}
+    chemin = str(tmp_path / 'reseau.snap')
+    ecrire_snapshot(chemin, reseau, hierarchies)
+
+    relu, hierarchies_relues = ouvrir_snapshot(chemin)
+    for nom in SECTIONS_GRAPHE:
+        assert list(getattr(relu, nom)) == list(getattr(reseau, nom)), nom
+    assert relu.poids.keys() == reseau.poids.keys()
+    for critere in reseau.poids:
+        assert list(relu.poids[critere]) == list(reseau.poids[critere])
+    assert list(relu.ids) == list(reseau.ids)
+    assert list(relu.chaines) == list(reseau.chaines)
+    assert all(relu.index[node_id] == i for i, node_id in enumerate(reseau.ids))
+    assert 'inconnu' not in relu.index
+    assert hierarchies_relues.keys() == hierarchies.keys()
+
+    for critere, hierarchie in hierarchies_relues.items():
+        assert list(hierarchie.rang) == list(hierarchies[critere].rang)
+        G = graphe_reference(reseau, reseau.poids[critere])
+        for source, cible in tirer_paires(reseau, 30, graine=8):
+            attendu = distance_reference(G, source, cible)
+            resultat = hierarchie.plus_court_chemin(source, cible)
+            assert resultat == hierarchies[critere].plus_court_chemin(source, cible)
+            if attendu == math.inf:
+                assert resultat is None
+            else:
+                assert_proches(relu.cout_chemin(resultat[1], critere), attendu)
+
+    # Un système démarré sur le snapshot sert les mêmes itinéraires
+    depuis_snapshot = TransportSystem(snapshot=chemin, cache_routes=CacheRoutes())
+    for source, cible in tirer_paires(reseau, 10, graine=9):
+        depart, arrivee = reseau.ids[source], reseau.ids[cible]
+        assert depuis_snapshot.trouver_chemin(depart, arrivee, 'temps') == \
+            systeme.trouver_chemin(depart, arrivee, 'temps')
@@ -0,0 +1,66 @@
+"""
+Statistiques du réseau (statistiques_reseau.py) : après une suite d'ajouts et
+de suppressions, les agrégats tenus à jour égalent un recalcul complet.
+"""
+import random
+
+import pytest
+
+from conftest import systeme_synthetique
+from statistiques_reseau import StatistiquesReseau
+
+
+def assert_statistiques_egales(stats: StatistiquesReseau, reference: StatistiquesReseau):
+    obtenu, attendu = stats.instantane(), reference.instantane()
+    for cle in ('nombre_noeuds', 'nombre_aretes', 'densite', 'noeuds_par_type'):
+        assert obtenu[cle] == attendu[cle], cle
+    # Sommes accumulées dans un autre ordre : les totaux arrondis peuvent différer d'un dernier chiffre
+    for cle in ('distance_totale_reseau', 'temps_total_reseau', 'vitesse_moyenne_reseau'):
+        assert obtenu[cle] == pytest.approx(attendu[cle], abs=0.11), cle
+    assert obtenu['types_routes'].keys() == attendu['types_routes'].keys()
+    for type_route, valeurs in attendu['types_routes'].items():
+        assert obtenu['types_routes'][type_route] == pytest.approx(valeurs)
+    assert stats.connectivite() == reference.connectivite()
+
+
+def test_mises_a_jour_incrementales():
+    systeme = systeme_synthetique(100, graine=31)
+    stats = systeme.get_statistiques_reseau()
+    aleatoire = random.Random(31)
+    for numero in range(60):
+        ids = list(systeme.G.nodes)
+        tirage = aleatoire.random()
+        if tirage < 0.15:
+            systeme.ajouter_arret(f'AJOUT_{numero}', f'Ajout {numero}', aleatoire.uniform(-4.4, -4.3),
+                                  aleatoire.uniform(15.2, 15.3), aleatoire.choice(['depart', 'intermediaire']))
+        elif tirage < 0.25:
+            systeme.supprimer_arret(aleatoire.choice(ids))
+        elif tirage < 0.45:
+            dep, arr = aleatoire.choice(list(systeme.G.edges))
+            systeme.supprimer_connexion(dep, arr)
+        else:
+            # Nouvelle connexion, ou remplacement d'une connexion existante
+            dep, arr = aleatoire.sample(ids, 2)
+            systeme.ajouter_connexion(dep, arr, f'Voie {numero}', aleatoire.choice(['principale', 'alternative']))
+        assert systeme.get_statistiques_reseau() is stats
+        if numero % 10 == 9:
+            assert_statistiques_egales(stats, StatistiquesReseau.depuis_reseau(systeme.reseau_base))
+
+
+def test_connectivite_par_pages(petit_systeme):
+    complete = petit_systeme.get_statistiques_reseau().connectivite()
+    pages = {}
+    for debut in range(0, len(complete), 50):
+        page = petit_systeme.get_connectivite(debut, 50)
+        assert page['offset'] == debut and page['total'] == len(complete)
+        pages.update(page['connectivite'])
+    assert list(pages) == list(complete) and pages == complete
+
+
+def test_api_statistiques(client):
+    stats = client.get('/api/stats').get_json()
+    page = client.get('/api/stats/connectivity?offset=0&limit=5').get_json()
+    assert page['total'] == stats['nombre_noeuds'] and len(page['connectivite']) == 5
+    assert 'connectivite' not in stats
+    assert len(client.get('/api/stats?connectivity=true').get_json()['connectivite']) == stats['nombre_noeuds']
+    assert client.get('/api/stats/connectivity?limit=0').status_code == 400
@@ -0,0 +1,104 @@
+"""
+Mises à jour du trafic : la personnalisation incrémentale des hiérarchies
+donne les mêmes poids qu'une personnalisation complète, et les itinéraires en
+cache ne survivent à une nouvelle version que s'ils restent optimaux.
+"""
+import math
+import random
+
+from app import TransportSystem
+from cache_routes import CacheRoutes
+from conftest import assert_proches, distance_reference, graphe_reference, systeme_synthetique, tirer_paires
+from routage import HierarchiePersonnalisable
+from snapshot import ecrire_snapshot
+
+
+def lot_aleatoire(reseau, aleatoire: random.Random, taille: int):
+    """Mises à jour mêlant ralentissements, accélérations, fermetures et retours à la normale"""
+    lot = []
+    for e in aleatoire.sample(range(reseau.nombre_aretes), taille):
+        mise_a_jour = {'from': reseau.ids[reseau.sources[e]], 'to': reseau.ids[reseau.cibles[e]]}
+        tirage = aleatoire.random()
+        if tirage < 0.15:
+            mise_a_jour['closed'] = True
+        elif tirage < 0.3:
+            mise_a_jour['reset'] = True
+        else:
+            mise_a_jour['factor'] = aleatoire.uniform(0.3, 3.0)
+        lot.append(mise_a_jour)
+    return lot
+
+
+def verifier_hierarchies(systeme):
+    """Hiérarchies courantes identiques à une personnalisation complète, et exactes face à networkx"""
+    etat = systeme.etat
+    for critere in systeme.CRITERES:
+        hierarchie = etat.hierarchies[critere]
+        complete = HierarchiePersonnalisable(etat.reseau, critere, systeme.critere_departage(critere),
+                                             rang=hierarchie.rang)
+        assert list(hierarchie.montantes[2]) == list(complete.montantes[2])
+        assert list(hierarchie.descendantes[2]) == list(complete.descendantes[2])
+
+        G = graphe_reference(etat.reseau, etat.reseau.poids[critere])
+        for source, cible in tirer_paires(etat.reseau, 20, graine=4):
+            attendu = distance_reference(G, source, cible)
+            resultat = hierarchie.plus_court_chemin(source, cible)
+            if attendu == math.inf:
+                assert resultat is None
+            else:
+                assert_proches(etat.reseau.cout_chemin(resultat[1], critere), attendu)
+
+
+def test_personnalisation_incrementale():
+    systeme = systeme_synthetique(300, graine=13)
+    systeme.preparer_routage()
+    aleatoire = random.Random(13)
+    for _ in range(4):
+        systeme.appliquer_trafic(lot_aleatoire(systeme.reseau_base, aleatoire, 12))
+        verifier_hierarchies(systeme)
+
+
+def test_personnalisation_apres_snapshot(tmp_path):
+    origine = systeme_synthetique(200, graine=17)
+    origine.preparer_routage()
+    chemin = str(tmp_path / 'reseau.snap')
+    ecrire_snapshot(chemin, origine.reseau_base, origine.etat.hierarchies)
+
+    systeme = TransportSystem(cache_routes=CacheRoutes())
+    systeme.charger_snapshot(chemin)
+    aleatoire = random.Random(17)
+    for _ in range(3):
+        systeme.appliquer_trafic(lot_aleatoire(systeme.reseau_base, aleatoire, 10))
+        verifier_hierarchies(systeme)
+
+
+def test_migration_du_cache():
+    systeme = systeme_synthetique(150, graine=19)
+    reseau = systeme.reseau_base
+    depart, arrivee = reseau.ids[0], reseau.ids[-1]
+    chemin = systeme.get_shortest_path(depart, arrivee, 'temps')
+    troncons = set(zip(chemin['path_ids'], chemin['path_ids'][1:]))
+    hors_chemin = next((reseau.ids[reseau.sources[e]], reseau.ids[reseau.cibles[e]])
+                       for e in range(reseau.nombre_aretes)
+                       if (reseau.ids[reseau.sources[e]], reseau.ids[reseau.cibles[e]]) not in troncons)
+
+    # Un ralentissement hors de l'itinéraire le laisse optimal : il reste en cache
+    resultat = systeme.appliquer_trafic([{'from': hors_chemin[0], 'to': hors_chemin[1], 'factor': 2}])
+    assert resultat['routes_conservees'] == 1
+    assert systeme.get_shortest_path(depart, arrivee, 'temps') is chemin
+
+    # Une accélération, même ailleurs, peut ouvrir un meilleur itinéraire : le cache est vidé
+    resultat = systeme.appliquer_trafic([{'from': hors_chemin[0], 'to': hors_chemin[1], 'factor': 0.5}])
+    assert resultat['routes_conservees'] == 0
+    chemin = systeme.get_shortest_path(depart, arrivee, 'temps')
+    sur_chemin = chemin['path_ids'][:2]
+
+    # Un ralentissement sur l'itinéraire le rend caduc
+    resultat = systeme.appliquer_trafic([{'from': sur_chemin[0], 'to': sur_chemin[1], 'factor': 3}])
+    assert resultat['routes_conservees'] == 0
+    recalcule = systeme.get_shortest_path(depart, arrivee, 'temps')
+    assert recalcule is not chemin
+    G = graphe_reference(systeme.reseau, systeme.reseau.poids['temps'])
+    attendu = distance_reference(G, systeme.reseau.index[depart], systeme.reseau.index[arrivee])
+    chemin_indices = [systeme.reseau.index[node_id] for node_id in recalcule['path_ids']]
+    assert_proches(systeme.reseau.cout_chemin(chemin_indices, 'temps'), attendu)
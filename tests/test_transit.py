@@ -0,0 +1,135 @@
+"""
+RAPTOR (transit.py) comparé à un plus court chemin networkx dans le graphe
+espace-temps des mêmes horaires, sur un GTFS synthétique dont les arrêts sont
+des nœuds de benchmark.generer_reseau.
+"""
+import bisect
+import csv
+import os
+import random
+
+import networkx as nx
+import pytest
+
+from transit import INFINI_SECONDES, charger_gtfs
+
+
+def _ecrire(repertoire, nom, entetes, lignes):
+    with open(os.path.join(repertoire, nom), 'w', newline='', encoding='utf-8') as f:
+        ecrivain = csv.writer(f)
+        ecrivain.writerow(entetes)
+        ecrivain.writerows(lignes)
+
+
+def _horaire(secondes: int) -> str:
+    return f"{secondes // 3600:02d}:{secondes % 3600 // 60:02d}:{secondes % 60:02d}"
+
+
+@pytest.fixture(scope='module')
+def horaires(systeme, tmp_path_factory):
+    """GTFS de 20 lignes sur 80 nœuds du réseau, avec des courses qui se dépassent"""
+    reseau = systeme.reseau
+    aleatoire = random.Random(13)
+    # Un nœud sur cinq : quelques correspondances à pied par arrêt
+    noeuds = aleatoire.sample(range(reseau.nombre_noeuds), 80)
+    arrets = [reseau.ids[i] for i in noeuds]
+    repertoire = str(tmp_path_factory.mktemp('gtfs'))
+    _ecrire(repertoire, 'stops.txt', ['stop_id', 'stop_name', 'stop_lat', 'stop_lon'],
+            [(reseau.ids[i], reseau.nom(i), reseau.lat[i], reseau.lon[i]) for i in noeuds])
+    routes, courses, passages = [], [], []
+    for r in range(20):
+        routes.append((f'R{r}', f'L{r}', aleatoire.choice((0, 3, 700))))
+        suite = aleatoire.sample(arrets, aleatoire.randint(5, 12))
+        for c in range(25):
+            trip_id = f'R{r}C{c}'
+            courses.append((f'R{r}', 'SEMAINE', trip_id))
+            heure = 6 * 3600 + c * aleatoire.randint(240, 600) + aleatoire.randint(0, 400)
+            for position, stop_id in enumerate(suite):
+                depart = heure + aleatoire.choice((0, 20, 60))
+                passages.append((trip_id, stop_id, _horaire(heure), _horaire(depart), position + 1))
+                heure = depart + aleatoire.randint(60, 420)
+    _ecrire(repertoire, 'routes.txt', ['route_id', 'route_short_name', 'route_type'], routes)
+    _ecrire(repertoire, 'trips.txt', ['route_id', 'service_id', 'trip_id'], courses)
+    _ecrire(repertoire, 'stop_times.txt', ['trip_id', 'stop_id', 'arrival_time', 'departure_time', 'stop_sequence'],
+            passages)
+    return charger_gtfs(repertoire, systeme.calculer_distance_reelle)
+
+
+class GrapheEspaceTemps:
+    """
+    Graphe espace-temps des horaires : attente à chaque arrêt, montée, trajet
+    en course, descente, et une seule correspondance à pied après une descente
+    (ou depuis l'origine). Le poids de chaque arc est la durée écoulée.
+    """
+
+    def __init__(self, horaires):
+        self.G = G = nx.DiGraph()
+        self.marches = [[(horaires.correspondances[j], horaires.durees_correspondances[j])
+                         for j in range(horaires.offsets_correspondances[s],
+                                        horaires.offsets_correspondances[s + 1])]
+                        for s in range(horaires.nombre_arrets)]
+        instants = [set() for _ in range(horaires.nombre_arrets)]
+        for p in range(horaires.nombre_lignes):
+            debut = horaires.offsets_lignes[p]
+            nb_arrets = horaires.offsets_lignes[p + 1] - debut
+            suite = horaires.arrets_lignes[debut:debut + nb_arrets]
+            for course in range(horaires.offsets_courses[p], horaires.offsets_courses[p + 1]):
+                base = horaires.offsets_horaires[p] + (course - horaires.offsets_courses[p]) * nb_arrets
+                for position in range(nb_arrets):
+                    s, a, d = suite[position], horaires.arrivees[base + position], horaires.departs[base + position]
+                    instants[s].add(d)
+                    G.add_edge(('arret', s, d), ('course', course, position), poids=0)
+                    if position == 0:
+                        continue
+                    descente = ('descente', course, position)
+                    G.add_edge(('course', course, position - 1), descente,
+                               poids=a - horaires.departs[base + position - 1])
+                    G.add_edge(descente, ('course', course, position), poids=d - a)
+                    for q, duree in [(s, 0)] + self.marches[s]:
+                        G.add_edge(descente, ('arret', q, a + duree), poids=duree)
+                        instants[q].add(a + duree)
+        self.instants = [sorted(heures) for heures in instants]
+        for s, heures in enumerate(self.instants):
+            for h1, h2 in zip(heures, heures[1:]):
+                G.add_edge(('arret', s, h1), ('arret', s, h2), poids=h2 - h1)
+
+    def arrivee(self, origine: int, destination: int, depart: int) -> int:
+        """Arrivée au plus tôt à destination (INFINI_SECONDES si inaccessible)"""
+        meilleure = INFINI_SECONDES
+        self.G.add_node('origine')
+        for q, duree in [(origine, 0)] + self.marches[origine]:
+            if q == destination:
+                meilleure = min(meilleure, depart + duree)
+            heures = self.instants[q]
+            i = bisect.bisect_left(heures, depart + duree)
+            if i < len(heures):
+                self.G.add_edge('origine', ('arret', q, heures[i]), poids=heures[i] - depart)
+        durees = nx.single_source_dijkstra_path_length(self.G, 'origine', weight='poids')
+        self.G.remove_node('origine')
+        return min([meilleure] + [depart + duree for noeud, duree in durees.items()
+                                  if noeud != 'origine' and noeud[:2] == ('arret', destination)])
+
+
+def test_raptor(horaires):
+    # Des courses qui se dépassent sont réparties sur plusieurs lignes RAPTOR
+    assert horaires.nombre_lignes > 20
+    reference = GrapheEspaceTemps(horaires)
+    aleatoire = random.Random(17)
+    atteintes = avec_correspondance = 0
+    for _ in range(60):
+        origine, destination = aleatoire.sample(range(horaires.nombre_arrets), 2)
+        depart = aleatoire.randint(6 * 3600, 8 * 3600)
+        itineraires = horaires.raptor({origine: 0}, {destination: 0}, depart, max_courses=12)
+        attendu = reference.arrivee(origine, destination, depart)
+        if attendu == INFINI_SECONDES:
+            assert itineraires == []
+            continue
+        atteintes += 1
+        # Front (arrivée, courses) : chaque course de plus avance strictement l'arrivée
+        for precedent, suivant in zip(itineraires, itineraires[1:]):
+            assert suivant.courses > precedent.courses and suivant.arrivee < precedent.arrivee
+        for itineraire in itineraires:
+            assert itineraire.courses == sum(1 for etape in itineraire.etapes if etape['mode'] != 'marche')
+        assert itineraires[-1].arrivee == attendu
+        avec_correspondance += itineraires[-1].courses > 1
+    assert atteintes > 0 and avec_correspondance > 0
@@ -0,0 +1,96 @@
+"""
+Extraction par zone et tuiles XYZ (tuiles.py) : contenu identique à un
+parcours exhaustif, filtré selon le zoom, et mis en cache par version.
+"""
+import math
+
+import pytest
+
+from app import transport
+from conftest import systeme_synthetique
+from tuiles import (ZOOM_DETAIL, ZOOM_PRINCIPALES, rectangle_tuile, tuile_valide, types_noeuds_visibles,
+                    types_routes_visibles)
+
+
+def tuile_du_point(z: int, lat: float, lon: float):
+    """(x, y) de la tuile XYZ contenant le point"""
+    n = 2 ** z
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return x, y
+
+
+def zone_reference(reseau, lat_min, lon_min, lat_max, lon_max):
+    """Nœuds dans le rectangle et arêtes dont le rectangle englobant le recoupe, par parcours exhaustif"""
+    noeuds = {reseau.ids[i] for i in range(reseau.nombre_noeuds)
+              if lat_min <= reseau.lat[i] <= lat_max and lon_min <= reseau.lon[i] <= lon_max}
+    aretes = set()
+    for e in range(reseau.nombre_aretes):
+        u, v = reseau.sources[e], reseau.cibles[e]
+        if min(reseau.lat[u], reseau.lat[v]) <= lat_max and max(reseau.lat[u], reseau.lat[v]) >= lat_min \
+                and min(reseau.lon[u], reseau.lon[v]) <= lon_max and max(reseau.lon[u], reseau.lon[v]) >= lon_min:
+            aretes.add((reseau.ids[u], reseau.ids[v], reseau.nom_route(e)))
+    return noeuds, aretes
+
+
+def test_rectangle_tuile():
+    assert rectangle_tuile(0, 0, 0) == pytest.approx((-85.0511287798, -180.0, 85.0511287798, 180.0))
+    # Tuiles voisines jointives, et chaque tuile au zoom z+1 incluse dans sa parente
+    gauche, droite = rectangle_tuile(5, 10, 12), rectangle_tuile(5, 11, 12)
+    assert gauche[3] == droite[1]
+    haut, bas = rectangle_tuile(5, 10, 12), rectangle_tuile(5, 10, 13)
+    assert bas[2] == pytest.approx(haut[0])
+    parente, enfant = rectangle_tuile(5, 10, 12), rectangle_tuile(6, 21, 25)
+    assert parente[0] <= enfant[0] and parente[1] <= enfant[1]
+    assert enfant[2] <= parente[2] and enfant[3] <= parente[3]
+    assert tuile_valide(3, 7, 7) and not tuile_valide(3, 8, 0) and not tuile_valide(-1, 0, 0)
+
+
+def test_zone_et_niveau_de_detail(systeme):
+    reseau = systeme.reseau_base
+    lat_min, lat_max = min(reseau.lat), max(reseau.lat)
+    lon_min, lon_max = min(reseau.lon), max(reseau.lon)
+    rectangle = (lat_min + 0.2 * (lat_max - lat_min), lon_min + 0.3 * (lon_max - lon_min),
+                 lat_min + 0.6 * (lat_max - lat_min), lon_min + 0.7 * (lon_max - lon_min))
+    noeuds, aretes = zone_reference(reseau, *rectangle)
+    assert noeuds and aretes
+
+    zone = systeme.get_reseau_zone(*rectangle)
+    assert {node['id'] for node in zone['nodes']} == noeuds
+    assert {(edge['from'], edge['to'], edge['route']) for edge in zone['edges']} == aretes
+
+    for zoom in (ZOOM_PRINCIPALES - 1, ZOOM_PRINCIPALES, ZOOM_DETAIL):
+        detail = systeme.get_reseau_zone(*rectangle, zoom=zoom)
+        types_routes, types_noeuds = types_routes_visibles(zoom), types_noeuds_visibles(zoom)
+        assert {(edge['from'], edge['to'], edge['route']) for edge in detail['edges']} == {
+            (edge['from'], edge['to'], edge['route']) for edge in zone['edges']
+            if types_routes is None or edge['type_route'] in types_routes}
+        assert {node['id'] for node in detail['nodes']} == {
+            node['id'] for node in zone['nodes'] if types_noeuds is None or node['type'] in types_noeuds}
+
+
+def test_tuile_en_cache():
+    systeme = systeme_synthetique(80, graine=23)
+    reseau = systeme.reseau_base
+    x, y = tuile_du_point(ZOOM_DETAIL, reseau.lat[0], reseau.lon[0])
+    tuile = systeme.get_tuile(ZOOM_DETAIL, x, y)
+    assert systeme.get_tuile(ZOOM_DETAIL, x, y) is tuile
+    assert reseau.ids[0].encode() in tuile.variantes['identity']
+
+    systeme.ajouter_arret('NOUVEL_ARRET', 'Nouvel arrêt', reseau.lat[0], reseau.lon[0])
+    nouvelle = systeme.get_tuile(ZOOM_DETAIL, x, y)
+    assert nouvelle is not tuile and b'NOUVEL_ARRET' in nouvelle.variantes['identity']
+
+
+def test_api_tuiles_et_zone(client):
+    lat, lon = transport.reseau_base.lat[0], transport.reseau_base.lon[0]
+    x, y = tuile_du_point(ZOOM_DETAIL, lat, lon)
+    reponse = client.get(f'/api/tiles/{ZOOM_DETAIL}/{x}/{y}')
+    assert reponse.status_code == 200 and reponse.headers['ETag']
+    assert reponse.get_json()['tile'] == [ZOOM_DETAIL, x, y]
+    assert transport.reseau_base.ids[0] in {node['id'] for node in reponse.get_json()['nodes']}
+    assert client.get('/api/tiles/2/4/0').status_code == 400
+
+    zone = client.get(f'/api/network?bbox={lat - 0.01},{lon - 0.01},{lat + 0.01},{lon + 0.01}').get_json()
+    assert transport.reseau_base.ids[0] in {node['id'] for node in zone['nodes']}
+    assert client.get('/api/network?bbox=1,2,3').status_code == 400
@@ -0,0 +1,478 @@
+"""
+Horaires de transport en commun (GTFS) et recherche d'itinéraires RAPTOR.
+
+Les courses sont regroupées en lignes au sens de RAPTOR : toutes les courses
+d'une ligne desservent la même suite d'arrêts et ne se dépassent pas, si bien
+qu'elles restent triées à chaque arrêt. Les horaires sont rangés dans deux
+tableaux plats d'entiers (secondes depuis minuit, au-delà de 24 h pour les
+courses de nuit), course par course ; arrêts des lignes, lignes desservant
+chaque arrêt et correspondances à pied sont au format CSR.
+
+Une recherche procède par tours : le tour k trouve les meilleures arrivées
+avec k courses, en parcourant une seule fois chaque ligne passant par un arrêt
+amélioré au tour précédent, puis en propageant les correspondances à pied.
+Chaque tour qui améliore l'arrivée à destination donne un itinéraire du front
+(arrivée, nombre de correspondances).
+"""
+import csv
+import math
+import os
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from index_spatial import Distance, GrilleSpatiale
+
+INFINI_SECONDES = 2 ** 31 - 1
+VITESSE_MARCHE_KMH = 4.5
+# Distance maximale d'une correspondance à pied entre deux arrêts
+RAYON_CORRESPONDANCE_KM = 0.4
+# Distance maximale de marche entre un point de départ ou d'arrivée et un arrêt
+RAYON_ACCES_KM = 0.8
+MAX_CORRESPONDANCES_DEFAUT = 4
+
+# Types de route GTFS (route_type), y compris quelques types étendus courants
+TYPES_TRANSIT = {
+    0: 'tram', 1: 'metro', 2: 'train', 3: 'bus', 4: 'ferry', 5: 'cable', 6: 'telepherique',
+    7: 'funiculaire', 11: 'trolleybus', 12: 'monorail', 100: 'train', 200: 'car',
+    700: 'bus', 715: 'bus_a_la_demande', 1500: 'taxi', 1501: 'taxi_collectif',
+}
+
+
+def lire_horaire(texte: str) -> Optional[int]:
+    """'HH:MM:SS' GTFS (heures éventuellement ≥ 24) -> secondes, None si vide"""
+    texte = (texte or '').strip()
+    if not texte:
+        return None
+    heures, minutes, secondes = texte.split(':')
+    return int(heures) * 3600 + int(minutes) * 60 + int(secondes)
+
+
+def formater_horaire(secondes: int) -> str:
+    """Secondes depuis minuit -> 'HH:MM' (modulo 24 h)"""
+    minutes = (secondes // 60) % (24 * 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def duree_marche(distance_km: float) -> int:
+    return int(math.ceil(distance_km / VITESSE_MARCHE_KMH * 3600))
+
+
+class Itineraire:
+    """Itinéraire trouvé : arrivée, nombre de courses et étapes (dictionnaires)"""
+
+    def __init__(self, depart: int, arrivee: int, courses: int, etapes: List[Dict]):
+        self.depart = depart
+        self.arrivee = arrivee
+        self.courses = courses
+        self.etapes = etapes
+
+    def en_dict(self) -> Dict:
+        return {
+            'depart': formater_horaire(self.depart),
+            'arrivee': formater_horaire(self.arrivee),
+            'duree_min': round((self.arrivee - self.depart) / 60, 1),
+            'correspondances': max(self.courses - 1, 0),
+            'etapes': self.etapes
+        }
+
+
+class HoraireTransit:
+    """Horaires compacts d'un réseau de transport en commun"""
+
+    def __init__(self, ids: List[str], noms: List[str], lat: array, lon: array,
+                 arrets_lignes: array, offsets_lignes: array, noms_lignes: List[str], types_lignes: List[str],
+                 offsets_courses: array, ids_courses: List[str], offsets_horaires: array,
+                 arrivees: array, departs: array, distance: Distance,
+                 correspondances: Iterable[Tuple[str, str, int]] = ()):
+        self.ids = ids
+        self.index = {stop_id: i for i, stop_id in enumerate(ids)}
+        self.noms = noms
+        self.lat = lat
+        self.lon = lon
+        # Ligne p : arrêts arrets_lignes[offsets_lignes[p]:offsets_lignes[p+1]],
+        # courses offsets_courses[p]..offsets_courses[p+1]-1, horaires à partir de offsets_horaires[p]
+        self.arrets_lignes = arrets_lignes
+        self.offsets_lignes = offsets_lignes
+        self.noms_lignes = noms_lignes
+        self.types_lignes = types_lignes
+        self.offsets_courses = offsets_courses
+        self.ids_courses = ids_courses
+        self.offsets_horaires = offsets_horaires
+        self.arrivees = arrivees
+        self.departs = departs
+        self.distance = distance
+        self.index_spatial = GrilleSpatiale(lat, lon, distance)
+        self._construire_passages()
+        self._construire_correspondances(correspondances)
+
+    @property
+    def nombre_arrets(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nombre_lignes(self) -> int:
+        return len(self.offsets_lignes) - 1
+
+    @property
+    def nombre_courses(self) -> int:
+        return len(self.ids_courses)
+
+    def _construire_passages(self):
+        """Lignes desservant chaque arrêt, avec la position de l'arrêt dans la ligne (CSR)"""
+        passages: List[List[Tuple[int, int]]] = [[] for _ in range(self.nombre_arrets)]
+        for p in range(self.nombre_lignes):
+            debut = self.offsets_lignes[p]
+            for position in range(self.offsets_lignes[p + 1] - debut):
+                passages[self.arrets_lignes[debut + position]].append((p, position))
+        self.offsets_passages = array('I', [0])
+        self.passages_ligne = array('I')
+        self.passages_position = array('I')
+        for liste in passages:
+            for p, position in liste:
+                self.passages_ligne.append(p)
+                self.passages_position.append(position)
+            self.offsets_passages.append(len(self.passages_ligne))
+
+    def _construire_correspondances(self, explicites: Iterable[Tuple[str, str, int]]):
+        """Correspondances à pied entre arrêts proches, plus celles de transfers.txt (prioritaires)"""
+        durees: List[Dict[int, int]] = [{} for _ in range(self.nombre_arrets)]
+        for i in range(self.nombre_arrets):
+            for d, j in self.index_spatial.dans_rayon(self.lat[i], self.lon[i], RAYON_CORRESPONDANCE_KM):
+                if j != i:
+                    durees[i][j] = duree_marche(d)
+        for dep, arr, duree in explicites:
+            if dep in self.index and arr in self.index and dep != arr:
+                durees[self.index[dep]][self.index[arr]] = duree
+        self.offsets_correspondances = array('I', [0])
+        self.correspondances = array('I')
+        self.durees_correspondances = array('I')
+        for voisins in durees:
+            for j, duree in sorted(voisins.items()):
+                self.correspondances.append(j)
+                self.durees_correspondances.append(duree)
+            self.offsets_correspondances.append(len(self.correspondances))
+
+    def arrets_proches(self, lat: float, lon: float, rayon_km: float = RAYON_ACCES_KM) -> Dict[int, int]:
+        """Arrêts à moins de rayon_km du point, avec la durée de marche (secondes)"""
+        return {i: duree_marche(d) for d, i in self.index_spatial.dans_rayon(lat, lon, rayon_km)}
+
+    # --- RECHERCHE ---
+
+    def raptor(self, origines: Dict[int, int], destinations: Dict[int, int], depart: int,
+               max_courses: int = MAX_CORRESPONDANCES_DEFAUT + 1) -> List[Itineraire]:
+        """
+        Itinéraires non dominés (arrivée, nombre de courses) des arrêts origines
+        (durée de marche d'accès depuis le départ) vers les arrêts destinations
+        (durée de marche jusqu'à l'arrivée), pour un départ à 'depart' secondes.
+        """
+        n = self.nombre_arrets
+        arrets_lignes, offsets_lignes = self.arrets_lignes, self.offsets_lignes
+        offsets_courses, offsets_horaires = self.offsets_courses, self.offsets_horaires
+        arrivees, departs = self.arrivees, self.departs
+        offsets_passages, passages_ligne, passages_position = \
+            self.offsets_passages, self.passages_ligne, self.passages_position
+
+        # Meilleure arrivée à chaque arrêt, tous tours confondus, et meilleure arrivée
+        # en descendant d'une course : une arrivée à pied ne permet pas de marcher
+        # à nouveau, si bien qu'une course plus tardive peut rester utile
+        meilleures = [INFINI_SECONDES] * n
+        meilleures_courses = [INFINI_SECONDES] * n
+        # Par tour : étiquette de la meilleure arrivée de chaque arrêt amélioré, et
+        # étiquette de la meilleure arrivée en course (point de départ des marches)
+        etiquettes: List[Dict[int, Tuple]] = [{}]
+        etiquettes_courses: List[Dict[int, Tuple]] = [{}]
+        for s, duree in origines.items():
+            meilleures[s] = meilleures_courses[s] = depart + duree
+            etiquettes[0][s] = etiquettes_courses[0][s] = ('acces', duree)
+        marques = set(origines)
+        marques |= self._propager_marche({s: meilleures[s] for s in origines}, meilleures,
+                                         etiquettes[0], INFINI_SECONDES)
+
+        itineraires = []
+        borne = INFINI_SECONDES
+        meilleure_cible = self._meilleure_cible(meilleures, destinations)
+        if meilleure_cible is not None:
+            borne = meilleure_cible[0]
+            itineraires.append(self._reconstruire(etiquettes, etiquettes_courses, 0, meilleure_cible, depart))
+
+        for k in range(1, max_courses + 1):
+            # Lignes à parcourir, depuis le premier arrêt marqué de chacune
+            a_parcourir: Dict[int, int] = {}
+            for s in marques:
+                for j in range(offsets_passages[s], offsets_passages[s + 1]):
+                    p, position = passages_ligne[j], passages_position[j]
+                    if position < a_parcourir.get(p, INFINI_SECONDES):
+                        a_parcourir[p] = position
+            precedent = meilleures[:]
+            etiquettes.append({})
+            etiquettes_courses.append({})
+            tour, tour_courses = etiquettes[k], etiquettes_courses[k]
+            descentes: Dict[int, int] = {}
+
+            for p, position_depart in a_parcourir.items():
+                debut = offsets_lignes[p]
+                nb_arrets = offsets_lignes[p + 1] - debut
+                premiere, derniere = offsets_courses[p], offsets_courses[p + 1]
+                base = offsets_horaires[p]
+                course = -1
+                ligne_course = 0
+                montee = 0
+                for position in range(position_depart, nb_arrets):
+                    s = arrets_lignes[debut + position]
+                    if course >= 0:
+                        a = arrivees[ligne_course + position]
+                        if a < meilleures_courses[s] and a < borne:
+                            meilleures_courses[s] = descentes[s] = a
+                            tour_courses[s] = ('course', p, course, montee, position)
+                            if a < meilleures[s]:
+                                meilleures[s] = a
+                                tour[s] = tour_courses[s]
+                    # Montée possible dans une course plus matinale ?
+                    pret = precedent[s]
+                    if pret < INFINI_SECONDES and (course < 0 or pret <= departs[ligne_course + position]):
+                        t = self._premiere_course(base, nb_arrets, premiere, derniere, position, pret)
+                        if t >= 0 and t != course:
+                            course = t
+                            ligne_course = base + (t - premiere) * nb_arrets
+                            montee = position
+
+            marques = set(descentes)
+            marques |= self._propager_marche(descentes, meilleures, tour, borne)
+            meilleure_cible = self._meilleure_cible(meilleures, destinations)
+            if meilleure_cible is not None and meilleure_cible[0] < borne:
+                borne = meilleure_cible[0]
+                itineraires.append(self._reconstruire(etiquettes, etiquettes_courses, k, meilleure_cible, depart))
+            if not marques:
+                break
+        return itineraires
+
+    def _premiere_course(self, base: int, nb_arrets: int, premiere: int, derniere: int,
+                         position: int, heure: int) -> int:
+        """Première course de la ligne partant de l'arrêt 'position' à heure ou après (-1 si aucune)"""
+        departs = self.departs
+        bas, haut = premiere, derniere
+        while bas < haut:
+            milieu = (bas + haut) // 2
+            if departs[base + (milieu - premiere) * nb_arrets + position] < heure:
+                bas = milieu + 1
+            else:
+                haut = milieu
+        return bas if bas < derniere else -1
+
+    def _propager_marche(self, heures: Dict[int, int], meilleures: List[int],
+                         etiquettes: Dict[int, Tuple], borne: int) -> set:
+        """Correspondances à pied depuis les arrêts atteints en course à ces heures ; arrêts améliorés"""
+        offsets, voisins, durees = self.offsets_correspondances, self.correspondances, self.durees_correspondances
+        ameliores = set()
+        for s, heure in heures.items():
+            for j in range(offsets[s], offsets[s + 1]):
+                q = voisins[j]
+                a = heure + durees[j]
+                if a < meilleures[q] and a < borne:
+                    meilleures[q] = a
+                    etiquettes[q] = ('marche', s, durees[j])
+                    ameliores.add(q)
+        return ameliores
+
+    @staticmethod
+    def _meilleure_cible(meilleures: List[int], destinations: Dict[int, int]) -> Optional[Tuple[int, int, int]]:
+        """(arrivée finale, arrêt de destination, durée de la marche finale) la plus tôt"""
+        meilleure = None
+        for s, duree in destinations.items():
+            if meilleures[s] < INFINI_SECONDES and (meilleure is None or meilleures[s] + duree < meilleure[0]):
+                meilleure = (meilleures[s] + duree, s, duree)
+        return meilleure
+
+    def _reconstruire(self, etiquettes: List[Dict[int, Tuple]], etiquettes_courses: List[Dict[int, Tuple]],
+                      k: int, cible: Tuple[int, int, int], depart: int) -> Itineraire:
+        arrivee, s, marche_finale = cible
+        etapes: List[Dict] = []
+        courses = 0
+        course_requise = False
+        while True:
+            source = etiquettes_courses if course_requise else etiquettes
+            while s not in source[k]:
+                k -= 1
+            etiquette = source[k][s]
+            course_requise = False
+            if etiquette[0] == 'acces':
+                if etiquette[1]:
+                    etapes.append({'mode': 'marche', 'to': self.ids[s], 'to_name': self.noms[s],
+                                   'duree_min': round(etiquette[1] / 60, 1)})
+                break
+            if etiquette[0] == 'marche':
+                _, precedent, duree = etiquette
+                etapes.append({'mode': 'marche', 'from': self.ids[precedent], 'from_name': self.noms[precedent],
+                               'to': self.ids[s], 'to_name': self.noms[s], 'duree_min': round(duree / 60, 1)})
+                s = precedent
+                course_requise = True
+                continue
+            _, p, course, montee, descente = etiquette
+            debut = self.offsets_lignes[p]
+            nb_arrets = self.offsets_lignes[p + 1] - debut
+            ligne_course = self.offsets_horaires[p] + (course - self.offsets_courses[p]) * nb_arrets
+            arret_montee = self.arrets_lignes[debut + montee]
+            etapes.append({
+                'mode': self.types_lignes[p],
+                'ligne': self.noms_lignes[p],
+                'course': self.ids_courses[course],
+                'from': self.ids[arret_montee],
+                'from_name': self.noms[arret_montee],
+                'to': self.ids[s],
+                'to_name': self.noms[s],
+                'depart': formater_horaire(self.departs[ligne_course + montee]),
+                'arrivee': formater_horaire(self.arrivees[ligne_course + descente]),
+                'arrets': descente - montee
+            })
+            courses += 1
+            s = arret_montee
+            k -= 1
+        etapes.reverse()
+        if marche_finale:
+            destination = cible[1]
+            etapes.append({'mode': 'marche', 'from': self.ids[destination], 'from_name': self.noms[destination],
+                           'duree_min': round(marche_finale / 60, 1)})
+        return Itineraire(depart, arrivee, courses, etapes)
+
+    def taille_memoire(self) -> int:
+        tableaux = (self.lat, self.lon, self.arrets_lignes, self.offsets_lignes, self.offsets_courses,
+                    self.offsets_horaires, self.arrivees, self.departs, self.offsets_passages,
+                    self.passages_ligne, self.passages_position, self.offsets_correspondances,
+                    self.correspondances, self.durees_correspondances)
+        return sum(t.itemsize * len(t) for t in tableaux)
+
+
+# --- CHARGEMENT GTFS ---
+
+def _lire_csv(repertoire: str, nom: str, obligatoire: bool = True) -> List[Dict[str, str]]:
+    chemin = os.path.join(repertoire, nom)
+    if not os.path.exists(chemin):
+        if obligatoire:
+            raise ValueError(f"Fichier GTFS manquant : {nom}")
+        return []
+    with open(chemin, encoding='utf-8-sig', newline='') as f:
+        return [{cle.strip(): (valeur or '').strip() for cle, valeur in ligne.items() if cle}
+                for ligne in csv.DictReader(f)]
+
+
+def _services_actifs(repertoire: str, date: str) -> set:
+    """Services (service_id) circulant à la date AAAAMMJJ selon calendar.txt et calendar_dates.txt"""
+    import datetime
+    jour = datetime.datetime.strptime(date, '%Y%m%d')
+    nom_jour = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')[jour.weekday()]
+    services = {
+        ligne['service_id'] for ligne in _lire_csv(repertoire, 'calendar.txt', False)
+        if ligne.get(nom_jour) == '1' and ligne.get('start_date', date) <= date <= ligne.get('end_date', date)
+    }
+    for ligne in _lire_csv(repertoire, 'calendar_dates.txt', False):
+        if ligne.get('date') == date:
+            if ligne.get('exception_type') == '1':
+                services.add(ligne['service_id'])
+            elif ligne.get('exception_type') == '2':
+                services.discard(ligne['service_id'])
+    return services
+
+
+def _interpoler(horaires: List[List]) -> bool:
+    """Complète les horaires manquants (arrêts non marqués) par interpolation ; False si impossible"""
+    connus = [i for i, h in enumerate(horaires) if h[2] is not None or h[3] is not None]
+    if not connus or connus[0] != 0 or connus[-1] != len(horaires) - 1:
+        return False
+    for i in connus:
+        h = horaires[i]
+        h[2] = h[2] if h[2] is not None else h[3]
+        h[3] = h[3] if h[3] is not None else h[2]
+    for a, b in zip(connus, connus[1:]):
+        for i in range(a + 1, b):
+            t = horaires[a][3] + (horaires[b][2] - horaires[a][3]) * (i - a) // (b - a)
+            horaires[i][2] = horaires[i][3] = t
+    return True
+
+
+def charger_gtfs(repertoire: str, distance: Distance, date: Optional[str] = None,
+                 coordonnees: Optional[Dict[str, Tuple[float, float]]] = None) -> HoraireTransit:
+    """
+    Charge un répertoire GTFS (stops, routes, trips, stop_times ; calendar,
+    calendar_dates et transfers optionnels). Avec date (AAAAMMJJ), seules les
+    courses circulant ce jour-là sont conservées. coordonnees donne la position
+    d'identifiants déjà connus (arrêts du réseau routier), qui prime sur stops.txt.
+    """
+    coordonnees = coordonnees or {}
+    ids, noms, lat, lon = [], [], array('d'), array('d')
+    index: Dict[str, int] = {}
+    for ligne in _lire_csv(repertoire, 'stops.txt'):
+        if ligne.get('location_type', '0') not in ('', '0'):
+            continue  # stations, entrées : seuls les points d'arrêt sont desservis
+        stop_id = ligne['stop_id']
+        position = coordonnees.get(stop_id) or (float(ligne['stop_lat']), float(ligne['stop_lon']))
+        index[stop_id] = len(ids)
+        ids.append(stop_id)
+        noms.append(ligne.get('stop_name') or stop_id)
+        lat.append(position[0])
+        lon.append(position[1])
+
+    lignes_gtfs = {}
+    for ligne in _lire_csv(repertoire, 'routes.txt'):
+        type_route = int(ligne.get('route_type') or 3)
+        lignes_gtfs[ligne['route_id']] = (ligne.get('route_short_name') or ligne.get('route_long_name')
+                                          or ligne['route_id'], TYPES_TRANSIT.get(type_route, 'bus'))
+    services = _services_actifs(repertoire, date) if date else None
+    courses_gtfs = {
+        ligne['trip_id']: ligne['route_id'] for ligne in _lire_csv(repertoire, 'trips.txt')
+        if ligne['route_id'] in lignes_gtfs and (services is None or ligne.get('service_id') in services)
+    }
+
+    passages: Dict[str, List[List]] = {}
+    for ligne in _lire_csv(repertoire, 'stop_times.txt'):
+        if ligne['trip_id'] in courses_gtfs and ligne['stop_id'] in index:
+            passages.setdefault(ligne['trip_id'], []).append([
+                int(ligne['stop_sequence']), index[ligne['stop_id']],
+                lire_horaire(ligne.get('arrival_time')), lire_horaire(ligne.get('departure_time'))
+            ])
+
+    # Regroupement des courses par (ligne GTFS, suite d'arrêts), puis en sous-lignes sans dépassement
+    groupes: Dict[Tuple[str, Tuple[int, ...]], List[Tuple[str, List[int], List[int]]]] = {}
+    for trip_id, horaires in passages.items():
+        horaires.sort()
+        if len(horaires) < 2 or not _interpoler(horaires):
+            continue
+        suite = tuple(h[1] for h in horaires)
+        groupes.setdefault((courses_gtfs[trip_id], suite), []).append(
+            (trip_id, [h[2] for h in horaires], [h[3] for h in horaires]))
+
+    arrets_lignes, offsets_lignes = array('I'), array('I', [0])
+    noms_lignes, types_lignes = [], []
+    offsets_courses, ids_courses = array('I', [0]), []
+    offsets_horaires, arrivees, departs = array('I'), array('i'), array('i')
+    for (route_id, suite), courses in groupes.items():
+        courses.sort(key=lambda c: (c[2][0], c[1][-1]))
+        sous_lignes: List[List] = []
+        for course in courses:
+            for sous_ligne in sous_lignes:
+                derniere = sous_ligne[-1]
+                if all(a >= b for a, b in zip(course[1], derniere[1])) and \
+                        all(a >= b for a, b in zip(course[2], derniere[2])):
+                    sous_ligne.append(course)
+                    break
+            else:
+                sous_lignes.append([course])
+        for sous_ligne in sous_lignes:
+            arrets_lignes.extend(suite)
+            offsets_lignes.append(len(arrets_lignes))
+            noms_lignes.append(lignes_gtfs[route_id][0])
+            types_lignes.append(lignes_gtfs[route_id][1])
+            offsets_horaires.append(len(arrivees))
+            for trip_id, arr, dep in sous_ligne:
+                ids_courses.append(trip_id)
+                arrivees.extend(arr)
+                departs.extend(dep)
+            offsets_courses.append(len(ids_courses))
+
+    correspondances = [
+        (ligne['from_stop_id'], ligne['to_stop_id'], int(ligne.get('min_transfer_time') or 0))
+        for ligne in _lire_csv(repertoire, 'transfers.txt', False)
+        if ligne.get('transfer_type', '0') in ('', '0', '1', '2')
+    ]
+    return HoraireTransit(ids, noms, lat, lon, arrets_lignes, offsets_lignes, noms_lignes, types_lignes,
+                          offsets_courses, ids_courses, offsets_horaires, arrivees, departs, distance,
+                          correspondances)
@@ -0,0 +1,49 @@
+"""
+Découpage du réseau en tuiles pour la carte.
+
+Les tuiles suivent le schéma XYZ de Leaflet (projection Web Mercator) :
+une tuile (z, x, y) correspond à un rectangle en latitude/longitude, dont le
+contenu est extrait par l'index spatial. Le niveau de détail dépend du zoom :
+aux petits zooms, seules les routes majeures et les arrêts principaux sont
+retenus, si bien qu'une tuile reste légère quelle que soit la taille du réseau.
+"""
+import math
+from typing import Optional, Set, Tuple
+
+ZOOM_MAX = 22
+# À partir de ce zoom, toutes les routes et tous les arrêts sont affichés
+ZOOM_DETAIL = 14
+# À partir de ce zoom, les routes principales s'ajoutent aux routes express
+ZOOM_PRINCIPALES = 11
+
+TYPES_MAJEURS = {'express', 'principale'}
+# Arrêts affichés sous ZOOM_DETAIL (les arrêts intermédiaires sont omis)
+TYPES_NOEUDS_MAJEURS = {'depart', 'arrivee'}
+
+
+def rectangle_tuile(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(lat_min, lon_min, lat_max, lon_max) de la tuile XYZ"""
+    n = 2 ** z
+    lon_min = x / n * 360.0 - 180.0
+    lon_max = (x + 1) / n * 360.0 - 180.0
+    lat_max = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    lat_min = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return lat_min, lon_min, lat_max, lon_max
+
+
+def tuile_valide(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= ZOOM_MAX and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def types_routes_visibles(zoom: int) -> Optional[Set[str]]:
+    """Types de route affichés à ce zoom (None : tous)"""
+    if zoom >= ZOOM_DETAIL:
+        return None
+    if zoom >= ZOOM_PRINCIPALES:
+        return TYPES_MAJEURS
+    return {'express'}
+
+
+def types_noeuds_visibles(zoom: int) -> Optional[Set[str]]:
+    """Types d'arrêt affichés à ce zoom (None : tous)"""
+    return None if zoom >= ZOOM_DETAIL else TYPES_NOEUDS_MAJEURS